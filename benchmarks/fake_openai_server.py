@@ -0,0 +1,374 @@
+"""
+Local stand-in for the parts of the OpenAI API the summary tools use
+
+Implements chat completions, file upload/download and batches closely
+enough for the official client, so batch mode and the async summarizer can
+be exercised without an API key or spending tokens:
+
+    python -m benchmarks.fake_openai_server --port 8089 --batch-delay 5
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake \\
+        python view_summaries.py --batch --poll-interval 1
+
+Completions are deterministic: the summary is built from the profile lines
+of the prompt. Latency, 429s and rate-limit headers can be injected to see
+how the callers back off.
+"""
+
+import re
+import json
+import time
+import uuid
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def fake_completion(body):
+    """Build a deterministic chat completion for a request body"""
+    messages = body.get("messages") or []
+    prompt = messages[-1].get("content", "") if messages else ""
+
+    # Profile lines look like "Name: Jane Doe"
+    fields = [line for line in prompt.split("\n\n")[1:] if re.match(r"^\w[\w ]*: ", line)]
+    content = "Fake summary. " + "; ".join(fields) if fields else "Fake summary."
+
+    prompt_tokens = max(1, len(prompt) // 4)
+    completion_tokens = max(1, len(content) // 4)
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake-model"),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content}
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+class FakeOpenAIState:
+    """Files, batches and counters shared by all request handlers"""
+
+    def __init__(self, latency=0.0, rate_limit_every=0, batch_delay=1.0, requests_per_minute=10000):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.batch_delay = batch_delay
+        self.requests_per_minute = requests_per_minute
+
+        self.lock = threading.Lock()
+        self.files = {}  # id -> (metadata, bytes)
+        self.batches = {}  # id -> batch object
+        self.completions = 0
+        self.rate_limited = 0
+
+    def add_file(self, content, filename, purpose):
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        metadata = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed"
+        }
+
+        with self.lock:
+            self.files[file_id] = (metadata, content)
+
+        return metadata
+
+    def run_batch(self, batch_id):
+        """Process a batch in the background after batch_delay seconds"""
+        time.sleep(self.batch_delay / 2)
+        with self.lock:
+            batch = self.batches[batch_id]
+            if batch["status"] != "validating":
+                return
+            batch["status"] = "in_progress"
+            batch["in_progress_at"] = int(time.time())
+            _, content = self.files[batch["input_file_id"]]
+
+        time.sleep(self.batch_delay / 2)
+
+        outputs, errors = [], []
+        for line in content.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+
+            request = json.loads(line)
+            custom_id = request.get("custom_id")
+            body = request.get("body") or {}
+
+            if not body.get("messages"):
+                errors.append({
+                    "id": f"batch_req_{uuid.uuid4().hex[:24]}",
+                    "custom_id": custom_id,
+                    "response": {
+                        "status_code": 400,
+                        "body": {"error": {"message": "messages is required", "type": "invalid_request_error"}}
+                    },
+                    "error": None
+                })
+                continue
+
+            outputs.append({
+                "id": f"batch_req_{uuid.uuid4().hex[:24]}",
+                "custom_id": custom_id,
+                "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": fake_completion(body)},
+                "error": None
+            })
+
+        def to_jsonl(records):
+            return "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+
+        output_file = self.add_file(to_jsonl(outputs), "batch_output.jsonl", "batch_output") if outputs else None
+        error_file = self.add_file(to_jsonl(errors), "batch_errors.jsonl", "batch_output") if errors else None
+
+        with self.lock:
+            batch = self.batches[batch_id]
+            if batch["status"] != "in_progress":
+                return
+            batch.update({
+                "status": "completed",
+                "completed_at": int(time.time()),
+                "output_file_id": output_file and output_file["id"],
+                "error_file_id": error_file and error_file["id"],
+                "request_counts": {
+                    "total": len(outputs) + len(errors),
+                    "completed": len(outputs),
+                    "failed": len(errors)
+                }
+            })
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Routes requests to the fake endpoints"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+
+        match = re.fullmatch(r"/v1/files/([\w-]+)(/content)?", path)
+        if match:
+            with self.state.lock:
+                entry = self.state.files.get(match.group(1))
+            if entry is None:
+                return self._error(404, "No such file")
+            metadata, content = entry
+            if match.group(2):
+                return self._send(200, content, "application/octet-stream")
+            return self._json(200, metadata)
+
+        match = re.fullmatch(r"/v1/batches/([\w-]+)", path)
+        if match:
+            with self.state.lock:
+                batch = self.state.batches.get(match.group(1))
+                batch = dict(batch) if batch else None
+            if batch is None:
+                return self._error(404, "No such batch")
+            return self._json(200, batch)
+
+        if path == "/stats":
+            with self.state.lock:
+                return self._json(200, {
+                    "completions": self.state.completions,
+                    "rate_limited": self.state.rate_limited,
+                    "files": len(self.state.files),
+                    "batches": len(self.state.batches)
+                })
+
+        self._error(404, f"Unknown endpoint {path}")
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        if path == "/v1/chat/completions":
+            return self._chat_completion(json.loads(body or b"{}"))
+
+        if path == "/v1/files":
+            return self._upload(body)
+
+        if path == "/v1/batches":
+            return self._create_batch(json.loads(body or b"{}"))
+
+        match = re.fullmatch(r"/v1/batches/([\w-]+)/cancel", path)
+        if match:
+            with self.state.lock:
+                batch = self.state.batches.get(match.group(1))
+                if batch is None:
+                    return self._error(404, "No such batch")
+                if batch["status"] in ("validating", "in_progress"):
+                    batch["status"] = "cancelled"
+                    batch["cancelled_at"] = int(time.time())
+                batch = dict(batch)
+            return self._json(200, batch)
+
+        self._error(404, f"Unknown endpoint {path}")
+
+    def _chat_completion(self, body):
+        with self.state.lock:
+            self.state.completions += 1
+            count = self.state.completions
+            throttle = self.state.rate_limit_every and count % self.state.rate_limit_every == 0
+            if throttle:
+                self.state.rate_limited += 1
+
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        if throttle:
+            return self._error(429, "Rate limit reached", "rate_limit_exceeded", {"retry-after-ms": "200"})
+
+        rpm = self.state.requests_per_minute
+        self._json(200, fake_completion(body), {
+            "x-ratelimit-limit-requests": str(rpm),
+            "x-ratelimit-remaining-requests": str(max(0, rpm - count % rpm)),
+            "x-ratelimit-reset-requests": "1s"
+        })
+
+    def _upload(self, body):
+        # Parse the multipart form with the email parser, no third-party deps needed
+        header = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode("utf-8")
+        message = BytesParser(policy=HTTP).parsebytes(header + body)
+
+        content, filename, purpose = b"", "upload.jsonl", "batch"
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                content = part.get_payload(decode=True) or b""
+                filename = part.get_filename() or filename
+            elif name == "purpose":
+                purpose = part.get_payload(decode=True).decode("utf-8")
+
+        self._json(200, self.state.add_file(content, filename, purpose))
+
+    def _create_batch(self, body):
+        input_file_id = body.get("input_file_id")
+        with self.state.lock:
+            if input_file_id not in self.state.files:
+                return self._error(400, f"No such file {input_file_id}")
+
+            batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+            batch = self.state.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": body.get("endpoint"),
+                "input_file_id": input_file_id,
+                "completion_window": body.get("completion_window", "24h"),
+                "status": "validating",
+                "created_at": int(time.time()),
+                "metadata": body.get("metadata"),
+                "output_file_id": None,
+                "error_file_id": None,
+                "request_counts": {"total": 0, "completed": 0, "failed": 0}
+            }
+            batch = dict(batch)
+
+        threading.Thread(target=self.state.run_batch, args=(batch_id,), daemon=True).start()
+        self._json(200, batch)
+
+    def _json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+    def _error(self, status, message, error_type="invalid_request_error", headers=None):
+        self._json(status, {"error": {"message": message, "type": error_type, "code": None}}, headers)
+
+    def _send(self, status, data, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeOpenAIServer:
+    """Runs the fake API in a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0, **options):
+        """
+        Create the server
+
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 picks a free one)
+            **options: Passed to FakeOpenAIState (latency, rate_limit_every, ...)
+        """
+        self.httpd = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = FakeOpenAIState(**options)
+        self.thread = None
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8089, help="Port to listen on (default: 8089)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every completion")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth completion with a 429")
+    parser.add_argument("--batch-delay", type=float, default=1.0, help="Seconds a batch takes to complete")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        args.host,
+        args.port,
+        latency=args.latency,
+        rate_limit_every=args.rate_limit_every,
+        batch_delay=args.batch_delay
+    )
+    print(f"Fake OpenAI API listening on {server.base_url}")
+
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
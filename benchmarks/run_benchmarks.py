@@ -0,0 +1,618 @@
+"""
+Offline benchmarks for the local pipeline
+
+Times the parts of the tools that run on every lead, against synthetic lead
+files of 1k, 10k, 100k and 1M rows and with stand-ins for everything that
+would otherwise go over the network:
+
+    load            read_table() of the CSV (and Parquet with pyarrow), compact_dtypes()
+    selection       select_pending_rows() and row_identities()
+    checkpoints     CheckpointJournal.apply()/compact() and the threaded ResultWriter
+    caches          LRUCache, PersistentCache and the company domain index
+    companies       canonicalize_company_name() and group_rows_by_company()
+    mx              the email finder's MX lookup against an in-process fake resolver
+    summaries       generate_summaries_async() against a local fake OpenAI server
+    startup         cold start of every tool's --help in a new interpreter, once
+                    and not per size; fails the run when a tool takes longer than
+                    --startup-budget or imports pandas, openai, selenium, ... for it
+
+Every benchmark runs --repeat times and the fastest run is reported, the
+results are written as JSON. Pass an earlier result file to --compare to
+list the benchmarks that got slower:
+
+    python -m benchmarks.run_benchmarks --sizes 1k 10k
+    python -m benchmarks.run_benchmarks --sizes 10k --compare benchmarks/results/baseline.json
+    python -m benchmarks.run_benchmarks --groups startup --startup-budget 0.3
+
+Running the file directly (python benchmarks/run_benchmarks.py ...) works
+too, the repository root is put on the import path first.
+
+Synthetic lead files are generated once into benchmarks/data/.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import resource
+import statistics
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    # Run as a script: make benchmarks and email_finder importable from the repo root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_resolver import FakeResolver
+from benchmarks.synthetic import ensure_lead_file, parse_size
+from email_finder.services.domain_discovery import canonicalize_company_name, group_rows_by_company, pattern_domain
+from email_finder.services.domain_index import CompanyDomainIndex
+from email_finder.utils.cache import LRUCache, PersistentCache
+from email_finder.utils.csv_handler import CheckpointJournal, ResultWriter, select_pending_rows
+from email_finder.utils.dtypes import compact_dtypes
+from email_finder.utils.rate_limiter import AdaptiveRateLimiter
+from email_finder.utils.resume import row_identities
+from email_finder.utils.table_io import read_table, write_table
+
+try:
+    import pyarrow  # noqa: F401 - Parquet benchmarks only
+except ImportError:  # optional dependency
+    pyarrow = None
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.join(REPO_DIR, "benchmarks")
+
+DEFAULT_SIZES = ["1k", "10k", "100k", "1m"]
+
+# Every benchmark group in the order they run
+GROUPS = ["load", "selection", "checkpoints", "caches", "companies", "mx", "summaries", "startup"]
+
+# Groups that run once rather than for every lead file size
+SIZELESS_GROUPS = ["startup"]
+
+# Command lines (after the interpreter) timed by the startup group
+ENTRY_POINTS = {
+    "email_finder_module": ["-m", "email_finder", "--help"],
+    "email_finder_find": ["-m", "email_finder", "find", "--help"],
+    "email_finder_script": ["email-finder.py", "--help"],
+    "view_summaries": ["view_summaries.py", "--help"],
+    "scraper_tool": ["scraper_tool.py", "--help"],
+    "linkedin_connector": ["linkedin_connector.py", "--help"],
+    "test_email_finder": ["test_email_finder.py", "--help"]
+}
+
+# Imported on first use only, none of them may load for --help
+HEAVY_MODULES = [
+    "pandas", "numpy", "pyarrow", "openai", "httpx", "tiktoken", "requests", "bs4", "dns.resolver",
+    "selenium.webdriver"
+]
+
+# Benchmarks faster than this are too noisy to call a regression
+MIN_COMPARABLE_SECONDS = 0.005
+
+# Startup times differing by less than this are process creation noise
+MIN_STARTUP_DIFFERENCE = 0.05
+
+
+class BenchmarkRun:
+    """Times benchmarks for one lead file size and collects the results"""
+
+    def __init__(self, rows, csv_file, work_dir, repeat, limits):
+        """
+        Args:
+            rows (int): Number of leads in csv_file
+            csv_file (str): Synthetic lead file
+            work_dir (str): Scratch directory for outputs, journals and caches
+            repeat (int): Times each benchmark runs
+            limits (dict): Most items for the slower per-item benchmarks
+        """
+        self.rows = rows
+        self.csv_file = csv_file
+        self.work_dir = work_dir
+        self.repeat = max(1, repeat)
+        self.limits = limits
+        self.results = {}
+
+        self.df = None
+
+    def measure(self, name, items, run, setup=None):
+        """
+        Time run() repeat times and record the fastest
+
+        Args:
+            name (str): Benchmark name
+            items (int): Items one run processes, for the per-second rate
+            run (callable): Called with setup()'s result (or nothing)
+            setup (callable, optional): Untimed preparation before every run
+
+        Returns:
+            The last run's return value
+        """
+        times = []
+        result = None
+        for _ in range(self.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            result = run(state) if setup else run()
+            times.append(time.perf_counter() - start)
+
+        best = min(times)
+        self.results[name] = {
+            "items": items,
+            "seconds": round(best, 6),
+            "median_seconds": round(statistics.median(times), 6),
+            "items_per_second": round(items / best, 1) if best > 0 else None
+        }
+        print(f"  {name:<24} {best:>10.4f}s  {items / best if best > 0 else 0:>14,.0f} items/s")
+        return result
+
+    def scratch(self, name):
+        """Fresh path in the work directory"""
+        path = os.path.join(self.work_dir, name)
+        for leftover in (path, f"{path}.journal", f"{path}.state", f"{path}.tmp"):
+            if os.path.isdir(leftover):
+                shutil.rmtree(leftover)
+            elif os.path.exists(leftover):
+                os.remove(leftover)
+        return path
+
+    def lead_frame(self):
+        """Freshly loaded copy of the leads"""
+        return read_table(self.csv_file)
+
+    # -- Groups -----------------------------------------------------------
+
+    def bench_load(self):
+        self.df = self.measure("load_csv", self.rows, lambda: read_table(self.csv_file))
+
+        if pyarrow is not None:
+            parquet_file = self.scratch("leads.parquet")
+            write_table(self.df, parquet_file)
+            self.measure("load_parquet", self.rows, lambda: read_table(parquet_file))
+            self.measure(
+                "load_parquet_projected", self.rows,
+                lambda: read_table(parquet_file, columns=["First Name", "Last Name", "Company Name", "LinkedIn Profile"])
+            )
+
+        self.measure("compact_dtypes", self.rows, compact_dtypes, setup=lambda: self.df.copy())
+
+    def bench_selection(self):
+        self.measure("select_pending_rows", self.rows,
+                     lambda: select_pending_rows(self.df, "LinkedIn Profile", ["Email"]))
+        self.measure("row_identities", self.rows, lambda: row_identities(self.df))
+
+    def bench_checkpoints(self):
+        count = min(self.rows, self.limits["journal_rows"])
+        labels = self.df.index[:count]
+        values = {"Email": "someone@example.com", "Email Confidence": 80, "Email Method": "pattern",
+                  "Company Domain": "example.com"}
+
+        def new_journal():
+            output_file = self.scratch("journal_output.csv")
+            return CheckpointJournal(output_file, self.df.copy())
+
+        def apply_rows(journal):
+            for label in labels:
+                journal.apply(label, values)
+            journal.sync()
+            return journal
+
+        journal = self.measure("journal_apply", count, apply_rows, setup=new_journal)
+        self.measure("journal_compact", self.rows, lambda: journal.compact())
+        journal.close()
+
+        def writer_rows(journal):
+            writer = ResultWriter(journal, flush_rows=50, flush_interval=30.0).start()
+            for label in labels:
+                writer.submit(label, values)
+            writer.close()
+            journal.discard()
+
+        def new_chunk_journal():
+            return CheckpointJournal(None, self.df.copy(), journal_file=self.scratch("writer.journal"))
+
+        self.measure("result_writer", count, writer_rows, setup=new_chunk_journal)
+
+    def bench_caches(self):
+        companies = self.df["Company Name"].tolist()
+        canonical = [canonicalize_company_name(name) for name in companies]
+
+        def lru_lookups():
+            cache = LRUCache(maxsize=10000, ttl=3600)
+            for name in canonical:
+                cache.get_or_compute(name, lambda: pattern_domain(name))
+            return cache
+
+        cache = self.measure("lru_get_or_compute", len(canonical), lru_lookups)
+        self.results["lru_get_or_compute"]["hit_ratio"] = round(cache.hits / max(1, cache.hits + cache.misses), 4)
+
+        count = min(self.rows, self.limits["cache_keys"])
+        keys = [f"{name}|{i}" for i, name in enumerate(canonical[:count])]
+
+        def new_cache():
+            return PersistentCache(self.scratch("cache.sqlite"))
+
+        def cache_writes(cache):
+            for key in keys:
+                cache.set("domain", key, key + ".com")
+            return cache
+
+        cache = self.measure("persistent_cache_set", count, cache_writes, setup=new_cache)
+
+        def cache_reads():
+            for key in keys:
+                cache.get("domain", key)
+
+        self.measure("persistent_cache_get", count, cache_reads)
+        cache.close()
+
+        # Half of the companies are known, the others are looked up fuzzily and miss
+        distinct = sorted(set(canonical))
+        known = distinct[::2]
+        count = min(self.rows, self.limits["index_lookups"])
+
+        def new_index():
+            index = CompanyDomainIndex(None)
+            index.add_many(((name, pattern_domain(name)) for name in known), "search")
+            return index
+
+        def index_lookups(index):
+            for name in companies[:count]:
+                index.lookup(name)
+            return index
+
+        index = self.measure("domain_index_lookup", count, index_lookups, setup=new_index)
+        stats = index.stats()
+        self.results["domain_index_lookup"].update(
+            exact_hits=stats["exact_hits"], fuzzy_hits=stats["fuzzy_hits"], misses=stats["misses"]
+        )
+
+    def bench_companies(self):
+        companies = self.df["Company Name"].tolist()
+        self.measure("canonicalize_company", len(companies),
+                     lambda: [canonicalize_company_name(name) for name in companies])
+        groups, stats = self.measure("group_rows_by_company", len(companies),
+                                     lambda: group_rows_by_company(enumerate(companies)))
+        self.results["group_rows_by_company"]["companies"] = stats["companies"]
+
+    def bench_mx(self):
+        domains = sorted({pattern_domain(canonicalize_company_name(name)) for name in self.df["Company Name"]})
+        domains = domains[:self.limits["mx_domains"]]
+        email_finder = load_email_finder()
+
+        def new_finder():
+            os.environ["EMAIL_FINDER_CACHE"] = self.scratch("mx_cache.sqlite")
+            os.environ["DOMAIN_INDEX"] = "off"
+            return email_finder.EmailFinder(log_level="WARNING")
+
+        def lookups(finder):
+            for domain in domains:
+                finder._get_mx_record(domain)
+            return finder
+
+        with FakeResolver(latency=self.limits["dns_latency"]) as resolver:
+            finder = self.measure("mx_lookup_cold", len(domains), lookups, setup=new_finder)
+            self.measure("mx_lookup_warm", len(domains), lambda: lookups(finder))
+
+            # A new process: the in-memory cache is empty, the persistent cache is warm
+            path = finder.persistent_cache.path
+
+            def restarted_finder():
+                os.environ["EMAIL_FINDER_CACHE"] = path
+                return email_finder.EmailFinder(log_level="WARNING")
+
+            self.measure("mx_lookup_persistent", len(domains), lookups, setup=restarted_finder)
+            self.results["mx_lookup_cold"]["dns_queries"] = resolver.queries
+
+    def bench_summaries(self):
+        from email_finder.services.summary_generator import generate_summaries_async
+        from benchmarks.fake_openai_server import FakeOpenAIServer
+
+        count = min(self.rows, self.limits["summaries"])
+        profiles = [
+            (i, {"name": f"{first} {last}", "title": title, "company": company, "location": location})
+            for i, (first, last, title, company, location) in enumerate(zip(
+                self.df["First Name"][:count], self.df["Last Name"][:count], self.df["Job Title"][:count],
+                self.df["Company Name"][:count], self.df["Location"][:count]
+            ))
+        ]
+
+        with FakeOpenAIServer(latency=self.limits["openai_latency"]) as server:
+            os.environ["OPENAI_BASE_URL"] = server.base_url
+            os.environ["OPENAI_API_KEY"] = "fake"
+            os.environ["SUMMARY_CACHE"] = "off"
+
+            def summarize():
+                summaries = []
+                limiter = AdaptiveRateLimiter(max_concurrency=self.limits["concurrency"])
+                asyncio.run(generate_summaries_async(profiles, limiter, lambda key, summary: summaries.append(summary)))
+                return summaries
+
+            summaries = self.measure("summaries_async", count, summarize)
+
+        errors = sum(1 for summary in summaries if summary.startswith("[ERROR"))
+        self.results["summaries_async"]["errors"] = errors
+
+
+def load_email_finder():
+    """Import the email finder module (it loads .env and sets up logging)"""
+    from email_finder import email_finder
+    return email_finder
+
+
+def imported_modules(importtime_output):
+    """Names of the modules listed in the stderr of python -X importtime"""
+    modules = set()
+    for line in importtime_output.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def bench_startup(repeat):
+    """
+    Time --help of every tool in a fresh interpreter
+
+    Args:
+        repeat (int): Runs per tool, the fastest counts
+
+    Returns:
+        dict: Seconds per entry point (including the bare interpreter) and
+            the heavy modules each one imported
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", LOG_FILE="off")
+    results = {}
+
+    commands = dict(interpreter=["-c", "pass"], **ENTRY_POINTS)
+    for name, command in commands.items():
+        times = []
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable, *command], cwd=REPO_DIR, env=env, capture_output=True)
+            times.append(time.perf_counter() - start)
+
+        traced = subprocess.run(
+            [sys.executable, "-X", "importtime", *command], cwd=REPO_DIR, env=env, capture_output=True, text=True
+        )
+        heavy = sorted(imported_modules(traced.stderr) & set(HEAVY_MODULES))
+
+        best = min(times)
+        results[name] = {
+            "seconds": round(best, 6),
+            "median_seconds": round(statistics.median(times), 6),
+            "exit_code": completed.returncode,
+            "heavy_modules": heavy
+        }
+        note = f"  imports {', '.join(heavy)}" if heavy else ""
+        print(f"  {name:<24} {best:>10.4f}s{note}")
+
+    return results
+
+
+def startup_failures(startup, budget):
+    """
+    Entry points over the startup budget or importing heavy modules for --help
+
+    Args:
+        startup (dict): Results of bench_startup()
+        budget (float): Most seconds a tool's --help may take
+
+    Returns:
+        list: One message per failure
+    """
+    failures = []
+    for name, result in startup.items():
+        if name == "interpreter":
+            continue
+        if result["exit_code"] != 0:
+            failures.append(f"{name}: --help exited with {result['exit_code']}")
+        if result["seconds"] > budget:
+            failures.append(f"{name}: {result['seconds']:.3f}s, over the budget of {budget:.3f}s")
+        if result["heavy_modules"]:
+            failures.append(f"{name}: imports {', '.join(result['heavy_modules'])} for --help")
+    return failures
+
+
+def environment_info():
+    """Versions and machine details stored with the results"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pyarrow.__version__ if pyarrow is not None else None
+    }
+
+
+def compare_results(current, baseline, tolerance):
+    """
+    Find benchmarks that got slower than in a baseline result file
+
+    Args:
+        current (dict): Results of this run
+        baseline (dict): Results loaded from an earlier run
+        tolerance (float): Allowed slowdown, 0.2 means 20%
+
+    Returns:
+        list: (size, benchmark, baseline seconds, current seconds) of every regression
+    """
+    regressions = []
+    for name, result in current.get("startup", {}).items():
+        before = baseline.get("startup", {}).get(name)
+        if not before or result["seconds"] - before["seconds"] < MIN_STARTUP_DIFFERENCE:
+            continue
+        if result["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append(("startup", name, before["seconds"], result["seconds"],
+                                result["seconds"] / before["seconds"]))
+
+    for size, benchmarks in current["results"].items():
+        for name, result in benchmarks.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before:
+                continue
+
+            # Compare rates, so a changed item limit doesn't count as a regression
+            old_rate, new_rate = before.get("items_per_second"), result.get("items_per_second")
+            if not old_rate or not new_rate or result["seconds"] < MIN_COMPARABLE_SECONDS:
+                continue
+            if new_rate < old_rate / (1 + tolerance):
+                regressions.append((size, name, before["seconds"], result["seconds"], old_rate / new_rate))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the lead pipeline")
+    parser.add_argument(
+        "--sizes",
+        help="Lead file sizes to run (default: 1k 10k 100k 1m)",
+        nargs="+",
+        default=DEFAULT_SIZES
+    )
+    parser.add_argument(
+        "--groups",
+        help=f"Benchmark groups to run (default: all of {', '.join(GROUPS)})",
+        nargs="+",
+        choices=GROUPS,
+        default=GROUPS
+    )
+    parser.add_argument("--repeat", help="Runs per benchmark, the fastest counts (default: 3)", type=int, default=3)
+    parser.add_argument(
+        "--output", "-o",
+        help="JSON file to write (default: benchmarks/results/benchmark-<time>.json)",
+        default=None
+    )
+    parser.add_argument("--compare", help="Earlier result file to check for regressions", default=None)
+    parser.add_argument(
+        "--tolerance",
+        help="Slowdown allowed before --compare reports a regression (default: 0.25 = 25%%)",
+        type=float,
+        default=0.25
+    )
+    parser.add_argument(
+        "--data-dir",
+        help="Where generated lead files are kept (default: benchmarks/data)",
+        default=os.path.join(BENCHMARK_DIR, "data")
+    )
+    parser.add_argument("--seed", help="Random seed of the lead files (default: 42)", type=int, default=42)
+    parser.add_argument("--journal-rows", help="Most rows journaled per run (default: 10000)", type=int, default=10000)
+    parser.add_argument("--cache-keys", help="Most persistent cache keys (default: 20000)", type=int, default=20000)
+    parser.add_argument("--index-lookups", help="Most domain index lookups (default: 100000)", type=int,
+                        default=100000)
+    parser.add_argument("--mx-domains", help="Most MX lookups (default: 5000)", type=int, default=5000)
+    parser.add_argument("--dns-latency", help="Seconds per fake DNS query (default: 0)", type=float, default=0.0)
+    parser.add_argument("--summaries", help="Most summaries generated (default: 500)", type=int, default=500)
+    parser.add_argument("--openai-latency", help="Seconds per fake completion (default: 0)", type=float,
+                        default=0.0)
+    parser.add_argument("--concurrency", help="Summary requests in flight (default: 8)", type=int, default=8)
+    parser.add_argument(
+        "--startup-budget",
+        help="Most seconds a tool's --help may take, startup group only (default: 0.25)",
+        type=float,
+        default=0.25
+    )
+    args = parser.parse_args()
+
+    limits = {
+        "journal_rows": args.journal_rows,
+        "cache_keys": args.cache_keys,
+        "index_lookups": args.index_lookups,
+        "mx_domains": args.mx_domains,
+        "dns_latency": args.dns_latency,
+        "summaries": args.summaries,
+        "openai_latency": args.openai_latency,
+        "concurrency": args.concurrency
+    }
+
+    # Benchmarks must not depend on the caches or stores of real runs
+    for name in ("LEAD_STORE", "EMAIL_CALL_LOG", "LLM_CALL_LOG", "METRICS_TEXTFILE"):
+        os.environ.pop(name, None)
+    os.environ["LLM_CALL_LOG"] = "off"
+    random.seed(args.seed)
+
+    report = {
+        "suite": "pipeline",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "settings": dict(limits, repeat=args.repeat, seed=args.seed, groups=args.groups,
+                         startup_budget=args.startup_budget),
+        "results": {},
+        # Peak memory of the process after each size, it only ever grows
+        "peak_rss_mb": {}
+    }
+
+    failures = []
+    if "startup" in args.groups:
+        print("\nStartup (--help in a new interpreter)")
+        report["startup"] = bench_startup(args.repeat)
+        failures = startup_failures(report["startup"], args.startup_budget)
+
+    sized_groups = [group for group in GROUPS if group in args.groups and group not in SIZELESS_GROUPS]
+    work_dir = tempfile.mkdtemp(prefix="email_finder_bench_")
+    try:
+        for size in args.sizes if sized_groups else []:
+            rows = parse_size(size)
+            print(f"\n{size} leads ({rows} rows)")
+            start = time.perf_counter()
+            csv_file = ensure_lead_file(rows, args.data_dir, args.seed)
+            print(f"  lead file {csv_file} ready in {time.perf_counter() - start:.1f}s")
+
+            run = BenchmarkRun(rows, csv_file, work_dir, args.repeat, limits)
+            run.df = run.lead_frame()
+            for group in sized_groups:
+                getattr(run, f"bench_{group}")()
+
+            report["results"][size] = run.results
+            report["peak_rss_mb"][size] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output_file = args.output
+    if not output_file:
+        os.makedirs(os.path.join(BENCHMARK_DIR, "results"), exist_ok=True)
+        output_file = os.path.join(BENCHMARK_DIR, "results", f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output_file}")
+
+    status = 0
+    if failures:
+        print("\nStartup budget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        status = 1
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        regressions = compare_results(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} benchmarks slower than {args.compare} by more than {args.tolerance:.0%}:")
+            for size, name, before, after, factor in regressions:
+                print(f"  {size} {name}: {before:.4f}s -> {after:.4f}s ({factor:.2f}x slower)")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
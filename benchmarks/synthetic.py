@@ -0,0 +1,190 @@
+"""
+Synthetic lead files for the benchmarks
+
+Leads look like the files the tools process: names, companies spelled
+several ways ("Acme Inc", "ACME, Inc.", "acme"), job titles, locations and
+LinkedIn URLs in the usual variants, with part of the rows already carrying
+an email and a summary so pending-row selection has something to skip.
+Generation is seeded, so the same size always gives the same file.
+
+    python -m benchmarks.synthetic 100k leads_100k.csv
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from email_finder.utils.table_io import write_table
+
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Karen",
+    "Wei", "Priya", "Ahmed", "Sofia", "Kenji", "Olga", "Mateo", "Amara", "Lars", "Chloé"
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Chen", "Patel", "Khan", "Rossi", "Tanaka", "Ivanova", "Müller", "Okafor", "Nielsen", "O'Brien"
+]
+
+COMPANY_WORDS = [
+    "Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Wonka", "Tyrell", "Cyberdyne", "Soylent",
+    "Hooli", "Vandelay", "Massive", "Dynamic", "Blue", "Summit", "Pioneer", "Quantum", "Northwind", "Contoso",
+    "Fabrikam", "Litware", "Apex", "Vertex", "Nimbus", "Orbit", "Beacon", "Harbor", "Cedar", "Falcon"
+]
+
+COMPANY_KINDS = ["Labs", "Systems", "Sports", "Media", "Analytics", "Partners", "Health", "Capital", "Foods", ""]
+
+# Ways lead lists spell the same company
+COMPANY_SUFFIXES = ["", " Inc", ", Inc.", " LLC", " Ltd", " Corp", " Group", " Holdings"]
+
+JOB_TITLES = [
+    "CEO", "CTO", "VP of Marketing", "Director of Partnerships", "Head of Data", "Software Engineer",
+    "Account Executive", "Product Manager", "General Manager", "Chief Revenue Officer"
+]
+
+LOCATIONS = [
+    "New York, NY", "San Francisco, CA", "Chicago, IL", "Austin, TX", "London, UK", "Berlin, Germany",
+    "Toronto, Canada", "Boston, MA", "Seattle, WA", "Los Angeles, CA"
+]
+
+URL_PREFIXES = ["https://www.linkedin.com/in/", "https://linkedin.com/in/", "http://www.linkedin.com/in/"]
+
+# Parsed sizes like "10k" or "1m"
+SIZE_UNITS = {"": 1, "k": 1000, "m": 1000000}
+
+
+def parse_size(text):
+    """
+    Row count from a size like 1k, 10k or 1m
+
+    Args:
+        text (str): Number with an optional k/m suffix
+
+    Returns:
+        int: Number of rows
+    """
+    text = text.strip().lower()
+    unit = text[-1] if text[-1] in SIZE_UNITS else ""
+    return int(float(text[:len(text) - len(unit)]) * SIZE_UNITS[unit])
+
+
+def company_pool(rows, rng):
+    """Base company names, roughly one company per 20 leads"""
+    count = max(1, rows // 20)
+    words = rng.choice(COMPANY_WORDS, count)
+    kinds = rng.choice(COMPANY_KINDS, count)
+    numbers = np.arange(count)
+    # A number keeps companies distinct once the word combinations run out
+    return [
+        f"{word} {kind}".strip() + (f" {number}" if number >= len(COMPANY_WORDS) * len(COMPANY_KINDS) else "")
+        for word, kind, number in zip(words, kinds, numbers)
+    ]
+
+
+def generate_leads(rows, seed=42, email_ratio=0.5, summary_ratio=0.3):
+    """
+    Build a synthetic lead DataFrame
+
+    Args:
+        rows (int): Number of leads
+        seed (int): Random seed, the same seed gives the same leads
+        email_ratio (float): Share of rows that already have an email
+        summary_ratio (float): Share of rows that already have a summary
+
+    Returns:
+        DataFrame: Leads with the columns the tools use
+    """
+    rng = np.random.default_rng(seed)
+
+    first = rng.choice(FIRST_NAMES, rows)
+    last = rng.choice(LAST_NAMES, rows)
+
+    pool = np.array(company_pool(rows, rng), dtype=object)
+    base = pool[rng.integers(0, len(pool), rows)]
+    suffix = rng.choice(COMPANY_SUFFIXES, rows)
+    upper = rng.random(rows) < 0.1
+    companies = [
+        (name + end).upper() if shout else name + end
+        for name, end, shout in zip(base, suffix, upper)
+    ]
+
+    slugs = [f"{f}-{l}-{i:x}".lower().replace("'", "") for i, (f, l) in enumerate(zip(first, last))]
+    prefixes = rng.choice(URL_PREFIXES, rows)
+    trailing = np.where(rng.random(rows) < 0.3, "/", "")
+    urls = [f"{prefix}{slug}{end}" for prefix, slug, end in zip(prefixes, slugs, trailing)]
+
+    # A few leads without a URL, as in real exports
+    no_url = rng.random(rows) < 0.02
+    urls = [("" if missing else url) for url, missing in zip(urls, no_url)]
+
+    has_email = rng.random(rows) < email_ratio
+    domains = [name.lower().replace(" ", "") + ".com" for name in base]
+    emails = [
+        f"{f.lower()}.{l.lower()}@{domain}" if found else ""
+        for f, l, domain, found in zip(first, last, domains, has_email)
+    ]
+
+    has_summary = rng.random(rows) < summary_ratio
+    titles = rng.choice(JOB_TITLES, rows)
+    summaries = [
+        f"{f} {l} is {title} at {company}, focused on growth and partnerships." if summarized else ""
+        for f, l, title, company, summarized in zip(first, last, titles, companies, has_summary)
+    ]
+
+    return pd.DataFrame({
+        "First Name": first,
+        "Last Name": last,
+        "Full Name": [f"{f} {l}" for f, l in zip(first, last)],
+        "Company Name": companies,
+        "Job Title": titles,
+        "Location": rng.choice(LOCATIONS, rows),
+        "LinkedIn Profile": urls,
+        "Email": emails,
+        "Email Confidence": np.where(has_email, rng.integers(40, 100, rows), 0),
+        "Email Method": np.where(has_email, "pattern", ""),
+        "Company Domain": np.where(has_email, domains, ""),
+        "LinkedIn Summary": summaries
+    })
+
+
+def ensure_lead_file(rows, data_dir, seed=42):
+    """
+    Path to a synthetic lead CSV of the given size, generating it once
+
+    Args:
+        rows (int): Number of leads
+        data_dir (str): Directory the generated files are kept in
+        seed (int): Random seed
+
+    Returns:
+        str: Path to the CSV
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"leads_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        tmp_file = f"{path}.tmp"
+        generate_leads(rows, seed).to_csv(tmp_file, index=False)
+        os.replace(tmp_file, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic lead file")
+    parser.add_argument("size", help="Number of rows, e.g. 1k, 10k, 100k or 1m")
+    parser.add_argument("output", help="File to write (.csv, .parquet or .feather)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    args = parser.parse_args()
+
+    df = generate_leads(parse_size(args.size), args.seed)
+    write_table(df, args.output)
+    print(f"Wrote {len(df)} leads to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+"""Run the command line entry point: python -m email_finder"""
+
+import sys
+
+from email_finder.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""
+Command line entry point of the email finder and its file utilities
+
+    python -m email_finder find leads.csv --output leads_with_emails.csv
+    python -m email_finder convert leads.csv leads.parquet
+    python -m email_finder convert leads_with_emails.parquet leads_with_emails.csv
+    python -m email_finder info leads.parquet
+    python -m email_finder import leads.sqlite leads.csv leads_with_emails.csv
+    python -m email_finder export leads.sqlite leads_full.csv
+
+(python -m email_finder.cli works the same.) Only the modules a command
+needs are imported, and pandas, pyarrow and the network libraries only when
+they are first used, so --help and argument errors return at once.
+
+The format of every file is chosen by its extension (.csv, .parquet/.pq,
+.feather/.arrow), see email_finder.utils.table_io. import and export work on
+the pipeline store the tools share when LEAD_STORE is set, see
+email_finder.utils.lead_store.
+"""
+
+import os
+import sys
+import argparse
+
+from email_finder.utils.lead_store import LeadStore
+from email_finder.utils.table_io import (
+    convert_table,
+    count_table_rows,
+    is_columnar,
+    iter_table_chunks,
+    read_columns,
+    table_format
+)
+
+
+def find_command(arguments):
+    """
+    Discover the emails of a lead file, see email_finder.email_finder
+
+    Args:
+        arguments (list): Command line after "find", parsed by the email finder itself
+    """
+    # Imported here: the finder sets up logging and loads .env on import
+    from email_finder.email_finder import main as find_main
+
+    find_main(arguments, prog="python -m email_finder find")
+    return 0
+
+
+def convert_command(args):
+    """Convert a table file to the format of the target's extension"""
+    if not os.path.exists(args.source):
+        print(f"Error: Input file '{args.source}' not found!")
+        return 1
+
+    if os.path.abspath(args.source) == os.path.abspath(args.target):
+        print("Error: Source and target are the same file")
+        return 1
+
+    rows = convert_table(args.source, args.target, args.chunk_size)
+    print(
+        f"Converted {rows} rows from {table_format(args.source)} to {table_format(args.target)}: "
+        f"{args.target} ({os.path.getsize(args.target) / 1e6:.1f} MB, was "
+        f"{os.path.getsize(args.source) / 1e6:.1f} MB)"
+    )
+    return 0
+
+
+def info_command(args):
+    """Print the format, size, row count and columns of a table file"""
+    if not os.path.exists(args.file):
+        print(f"Error: File '{args.file}' not found!")
+        return 1
+
+    columns = read_columns(args.file)
+    print(f"File: {args.file}")
+    print(f"Format: {table_format(args.file)}")
+    print(f"Size: {os.path.getsize(args.file) / 1e6:.1f} MB")
+    if is_columnar(args.file):
+        print(f"Rows: {count_table_rows(args.file)}")
+    print(f"Columns ({len(columns)}): {', '.join(columns)}")
+    return 0
+
+
+def import_command(args):
+    """Register the rows of lead and result files with a pipeline store"""
+    missing = [path for path in args.files if not os.path.exists(path)]
+    if missing:
+        print(f"Error: File(s) not found: {', '.join(missing)}")
+        return 1
+
+    store = LeadStore(args.store, "import")
+    try:
+        for path in args.files:
+            if "LinkedIn Profile" not in read_columns(path):
+                print(f"Skipping {path}: no 'LinkedIn Profile' column")
+                continue
+
+            rows = added = 0
+            for chunk in iter_table_chunks(path, args.chunk_size):
+                added += store.add_leads(chunk)
+                rows += len(chunk)
+            print(f"Imported {path}: {rows} rows, {added} new leads")
+
+        print(f"Lead store {args.store}: {len(store)} leads")
+    finally:
+        store.close()
+    return 0
+
+
+def export_command(args):
+    """Write the joined lead list of a pipeline store"""
+    if not os.path.exists(args.store):
+        print(f"Error: Lead store '{args.store}' not found!")
+        return 1
+
+    store = LeadStore(args.store)
+    try:
+        if args.list_columns:
+            stats = store.stats()
+            print(f"Leads: {stats['leads']}")
+            for column, (filled, tool) in stats["columns"].items():
+                print(f"  {column}: {filled} filled (from {tool or 'unknown'})")
+            return 0
+
+        if not args.target:
+            print("Error: No output file given")
+            return 1
+
+        try:
+            rows = store.export(args.target, args.columns, args.chunk_size)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            return 1
+    finally:
+        store.close()
+
+    print(f"Exported {rows} leads to {args.target}")
+    return 0
+
+
+def build_parser():
+    """Create the argument parser with one subparser per command"""
+    parser = argparse.ArgumentParser(
+        prog="python -m email_finder",
+        description="Email finder and utilities for lead and result files"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Listed for --help only, main() hands find's arguments to the email finder
+    commands.add_parser(
+        "find",
+        help="Discover business emails for a lead file (see find --help)",
+        add_help=False
+    )
+
+    convert = commands.add_parser(
+        "convert",
+        help="Convert between CSV, Parquet and Feather (by file extension)"
+    )
+    convert.add_argument("source", help="File to convert")
+    convert.add_argument("target", help="File to write, its extension picks the format")
+    convert.add_argument(
+        "--chunk-size", "-c",
+        help="Rows held in memory at a time; each becomes a Parquet row group (default: 100000)",
+        type=int,
+        default=100000
+    )
+    convert.set_defaults(handler=convert_command)
+
+    info = commands.add_parser("info", help="Show the format, rows and columns of a file")
+    info.add_argument("file", help="CSV, Parquet or Feather file")
+    info.set_defaults(handler=info_command)
+
+    import_ = commands.add_parser("import", help="Add the rows of lead or result files to a pipeline store")
+    import_.add_argument("store", help="SQLite pipeline store (created if missing)")
+    import_.add_argument("files", help="Files with a LinkedIn Profile column", nargs="+", metavar="FILE")
+    import_.add_argument(
+        "--chunk-size", "-c",
+        help="Rows held in memory at a time (default: 100000)",
+        type=int,
+        default=100000
+    )
+    import_.set_defaults(handler=import_command)
+
+    export = commands.add_parser("export", help="Write the joined lead list of a pipeline store")
+    export.add_argument("store", help="SQLite pipeline store")
+    export.add_argument("target", help="File to write, its extension picks the format", nargs="?")
+    export.add_argument(
+        "--columns",
+        help="Columns to export, in this order (default: all)",
+        nargs="+",
+        metavar="COLUMN",
+        default=None
+    )
+    export.add_argument(
+        "--list-columns",
+        help="Show the stored columns and how many leads have each instead of exporting",
+        action="store_true"
+    )
+    export.add_argument(
+        "--chunk-size", "-c",
+        help="Leads held in memory at a time; each becomes a Parquet row group (default: 100000)",
+        type=int,
+        default=100000
+    )
+    export.set_defaults(handler=export_command)
+
+    return parser
+
+
+def main(argv=None):
+    """Main entry point for the command line utilities"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == "find":
+        return find_command(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1405 @@
+"""
+Email Finder - discover business emails for the leads of a CSV/Parquet file
+
+Completely independent from the LinkedIn scraper, it can run as a separate
+process after LinkedIn scraping is complete. Every lead's company domain is
+found (local index, search, or pattern), then the email through the Hunter
+and Email-Validator APIs, verified address patterns, or public sources.
+
+Usage:
+    python -m email_finder find input.csv
+    python -m email_finder find input.csv --output output.csv --batch-size 5
+    python email-finder.py input.csv
+
+requests, BeautifulSoup and dnspython are imported on first use, so --help
+and argument errors don't wait for them.
+"""
+
+import os
+import sys
+import time
+import random
+import re
+import socket
+import smtplib
+import argparse
+import threading
+from queue import Queue, Empty
+from difflib import SequenceMatcher
+from urllib.parse import urlparse
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from email_finder.services.domain_discovery import canonicalize_company_name, group_rows_by_company, pattern_domain
+from email_finder.services.domain_index import open_domain_index
+from email_finder.utils.cache import MISSING, Expiring, LRUCache, open_default_cache
+from email_finder.utils.cassette import open_cassette
+from email_finder.utils.dtypes import compact_dtypes, compact_dtypes_enabled, format_memory_report
+from email_finder.utils.lazy import lazy_attribute, lazy_import
+from email_finder.utils.lead_store import LeadStore, open_lead_store
+from email_finder.utils.logger import set_log_level, setup_logger
+from email_finder.utils.metrics import Metrics
+from email_finder.utils.profiling import add_profile_arguments, start_profiling
+from email_finder.utils.resume import ResumeState, describe_status, row_identities
+from email_finder.utils.table_io import is_columnar, read_table
+from email_finder.utils.csv_handler import (
+    CheckpointJournal,
+    ResultWriter,
+    describe_pending,
+    process_csv_in_chunks,
+    select_pending_rows
+)
+
+requests = lazy_import("requests")
+dns_resolver = lazy_import("dns.resolver")
+BeautifulSoup = lazy_attribute("bs4", "BeautifulSoup")
+
+# Load environment variables
+load_dotenv()
+
+# Create main logger (written through a background listener, see email_finder.utils.logger)
+logger = setup_logger("email_finder")
+
+
+# Rate limiter context manager
+class RateLimiter:
+    """Rate limiter to prevent API rate limiting"""
+
+    def __init__(self, max_calls_per_minute=10, metrics=None, name="default"):
+        self.min_interval = 60.0 / float(max_calls_per_minute)
+        self.last_call_time = 0.0
+        self.lock = threading.Lock()
+
+        # Time spent waiting here is recorded apart from the work it delays
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        """Context manager entry"""
+        if self.metrics is None:
+            self._wait()
+            return
+
+        with self.metrics.wait(self.name):
+            self._wait()
+
+    def _wait(self):
+        """Block until the next call is allowed"""
+        with self.lock:
+            current_time = time.time()
+            elapsed = current_time - self.last_call_time
+
+            # If not enough time has passed, sleep
+            if elapsed < self.min_interval:
+                sleep_time = self.min_interval - elapsed
+                logger.debug("Rate limit: sleeping for %.2f seconds", sleep_time)
+                time.sleep(sleep_time)
+
+            self.last_call_time = time.time()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        pass
+
+
+# Email finder functionality
+class EmailFinder:
+    """Main email finder class"""
+
+    # Seconds a verified email stays in the persistent cache
+    VERIFICATION_TTL = 7 * 24 * 3600
+
+    # Shortest time an MX answer is cached, whatever its DNS TTL
+    MIN_MX_TTL = 60
+
+    # Input columns email discovery reads (name/company and their alternative
+    # names, the profile URL and the result columns of an earlier run)
+    INPUT_COLUMNS = [
+        "First Name", "FirstName", "Given Name", "Name",
+        "Last Name", "LastName", "Surname", "Family Name",
+        "Company Name", "Company", "Organization", "Employer",
+        "LinkedIn Profile",
+        "Email", "Email Confidence", "Email Method", "Company Domain"
+    ]
+
+    # Columns the email finder writes, the only ones it stores in the lead store
+    RESULT_COLUMNS = ["Email", "Email Confidence", "Email Method", "Company Domain"]
+
+    def __init__(self, log_level="INFO"):
+        """Initialize the EmailFinder"""
+        self.logger = logger
+        set_log_level(self.logger, log_level)
+
+        # Bounded, thread-safe caches to avoid repeated lookups
+        self.domain_cache = LRUCache(maxsize=int(os.getenv("DOMAIN_CACHE_SIZE", "10000")), ttl=24 * 3600)
+        self.mx_cache = LRUCache(maxsize=int(os.getenv("MX_CACHE_SIZE", "10000")), ttl=3600)
+        self.email_verification_cache = LRUCache(
+            maxsize=int(os.getenv("VERIFICATION_CACHE_SIZE", "50000")),
+            ttl=24 * 3600
+        )
+
+        # On-disk cache shared across runs (and with test_email_finder.py)
+        self.persistent_cache = open_default_cache()
+
+        # Every company domain learned so far, so known companies skip the search
+        self.domain_index = open_domain_index(self.persistent_cache)
+
+        # Pipeline store shared with the scraper and connector (LEAD_STORE), or None
+        self.lead_store = open_lead_store("email_finder")
+
+        # Per-stage latency, outcomes and cache effectiveness of this run
+        self.metrics = Metrics()
+        self.metrics_textfile = os.getenv("METRICS_TEXTFILE")
+
+        # Configure rate limiting
+        self.rate_limiter = RateLimiter(
+            max_calls_per_minute=int(os.getenv("MAX_EMAIL_CHECKS_PER_MINUTE", "10")),
+            metrics=self.metrics,
+            name="email_checks"
+        )
+
+        # Load API keys
+        self.hunter_api_key = os.getenv("HUNTER_API_KEY", "")
+        self.email_validator_key = os.getenv("EMAIL_VALIDATOR_KEY", "")
+
+        if self.hunter_api_key:
+            self.logger.info("Hunter API key detected")
+        if self.email_validator_key:
+            self.logger.info("Email Validator API key detected")
+
+    def get_company_domain(self, company_name):
+        """
+        Get the domain for a company using search engine results
+
+        Args:
+            company_name (str): Name of the company
+
+        Returns:
+            str: Company domain or None if not found
+        """
+        if not company_name:
+            return None
+
+        # Normalize company name so "ACME, Inc." and "Acme" share one cache entry
+        company_name = canonicalize_company_name(company_name)
+        if not company_name:
+            return None
+
+        # Concurrent lookups of the same company share one search
+        try:
+            return self.domain_cache.get_or_compute(
+                company_name,
+                lambda: self._lookup_company_domain(company_name)
+            )
+        except Exception as e:
+            self.logger.error("Error discovering domain: %s", e)
+            return None
+
+    def _lookup_company_domain(self, company_name):
+        """Find a company domain in the local index, the persistent cache or via search (errors propagate)"""
+        indexed = self.domain_index.lookup(company_name)
+        if indexed:
+            self.logger.debug("Domain index hit for %s: %s", company_name, indexed)
+            return indexed
+
+        if self.persistent_cache:
+            cached = self.persistent_cache.get("domain", company_name)
+            if cached is not MISSING:
+                self.logger.debug("Persistent domain cache hit for %s", company_name)
+                return cached
+
+        self.logger.info("Discovering domain for: %s", company_name)
+
+        # Apply rate limiting
+        with self.rate_limiter:
+            # Create search query
+            query = f"{company_name} official website"
+
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            }
+
+            # Use DuckDuckGo for search (doesn't require API key)
+            response = requests.get(f"https://duckduckgo.com/html/?q={query}", headers=headers)
+            soup = BeautifulSoup(response.text, 'html.parser')
+
+            # Extract result links
+            results = soup.select('.result__url')
+            potential_domains = []
+
+            for result in results[:5]:  # Check top 5 results
+                url = result.get('href')
+                if url:
+                    parsed_url = urlparse(url)
+                    domain = parsed_url.netloc.lower()
+
+                    # Skip common non-company domains
+                    skip_domains = ['linkedin.com', 'facebook.com', 'twitter.com', 'instagram.com',
+                                    'youtube.com', 'glassdoor.com', 'wikipedia.org', 'crunchbase.com',
+                                    'bloomberg.com', 'reuters.com', 'yahoo.com', 'google.com',
+                                    'bing.com', 'amazon.com', 'indeed.com']
+                    if not any(sd in domain for sd in skip_domains):
+                        # Further verify it looks like a company site (not blog, etc.)
+                        domain = domain.replace('www.', '')
+                        if self._is_likely_company_domain(domain, company_name):
+                            potential_domains.append(domain)
+
+            if potential_domains:
+                self._persist_domain(company_name, potential_domains[0], found_via_search=True)
+                self.domain_index.add(company_name, potential_domains[0], "search")
+                self.logger.info("Found domain via search: %s", potential_domains[0])
+                return potential_domains[0]
+
+            # If no domain found via search, try pattern matching
+            potential_domain = pattern_domain(company_name)
+            self._persist_domain(company_name, potential_domain, found_via_search=False)
+            self.logger.info("Using pattern-based domain: %s", potential_domain)
+            return potential_domain
+
+    def _persist_domain(self, company_name, domain, found_via_search):
+        """Store a discovered domain in the persistent cache"""
+        if self.persistent_cache:
+            # A pattern-based guess is a negative search result, retry it sooner
+            ttl = None if found_via_search else self.persistent_cache.negative_ttl
+            self.persistent_cache.set("domain", company_name, domain, ttl)
+
+    def prefetch_company_domains(self, companies):
+        """
+        Resolve the domain of every distinct company once before per-person work
+
+        Rows are grouped by canonical company name, so each company costs one
+        lookup no matter how many people work there or how its name is spelled.
+
+        Args:
+            companies (list): (row label, company name) pairs of the rows that
+                still need an email
+
+        Returns:
+            dict: Dedup statistics (rows, distinct names, companies, lookups saved)
+        """
+        names = dict(companies)
+        groups, stats = group_rows_by_company(companies)
+
+        self.logger.info(
+            "Company dedup: %s rows, %s distinct names, %s companies after canonicalization",
+            stats['rows'], stats['distinct_names'], stats['companies']
+        )
+
+        for canonical, group_rows in groups.items():
+            # Any spelling from the group resolves to the same cache entry
+            self.get_company_domain(names[group_rows[0]])
+
+        self.logger.info(
+            "Company dedup saved %s domain lookups (%s by merging name variants)",
+            stats['lookups_saved'], stats['saved_by_canonicalization']
+        )
+        return stats
+
+    def seed_domain_index(self, files):
+        """
+        Add the company domains of earlier output files to the domain index
+
+        Args:
+            files (list): Output CSVs of earlier runs (missing files are skipped)
+
+        Returns:
+            int: Number of companies added or updated
+        """
+        added = 0
+        for path in files:
+            if not os.path.exists(path):
+                continue
+
+            try:
+                count = self.domain_index.seed_from_csv(path)
+            except Exception as e:
+                self.logger.warning("Could not seed domain index from %s: %s", path, e)
+                continue
+
+            if count:
+                self.logger.info("Added %s companies to the domain index from %s", count, path)
+            added += count
+
+        return added
+
+    def _is_likely_company_domain(self, domain, company_name):
+        """Check if a domain is likely to be a company's official website"""
+        # Extract domain name without TLD
+        domain_parts = domain.split('.')
+        if len(domain_parts) >= 2:
+            domain_name = domain_parts[0]
+
+            # Clean company name for comparison
+            clean_company = re.sub(r'[^a-z0-9]', '', company_name.lower())
+
+            # Check for similarity
+            return (domain_name in clean_company or
+                    clean_company in domain_name or
+                    self._similarity_score(domain_name, clean_company) > 0.6)
+        return False
+
+    def _similarity_score(self, str1, str2):
+        """Calculate similarity between two strings"""
+        # Simple implementation - using Python's built-in SequenceMatcher
+        return SequenceMatcher(None, str1, str2).ratio()
+
+    def generate_email_patterns(self, first_name, last_name, domain):
+        """
+        Generate likely email patterns based on naming conventions
+
+        Args:
+            first_name (str): Person's first name
+            last_name (str): Person's last name
+            domain (str): Company domain
+
+        Returns:
+            list: List of likely email patterns
+        """
+        if not domain or not first_name or not last_name:
+            return []
+
+        # Normalize inputs
+        first = first_name.lower().strip()
+        last = last_name.lower().strip()
+        f_initial = first[0] if first else ''
+        l_initial = last[0] if last else ''
+
+        # Remove special characters from names
+        first = re.sub(r'[^a-z0-9]', '', first)
+        last = re.sub(r'[^a-z0-9]', '', last)
+
+        # Common email patterns in order of likelihood
+        patterns = [
+            f"{first}.{last}@{domain}",  # john.doe@company.com
+            f"{first}{last}@{domain}",  # johndoe@company.com
+            f"{f_initial}{last}@{domain}",  # jdoe@company.com
+            f"{first}@{domain}",  # john@company.com
+            f"{first}{l_initial}@{domain}",  # johnd@company.com
+            f"{first}-{last}@{domain}",  # john-doe@company.com
+            f"{f_initial}.{last}@{domain}",  # j.doe@company.com
+            f"{last}.{first}@{domain}",  # doe.john@company.com
+            f"{first}_{last}@{domain}",  # john_doe@company.com
+            f"{last}{first}@{domain}",  # doejohn@company.com
+            f"{last}@{domain}",  # doe@company.com
+        ]
+
+        return patterns
+
+    def verify_email(self, email):
+        """
+        Verify if an email address exists using DNS MX lookup and SMTP verification
+
+        Args:
+            email (str): Email address to verify
+
+        Returns:
+            bool: True if the email is valid, False otherwise
+        """
+        if not email or '@' not in email:
+            return False
+
+        # Check cache, concurrent checks of the same address share one SMTP session
+        return self.email_verification_cache.get_or_compute(email, lambda: self._verify_email_uncached(email))
+
+    def _verify_email_uncached(self, email):
+        """Verify an email via the persistent cache, DNS and SMTP"""
+        if self.persistent_cache:
+            cached = self.persistent_cache.get("verification", email)
+            if cached is not MISSING:
+                return cached
+
+        self.logger.debug("Verifying email: %s", email)
+
+        # Basic syntax check
+        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+        if not re.match(email_pattern, email):
+            self.logger.debug("Invalid email syntax: %s", email)
+            return False
+
+        domain = email.split('@')[1]
+
+        # Step 1: Check if MX record exists
+        mx_record = self._get_mx_record(domain)
+        if not mx_record:
+            self.logger.debug("No MX record for domain: %s", domain)
+            self._persist_verification(email, False, negative=True)
+            return False
+
+        # Step 2: SMTP verification
+        try:
+            # Connect to SMTP server
+            smtp = smtplib.SMTP(timeout=10)
+            smtp.set_debuglevel(0)
+
+            # Try connecting to MX record
+            try:
+                smtp.connect(mx_record)
+            except:
+                # Fall back to domain
+                smtp.connect(domain)
+
+            smtp.helo(socket.getfqdn())
+
+            # Start TLS if supported
+            if smtp.has_extn('STARTTLS'):
+                smtp.starttls()
+                smtp.ehlo()
+
+            # Use a real-looking email as the sender
+            sender = f"verify@{socket.getfqdn()}"
+
+            # Some servers won't let you check without login
+            # Just try RCPT command and see what happens
+            smtp.mail(sender)
+            code, message = smtp.rcpt(email)
+            smtp.quit()
+
+            # Return True if successful (code 250 or 251)
+            is_valid = code in [250, 251]
+            self._persist_verification(email, is_valid, negative=not is_valid)
+            return is_valid
+
+        except Exception as e:
+            self.logger.debug("SMTP verification error: %s", e)
+            # Many servers block verification attempts, so assume the email might be valid
+            # (only a guess, so it is kept as briefly as a negative result)
+            self._persist_verification(email, True, negative=True)
+            return True
+
+    def _persist_verification(self, email, is_valid, negative):
+        """Store a verification result in the persistent cache"""
+        if self.persistent_cache:
+            ttl = self.persistent_cache.negative_ttl if negative else self.VERIFICATION_TTL
+            self.persistent_cache.set("verification", email, is_valid, ttl)
+
+    def _get_mx_record(self, domain):
+        """Get MX record for a domain"""
+        return self.mx_cache.get_or_compute(domain, lambda: self._lookup_mx_record(domain))
+
+    def _lookup_mx_record(self, domain):
+        """
+        Look up an MX record in the persistent cache or via DNS
+
+        Returns:
+            The MX host or None, as an Expiring when mx_cache should keep it
+            for the answer's TTL (or not at all, after a transient error)
+        """
+        if self.persistent_cache:
+            cached = self.persistent_cache.get("mx", domain)
+            if cached is not MISSING:
+                return cached
+
+        try:
+            mx_records = dns_resolver.resolve(domain, 'MX')
+            if not mx_records:
+                self._persist_mx(domain, None)
+                return None
+
+            # Get the MX record with the lowest preference value
+            mx_record = sorted(mx_records, key=lambda x: x.preference)[0].exchange
+            mx_record = str(mx_record)
+
+            # Honour the DNS TTL of the answer, in memory too
+            ttl = max(mx_records.rrset.ttl, self.MIN_MX_TTL)
+            self._persist_mx(domain, mx_record, ttl=ttl)
+            return Expiring(mx_record, ttl)
+
+        except (dns_resolver.NXDOMAIN, dns_resolver.NoAnswer) as e:
+            # The domain definitely has no MX record, cache it as a negative result
+            self.logger.debug("No MX record for %s: %s", domain, e)
+            self._persist_mx(domain, None)
+            return None
+
+        except Exception as e:
+            # Timeouts and server failures may be transient, the next address at
+            # the domain asks again instead of finding a cached None
+            self.logger.debug("Error getting MX record for %s: %s", domain, e)
+            return Expiring(None, 0)
+
+    def _persist_mx(self, domain, mx_record, ttl=None):
+        """Store an MX lookup result in the persistent cache"""
+        if self.persistent_cache:
+            self.persistent_cache.set("mx", domain, mx_record, ttl)
+
+    def find_email_via_api(self, first_name, last_name, domain):
+        """
+        Try to find email using free API services
+
+        Args:
+            first_name (str): Person's first name
+            last_name (str): Person's last name
+            domain (str): Company domain
+
+        Returns:
+            dict: Email discovery result with email and confidence
+        """
+        result = {"email": None, "confidence": 0}
+
+        # Try Hunter.io if API key provided
+        if self.hunter_api_key:
+            self.logger.info("Trying Hunter.io for %s %s at %s", first_name, last_name, domain)
+
+            try:
+                # Apply rate limiting
+                with self.rate_limiter:
+                    response = requests.get(
+                        f"https://api.hunter.io/v2/email-finder?domain={domain}&first_name={first_name}&last_name={last_name}&api_key={self.hunter_api_key}"
+                    )
+                    data = response.json()
+
+                    if data.get("data", {}).get("email"):
+                        email = data["data"]["email"]
+                        confidence = data["data"].get("score", 0) * 100  # Convert to 0-100 scale
+
+                        self.logger.info("Found email via Hunter.io: %s (confidence: %.0f%%)", email, confidence)
+
+                        result["email"] = email
+                        result["confidence"] = confidence
+                        return result
+
+                self.logger.info("No email found via Hunter.io")
+
+            except Exception as e:
+                self.logger.error("Hunter.io API error: %s", e)
+
+        # Try Email-Validator.net if API key provided
+        if self.email_validator_key:
+            self.logger.info("Trying Email-Validator.net for %s %s at %s", first_name, last_name, domain)
+
+            try:
+                # Generate a likely email pattern to check
+                email = f"{first_name.lower()}.{last_name.lower()}@{domain}"
+
+                # Apply rate limiting
+                with self.rate_limiter:
+                    response = requests.get(
+                        f"https://api.email-validator.net/api/verify?EmailAddress={email}&APIKey={self.email_validator_key}"
+                    )
+                    data = response.json()
+
+                    if data.get("status") == 1:
+                        confidence = 85  # High confidence if validated
+
+                        self.logger.info("Validated email via Email-Validator.net: %s", email)
+
+                        result["email"] = email
+                        result["confidence"] = confidence
+                        return result
+
+                self.logger.info("Email validation failed via Email-Validator.net")
+
+            except Exception as e:
+                self.logger.error("Email-Validator.net API error: %s", e)
+
+        return result
+
+    def search_public_sources(self, first_name, last_name, company_name, domain=None):
+        """
+        Search public sources for email addresses
+
+        Args:
+            first_name (str): Person's first name
+            last_name (str): Person's last name
+            company_name (str): Company name
+            domain (str, optional): Company domain
+
+        Returns:
+            dict: Email discovery result with email and confidence
+        """
+        result = {"email": None, "confidence": 0}
+
+        self.logger.info("Searching public sources for %s %s at %s", first_name, last_name, company_name)
+
+        try:
+            # Create search queries
+            queries = [
+                f'"{first_name} {last_name}" email {company_name}',
+                f'"{first_name} {last_name}" contact {company_name}'
+            ]
+
+            if domain:
+                queries.append(f'"{first_name} {last_name}" @{domain}')
+
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            }
+
+            for query in queries:
+                self.logger.debug("Trying search query: %s", query)
+
+                # Apply rate limiting
+                with self.rate_limiter:
+                    response = requests.get(f"https://duckduckgo.com/html/?q={query}", headers=headers)
+                    soup = BeautifulSoup(response.text, 'html.parser')
+
+                    # Extract search results
+                    search_results = soup.select('.result__body')
+
+                    # Process each search result
+                    for result_item in search_results:
+                        result_text = result_item.get_text()
+
+                        # Look for email pattern in result
+                        email_pattern = r'[\w\.-]+@[\w\.-]+'
+                        emails = re.findall(email_pattern, result_text)
+
+                        for email in emails:
+                            # Check if email might belong to the person
+                            if self._is_likely_persons_email(email, first_name, last_name, domain):
+                                self.logger.info("Found potential email in public sources: %s", email)
+
+                                # Set result
+                                result["email"] = email
+                                result["confidence"] = 60  # Medium confidence for public sources
+
+                                return result
+
+            self.logger.info("No email found in public sources")
+            return result
+
+        except Exception as e:
+            self.logger.error("Error searching public sources: %s", e)
+            return result
+
+    def _is_likely_persons_email(self, email, first_name, last_name, domain=None):
+        """Check if an email is likely to belong to the person"""
+        if not email or '@' not in email:
+            return False
+
+        email_lower = email.lower()
+        first_lower = first_name.lower()
+        last_lower = last_name.lower()
+
+        # If domain is specified, check if email matches
+        if domain and not email_lower.endswith(f"@{domain}"):
+            return False
+
+        # Check if email contains parts of the person's name
+        username = email_lower.split('@')[0]
+
+        name_indicators = [
+            first_lower,
+            last_lower,
+            first_lower[0] + last_lower,
+            first_lower + last_lower[0],
+            first_lower[0] + "." + last_lower,
+            first_lower + "." + last_lower,
+            first_lower + "_" + last_lower,
+            last_lower + "." + first_lower,
+            last_lower + first_lower[0]
+        ]
+
+        for indicator in name_indicators:
+            if indicator in username:
+                return True
+
+        return False
+
+    def discover_email(self, first_name, last_name, company_name, linkedin_url=None):
+        """
+        Main method to discover business email through multiple methods
+
+        Args:
+            first_name (str): Person's first name
+            last_name (str): Person's last name
+            company_name (str): Company name
+            linkedin_url (str, optional): LinkedIn profile URL
+
+        Returns:
+            dict: Email discovery result
+        """
+        # Initialize result tracking
+        result = {
+            "email": None,
+            "confidence": 0,  # 0-100 confidence score
+            "method": None,  # Which method found the email
+            "domain": None  # Company domain
+        }
+
+        # Input validation
+        if not first_name or not last_name or not company_name:
+            self.logger.warning("Missing required input data")
+            return result
+
+        self.logger.info("Finding email for %s %s at %s", first_name, last_name, company_name)
+
+        # Step 1: Find the company domain
+        with self.metrics.stage("domain"):
+            domain = self.get_company_domain(company_name)
+
+        if not domain:
+            self.metrics.outcome("domain", "miss")
+            self.logger.warning("Could not find domain for %s", company_name)
+            return result
+
+        self.metrics.outcome("domain", "success")
+
+        result["domain"] = domain
+        self.logger.info("Found domain: %s", domain)
+
+        # Step 2: Try API-based discovery first (higher success rate)
+        self.logger.info("Trying API-based discovery...")
+
+        with self.metrics.stage("api"):
+            api_result = self.find_email_via_api(first_name, last_name, domain)
+
+        if api_result and api_result.get("email"):
+            self.metrics.outcome("api", "success")
+            result["email"] = api_result["email"]
+            result["confidence"] = api_result["confidence"]
+            result["method"] = "api"
+            self.logger.info("Found email via API: %s", result['email'])
+            return result
+
+        self.metrics.outcome("api", "miss")
+
+        # Step 3: Try pattern-based discovery
+        self.logger.info("Generating email patterns...")
+        email_patterns = self.generate_email_patterns(first_name, last_name, domain)
+
+        # Track failed patterns to potentially use later
+        attempted_patterns = []
+
+        for pattern in email_patterns:
+            self.logger.debug("Testing pattern: %s", pattern)
+
+            # Apply rate limiting (the wait is timed apart from the verification)
+            with self.metrics.stage("verify"):
+                with self.rate_limiter:
+                    is_valid = self.verify_email(pattern)
+
+            attempted_patterns.append(pattern)
+
+            if is_valid:
+                self.metrics.outcome("verify", "success")
+                result["email"] = pattern
+                result["confidence"] = 75  # Base confidence for pattern matching
+                result["method"] = "pattern"
+                self.logger.info("Found valid email pattern: %s", pattern)
+                return result
+
+        if email_patterns:
+            self.metrics.outcome("verify", "miss")
+
+        # Step 4: Try public data sources as a last resort
+        self.logger.info("Searching public sources...")
+        with self.metrics.stage("public"):
+            public_result = self.search_public_sources(first_name, last_name, company_name, domain)
+
+            if public_result and public_result.get("email"):
+                # Verify the email found in public sources
+                with self.rate_limiter:
+                    is_valid = self.verify_email(public_result["email"])
+            else:
+                is_valid = False
+
+        if is_valid:
+            self.metrics.outcome("public", "success")
+            result["email"] = public_result["email"]
+            result["confidence"] = public_result["confidence"]
+            result["method"] = "public"
+            self.logger.info("Found email via public sources: %s", result['email'])
+            return result
+
+        self.metrics.outcome("public", "miss")
+
+        # Step 5: Last resort - use most common pattern without verification
+        if attempted_patterns:
+            result["email"] = attempted_patterns[0]  # Use most likely pattern
+            result["confidence"] = 30  # Low confidence since not verified
+            result["method"] = "unverified_pattern"
+            self.logger.info("Using most likely unverified pattern: %s", result['email'])
+
+        return result
+
+    def _prepare_columns(self, df):
+        """
+        Map alternative column names and add the email result columns
+
+        Args:
+            df (DataFrame): Profile data, updated in place
+
+        Returns:
+            bool: True if all required columns are available
+        """
+        # Check for required columns
+        required_cols = ["First Name", "Last Name", "Company Name"]
+        missing_cols = [col for col in required_cols if col not in df.columns]
+
+        if missing_cols:
+            # Try alternative column names
+            alt_cols = {
+                "First Name": ["FirstName", "Given Name", "Name"],
+                "Last Name": ["LastName", "Surname", "Family Name"],
+                "Company Name": ["Company", "Organization", "Employer"]
+            }
+
+            for missing in missing_cols[:]:  # Use copy to modify during iteration
+                for alt in alt_cols[missing]:
+                    if alt in df.columns:
+                        self.logger.info("Using '%s' for '%s'", alt, missing)
+                        df[missing] = df[alt]
+                        missing_cols.remove(missing)
+                        break
+
+        if missing_cols:
+            self.logger.error("Missing required columns: %s", ', '.join(missing_cols))
+            self.logger.error("Available columns: %s", ', '.join(df.columns))
+            return False
+
+        # Create email columns if they don't exist
+        if "Email" not in df.columns:
+            df["Email"] = ""
+        if "Email Confidence" not in df.columns:
+            df["Email Confidence"] = 0
+        if "Email Method" not in df.columns:
+            df["Email Method"] = ""
+        if "Company Domain" not in df.columns:
+            df["Company Domain"] = ""
+
+        return True
+
+    def use_lead_store(self, path):
+        """
+        Read and write results through a pipeline store
+
+        Args:
+            path (str): SQLite file of the store (see email_finder.utils.lead_store)
+        """
+        self.close_lead_store()
+        self.lead_store = LeadStore(path, "email_finder")
+
+    def close_lead_store(self):
+        """Commit the last updates to the pipeline store and close it"""
+        if self.lead_store is not None:
+            self.lead_store.close()
+            self.lead_store = None
+
+    @staticmethod
+    def result_status(values):
+        """Resume state status of a row from the result journaled for it"""
+        return "found" if values.get("Email") else "not_found"
+
+    def _merge_lead_store(self, df):
+        """Register the rows with the lead store and take the emails it already has"""
+        if self.lead_store is None:
+            return
+
+        added, filled = self.lead_store.merge(df, self.RESULT_COLUMNS, ["Email"])
+        self.logger.info("Lead store %s: %s new leads, %s emails already stored", self.lead_store.path, added, filled)
+
+    def _process_rows(self, df, journal, batch_size=10, num_threads=3, start_row=0, done_rows=None):
+        """
+        Discover emails for the rows of a DataFrame in threaded batches
+
+        Args:
+            df (DataFrame): Profile data with email columns prepared
+            journal (CheckpointJournal): Journal that records each result
+            batch_size (int): Number of profiles to process in each batch
+            num_threads (int): Number of worker threads
+            start_row (int): Row label to start processing from
+            done_rows (array, optional): Boolean mask of rows finished by earlier runs
+        """
+        # Work out once which rows still need an email
+        positions, counts = select_pending_rows(df, None, ["Email"], start_row, done_rows)
+        self.logger.info(describe_pending(counts, "without profile data", "with an email already"))
+        if not len(positions):
+            return
+
+        # Plain per-row tuples, workers never index into the DataFrame
+        if "LinkedIn Profile" in df.columns:
+            urls = df["LinkedIn Profile"].to_numpy()[positions]
+        else:
+            urls = [None] * len(positions)
+
+        profiles = list(zip(
+            df.index.to_numpy()[positions],
+            df["First Name"].to_numpy()[positions],
+            df["Last Name"].to_numpy()[positions],
+            df["Company Name"].to_numpy()[positions],
+            urls
+        ))
+
+        # Resolve each company's domain once before any per-person lookups
+        self.prefetch_company_domains([(profile[0], profile[3]) for profile in profiles])
+
+        # One writer thread owns the DataFrame and the journal, workers only queue results
+        writer = ResultWriter(
+            journal,
+            flush_rows=int(os.getenv("RESULT_FLUSH_ROWS", "50")),
+            flush_interval=float(os.getenv("RESULT_FLUSH_SECONDS", "30"))
+        ).start()
+
+        try:
+            # Process the pending rows in batches
+            for batch_start in range(0, len(profiles), batch_size):
+                batch = profiles[batch_start:batch_start + batch_size]
+                self.logger.info("Processing batch: rows %s to %s", batch[0][0], batch[-1][0])
+
+                # Create queue of profiles to process
+                queue = Queue()
+                for profile in batch:
+                    queue.put(profile)
+
+                # Start worker threads
+                threads = []
+                for _ in range(min(num_threads, len(batch))):
+                    t = threading.Thread(target=self._email_worker, args=(queue, writer))
+                    t.daemon = True
+                    t.start()
+                    threads.append(t)
+
+                # Wait for all threads to complete
+                for t in threads:
+                    t.join()
+
+                self.logger.info("Batch completed, %s results written so far", writer.applied)
+
+                # Take a break between batches
+                if batch_start + batch_size < len(profiles):
+                    delay = random.uniform(10, 20)
+                    self.logger.info("Taking a break for %.2f seconds between batches...", delay)
+                    time.sleep(delay)
+        finally:
+            # Apply whatever is still queued, closing the journal writes the output
+            writer.close()
+            self.logger.info(
+                "Results journaled for %s (%s rows in %s fsyncs)",
+                journal.output_file or 'chunk journal', writer.applied, writer.flushes
+            )
+
+    def _email_worker(self, queue, writer):
+        """
+        Discover emails for queued profiles and hand the results to the writer
+
+        Args:
+            queue (Queue): (row, first name, last name, company, LinkedIn URL) tuples
+            writer (ResultWriter): Applies and persists the results
+        """
+        while True:
+            try:
+                i, first_name, last_name, company, linkedin_url = queue.get_nowait()
+            except Empty:
+                return
+
+            try:
+                # Add random delay to avoid synchronized requests
+                time.sleep(random.uniform(1.0, 3.0))
+
+                # Discover email
+                email_result = self.discover_email(first_name, last_name, company, linkedin_url)
+
+                writer.submit(i, {
+                    "Email": email_result.get("email", ""),
+                    "Email Confidence": email_result.get("confidence", 0),
+                    "Email Method": email_result.get("method", ""),
+                    "Company Domain": email_result.get("domain", "")
+                })
+
+                email_status = "✅ Found" if email_result.get("email") else "❌ Not found"
+                self.logger.info("Row %s: %s - %s", i + 1, email_status, email_result.get('email', ''))
+
+                # Add random delay between profiles
+                time.sleep(random.uniform(3.0, 8.0))
+
+            except Exception as e:
+                self.logger.error("Error processing row %s: %s", i + 1, e)
+
+    def cache_stats(self):
+        """
+        Return hit/miss/eviction counters for the lookup caches
+
+        Returns:
+            dict: Counters per cache name
+        """
+        stats = {
+            "domain": self.domain_cache.stats(),
+            "mx": self.mx_cache.stats(),
+            "verification": self.email_verification_cache.stats()
+        }
+        if self.persistent_cache:
+            stats["persistent"] = self.persistent_cache.stats()
+        return stats
+
+    def write_metrics(self, output_file, stats):
+        """
+        Write the run's stage and cache metrics next to the output file
+
+        The JSON summary goes to <output>.metrics.json. When metrics_textfile
+        is set (METRICS_TEXTFILE or --metrics-textfile) the metrics are also
+        written there in the Prometheus text format.
+
+        Args:
+            output_file (str): Path to the output CSV file
+            stats (dict): Email statistics from _email_statistics()
+        """
+        for name, counters in self.cache_stats().items():
+            self.metrics.set_cache(name, counters["hits"], counters["misses"])
+
+        index = self.domain_index.stats()
+        self.metrics.set_cache("domain_index", index["exact_hits"] + index["fuzzy_hits"], index["misses"])
+
+        metrics_file = f"{output_file}.metrics.json"
+        try:
+            self.metrics.write_json(metrics_file, {
+                "output_file": output_file,
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "emails": stats
+            })
+            self.logger.info("Metrics written to %s", metrics_file)
+
+            if self.metrics_textfile:
+                self.metrics.write_prometheus(self.metrics_textfile)
+                self.logger.info("Prometheus metrics written to %s", self.metrics_textfile)
+        except OSError as e:
+            self.logger.warning("Could not write metrics: %s", e)
+
+    def _email_statistics(self, df):
+        """Count found emails by confidence level"""
+        emails_found = df["Email"].notna() & (df["Email"] != "")
+
+        return {
+            "total": len(df),
+            "found": int(emails_found.sum()),
+            "high": int(((df["Email Confidence"] >= 75) & emails_found).sum()),
+            "medium": int(((df["Email Confidence"] >= 50) & (df["Email Confidence"] < 75) & emails_found).sum()),
+            "low": int(((df["Email Confidence"] < 50) & emails_found).sum())
+        }
+
+    def _log_statistics(self, stats, output_file):
+        """Log the email discovery statistics for a run"""
+        total_rows = stats["total"]
+        percentage = stats["found"] / total_rows * 100 if total_rows > 0 else 0
+
+        self.logger.info("Email discovery complete. Results saved to %s", output_file)
+        self.logger.info("Total profiles: %s", total_rows)
+        self.logger.info("Emails found: %s (%.2f%%)", stats['found'], percentage)
+
+        # Breakdown by confidence level
+        if total_rows > 0:
+            self.logger.info("High confidence emails: %s (%.2f%%)", stats['high'], stats['high'] / total_rows * 100)
+            self.logger.info(
+                "Medium confidence emails: %s (%.2f%%)", stats['medium'], stats['medium'] / total_rows * 100
+            )
+            self.logger.info("Low confidence emails: %s (%.2f%%)", stats['low'], stats['low'] / total_rows * 100)
+
+        # Cache effectiveness
+        for name, counters in self.cache_stats().items():
+            self.logger.info(
+                "%s cache: %s hits, %s misses, %s evictions",
+                name.capitalize(), counters['hits'], counters['misses'], counters['evictions']
+            )
+
+        index = self.domain_index.stats()
+        self.logger.info(
+            "Domain index: %s companies, %s exact hits, %s fuzzy hits, %s misses",
+            index['size'], index['exact_hits'], index['fuzzy_hits'], index['misses']
+        )
+
+    def process_csv(self, input_file, output_file=None, batch_size=10, num_threads=3, start_row=0,
+                    chunk_size=None):
+        """
+        Process a CSV file to find emails for each person
+
+        The pipeline store is committed and closed when the run ends.
+
+        Args:
+            input_file (str): Path to input CSV file
+            output_file (str, optional): Path to output CSV file
+            batch_size (int, optional): Number of profiles to process in each batch
+            num_threads (int, optional): Number of worker threads
+            start_row (int, optional): Row to start processing from
+            chunk_size (int, optional): Stream the input in chunks of this many
+                rows instead of loading it whole
+
+        Returns:
+            str: Path to the output CSV file
+        """
+        try:
+            return self._process_csv(input_file, output_file, batch_size, num_threads, start_row, chunk_size)
+        finally:
+            self.close_lead_store()
+
+    def _process_csv(self, input_file, output_file, batch_size, num_threads, start_row, chunk_size):
+        """process_csv() without closing the pipeline store"""
+        # Set default output file if not provided
+        if not output_file:
+            base, ext = os.path.splitext(input_file)
+            output_file = f"{base}_with_emails{ext}"
+
+        self.logger.info("Reading input CSV: %s", input_file)
+
+        # Check if file exists
+        if not os.path.exists(input_file):
+            self.logger.error("Input file not found: %s", input_file)
+            return None
+
+        # Domains confirmed by an earlier run over this file don't need another search
+        self.seed_domain_index([output_file])
+
+        if chunk_size:
+            return self._process_csv_chunked(input_file, output_file, batch_size, num_threads, start_row,
+                                             chunk_size)
+
+        try:
+            # Read the input; a columnar file is read with only the columns used
+            # here, the others are copied over from it whenever the output is written
+            base_file = input_file if is_columnar(input_file) else None
+            df = read_table(input_file, columns=self.INPUT_COLUMNS if base_file else None)
+            total_rows = len(df)
+            self.logger.info("Found %s rows to process", total_rows)
+
+            if not self._prepare_columns(df):
+                return None
+
+            self._merge_lead_store(df)
+
+            # Rows finished by an earlier run get their results back from the output
+            state = ResumeState(output_file, self.result_status)
+            identities = row_identities(df)
+            restored = state.restore(df, identities, self.RESULT_COLUMNS, ["Email"])
+            if len(state):
+                self.logger.info(
+                    "Resuming: %s rows finished by earlier runs, %s restored from %s", len(state), restored, output_file
+                )
+
+            # Categoricals and Arrow strings instead of one Python object per cell
+            if compact_dtypes_enabled():
+                for line in format_memory_report(compact_dtypes(df)):
+                    self.logger.info(line)
+
+            # Recover rows journaled by an interrupted earlier run
+            journal = CheckpointJournal(output_file, df, base_file=base_file, store=self.lead_store, state=state)
+            recovered = journal.replay()
+            if recovered:
+                self.logger.info("Recovered %s rows from checkpoint journal %s", recovered, journal.journal_file)
+
+            self._process_rows(df, journal, batch_size, num_threads, start_row, state.done_mask(identities))
+
+            # Final save
+            journal.close()
+
+            # Print statistics
+            stats = self._email_statistics(df)
+            self._log_statistics(stats, output_file)
+            self.write_metrics(output_file, stats)
+
+            return output_file
+
+        except Exception as e:
+            self.logger.error("Error processing CSV: %s", e)
+            return None
+
+        finally:
+            # Compact on the way out so no journaled row is lost
+            if 'journal' in locals():
+                journal.close()
+            if 'state' in locals():
+                state.close()
+
+    def _process_csv_chunked(self, input_file, output_file, batch_size, num_threads, start_row, chunk_size):
+        """
+        Process a CSV file chunk by chunk so memory stays bounded
+
+        Args:
+            input_file (str): Path to input CSV file
+            output_file (str): Path to output CSV file
+            batch_size (int): Number of profiles to process in each batch
+            num_threads (int): Number of worker threads
+            start_row (int): Row to start processing from
+            chunk_size (int): Number of rows to hold in memory at a time
+
+        Returns:
+            str: Path to the output CSV file
+        """
+        self.logger.info("Streaming input in chunks of %s rows", chunk_size)
+        stats = {"total": 0, "found": 0, "high": 0, "medium": 0, "low": 0}
+
+        def process_chunk(chunk, journal):
+            if not self._prepare_columns(chunk):
+                raise ValueError("Input CSV is missing required columns")
+
+            self._merge_lead_store(chunk)
+
+            recovered = journal.replay()
+            if recovered:
+                self.logger.info("Recovered %s rows from checkpoint journal %s", recovered, journal.journal_file)
+
+            if chunk.index[-1] >= start_row:
+                self.logger.info("Processing chunk: rows %s to %s", chunk.index[0], chunk.index[-1])
+                self._process_rows(chunk, journal, batch_size, num_threads, start_row)
+
+            for key, value in self._email_statistics(chunk).items():
+                stats[key] += value
+
+        try:
+            process_csv_in_chunks(input_file, output_file, chunk_size, process_chunk, store=self.lead_store)
+            self._log_statistics(stats, output_file)
+            self.write_metrics(output_file, stats)
+            return output_file
+
+        except Exception as e:
+            self.logger.error("Error processing CSV: %s", e)
+            return None
+
+
+def main(argv=None, prog=None):
+    """
+    Main entry point for the email finder
+
+    Args:
+        argv (list, optional): Arguments (default: sys.argv[1:])
+        prog (str, optional): Program name shown in --help
+    """
+    # Create argument parser
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Email Finder - Discover business emails for LinkedIn profiles"
+    )
+
+    # Add arguments
+    parser.add_argument(
+        "input_file",
+        help="Path to CSV file containing profile data"
+    )
+    parser.add_argument(
+        "--output", "-o",
+        help="Path to output CSV file (default: input_with_emails.csv)",
+        default=None
+    )
+    parser.add_argument(
+        "--batch-size", "-b",
+        help="Number of profiles to process in each batch (default: 10)",
+        type=int,
+        default=10
+    )
+    parser.add_argument(
+        "--threads", "-t",
+        help="Number of worker threads to use (default: 3)",
+        type=int,
+        default=3
+    )
+    parser.add_argument(
+        "--start-row", "-s",
+        help="Row to start processing from (default: 0)",
+        type=int,
+        default=0
+    )
+    parser.add_argument(
+        "--chunk-size", "-c",
+        help="Stream the input in chunks of this many rows to bound memory (default: load whole file)",
+        type=int,
+        default=None
+    )
+    parser.add_argument(
+        "--seed-domains",
+        help="Earlier output CSVs whose Company Domain column seeds the local domain index",
+        nargs="+",
+        metavar="FILE",
+        default=[]
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        help="Also write run metrics to this file in the Prometheus text format (default: METRICS_TEXTFILE)",
+        default=os.getenv("METRICS_TEXTFILE")
+    )
+    parser.add_argument(
+        "--lead-store",
+        help="SQLite pipeline store to read earlier results from and write emails to (default: LEAD_STORE)",
+        default=None
+    )
+    parser.add_argument(
+        "--status",
+        help="Show the progress of the output file and exit",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--log-level", "-l",
+        help="Logging level (default: INFO)",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO"
+    )
+
+    # Parse arguments
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # Validate input file
+    if not os.path.exists(args.input_file):
+        print(f"Error: Input file '{args.input_file}' not found!")
+        sys.exit(1)
+
+    # Set default output file
+    if not args.output:
+        base, ext = os.path.splitext(args.input_file)
+        args.output = f"{base}_with_emails{ext}"
+
+    if args.status:
+        print("\n".join(describe_status(args.input_file, args.output)))
+        return
+
+    # Record or replay network calls when CASSETTE is set
+    open_cassette()
+    if args.profile:
+        start_profiling(args.output, args.profile_top)
+
+    # Print configuration
+    print("\n" + "=" * 70)
+    print("Email Finder - Discover business emails for LinkedIn profiles")
+    print("=" * 70)
+    print(f"Input file: {args.input_file}")
+    print(f"Output file: {args.output}")
+    print(f"Batch size: {args.batch_size}")
+    print(f"Worker threads: {args.threads}")
+    print(f"Starting row: {args.start_row}")
+    print(f"Chunk size: {args.chunk_size or 'whole file'}")
+    print(f"Lead store: {args.lead_store or os.getenv('LEAD_STORE') or 'off'}")
+    print(f"Log level: {args.log_level}")
+
+    # Check for API keys
+    hunter_key = os.getenv("HUNTER_API_KEY", "")
+    emailvalidator_key = os.getenv("EMAIL_VALIDATOR_KEY", "")
+
+    if hunter_key:
+        print("Hunter.io API key: Found")
+    else:
+        print("Hunter.io API key: Not found (optional)")
+
+    if emailvalidator_key:
+        print("Email-Validator.net API key: Found")
+    else:
+        print("Email-Validator.net API key: Not found (optional)")
+
+    print("-" * 70)
+
+    # Create email finder instance
+    finder = EmailFinder(log_level=args.log_level)
+    finder.seed_domain_index(args.seed_domains)
+    finder.metrics_textfile = args.metrics_textfile
+    if args.lead_store:
+        finder.use_lead_store(args.lead_store)
+
+    # Process CSV file
+    result = finder.process_csv(
+        args.input_file,
+        args.output,
+        args.batch_size,
+        args.threads,
+        args.start_row,
+        args.chunk_size
+    )
+
+    if result:
+        print("\n" + "=" * 70)
+        print(f"Email discovery complete! Results saved to {result}")
+        print("=" * 70)
+    else:
+        print("\n" + "=" * 70)
+        print("Email discovery failed! Check the logs for details.")
+        print("=" * 70)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Local company-to-domain index
+
+Every company whose domain we've already learned, from a web search, from
+the Company Domain column of an earlier output file or from the persistent
+cache, is kept in a small SQLite table and loaded into memory at startup.
+Lookups are a dict hit for a known company, and a trigram similarity search
+over an inverted index for near-duplicates ("acme international" vs "acme
+intl"), so only genuinely new companies go to the network.
+
+Pattern-based guesses (company name + ".com") from the cache are not
+indexed, they are what we fall back to when nothing is known and are
+retried sooner than real results.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from email_finder.services.domain_discovery import canonicalize_company_name, pattern_domain
+from email_finder.utils.table_io import iter_table_chunks, read_columns
+
+logger = logging.getLogger("email_finder.domain_index")
+
+# Sources in the order of how much we trust them, a better source replaces a worse one
+SOURCE_RANK = {"cache": 1, "output": 2, "search": 3}
+
+# Names shorter than this are only matched exactly, their trigrams say too little
+MIN_FUZZY_LENGTH = 4
+
+
+def trigrams(name):
+    """Set of character trigrams of a name, padded so word edges count"""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def is_pattern_guess(company, domain):
+    """True when a domain is only pattern_domain() of the company's raw or canonical name"""
+    domain = _clean_domain(domain)
+    return domain in (pattern_domain(company), pattern_domain(canonicalize_company_name(company)))
+
+
+class CompanyDomainIndex:
+    """In-memory company -> domain index with fuzzy lookup and SQLite persistence"""
+
+    def __init__(self, path=None, threshold=0.7):
+        """
+        Open the index
+
+        Args:
+            path (str, optional): SQLite file to persist the index in (None
+                keeps it in memory for this run only)
+            threshold (float): Minimum trigram similarity (Jaccard) for a
+                fuzzy match
+        """
+        self.path = path
+        self.threshold = threshold
+
+        self.lock = threading.Lock()
+        self.domains = {}  # canonical name -> (domain, source)
+        self.postings = defaultdict(set)  # trigram -> canonical names
+
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            with self.conn:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS company_domains ("
+                    " company TEXT PRIMARY KEY,"
+                    " domain TEXT NOT NULL,"
+                    " source TEXT NOT NULL,"
+                    " updated_at REAL NOT NULL)"
+                )
+
+            for company, domain, source in self.conn.execute("SELECT company, domain, source FROM company_domains"):
+                self._index(company, domain, source)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.domains)
+
+    def lookup(self, company_name):
+        """
+        Find the domain of a company
+
+        Args:
+            company_name (str): Company name (raw or canonical)
+
+        Returns:
+            str: Known domain of the company or its closest match, or None
+        """
+        canonical = canonicalize_company_name(company_name)
+        if not canonical:
+            return None
+
+        with self.lock:
+            entry = self.domains.get(canonical)
+            if entry is not None:
+                self.exact_hits += 1
+                return entry[0]
+
+            match = self._closest(canonical) if len(canonical) >= MIN_FUZZY_LENGTH else None
+            if match is None:
+                self.misses += 1
+                return None
+
+            self.fuzzy_hits += 1
+            logger.debug(f"Fuzzy domain match: {canonical} -> {match}")
+            return self.domains[match][0]
+
+    def add(self, company_name, domain, source="search"):
+        """
+        Record the domain of a company
+
+        Args:
+            company_name (str): Company name (raw or canonical)
+            domain (str): Its domain
+            source (str): Where the domain came from, see SOURCE_RANK
+
+        Returns:
+            bool: True if the index changed
+        """
+        return self.add_many([(company_name, domain)], source) > 0
+
+    def add_many(self, pairs, source):
+        """
+        Record the domains of many companies in one transaction
+
+        An existing entry is only replaced by one from a better source.
+
+        Args:
+            pairs (iterable): (company name, domain) pairs
+            source (str): Where the domains came from, see SOURCE_RANK
+
+        Returns:
+            int: Number of entries added or replaced
+        """
+        rank = SOURCE_RANK.get(source, 0)
+        changed = []
+
+        with self.lock:
+            for company_name, domain in pairs:
+                canonical = canonicalize_company_name(company_name)
+                domain = _clean_domain(domain)
+                if not canonical or not domain:
+                    continue
+
+                existing = self.domains.get(canonical)
+                if existing is not None and (existing[0] == domain or SOURCE_RANK.get(existing[1], 0) > rank):
+                    continue
+
+                self._index(canonical, domain, source)
+                changed.append((canonical, domain, source, time.time()))
+
+            if changed and self.conn is not None:
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO company_domains (company, domain, source, updated_at)"
+                        " VALUES (?, ?, ?, ?)",
+                        changed
+                    )
+
+        return len(changed)
+
+    def seed_from_csv(self, path, chunk_size=50000):
+        """
+        Learn domains from the Company Domain column of an earlier output file
+        (CSV, Parquet or Feather)
+
+        Only rows where an email was found are used, and like in
+        seed_from_cache() pattern-based guesses are skipped: rows marked
+        unverified_pattern and domains that are just the company name's
+        pattern_domain(). A failed search must stay a negative cache entry
+        that expires, not become a permanent index hit.
+
+        Args:
+            path (str): Output file of an earlier run
+            chunk_size (int): Rows read at a time
+
+        Returns:
+            int: Number of entries added or replaced
+        """
+        columns = read_columns(path)
+        if "Company Name" not in columns or "Company Domain" not in columns:
+            return 0
+
+        wanted = [column for column in ("Company Name", "Company Domain", "Email", "Email Method") if column in columns]
+
+        added = 0
+        for chunk in iter_table_chunks(path, chunk_size, columns=wanted, dtype=str):
+            found = chunk["Company Domain"].notna() & chunk["Company Name"].notna()
+            if "Email" in chunk.columns:
+                found &= chunk["Email"].notna() & (chunk["Email"].str.strip() != "")
+            if "Email Method" in chunk.columns:
+                found &= chunk["Email Method"].fillna("") != "unverified_pattern"
+
+            rows = chunk[found]
+            added += self.add_many(
+                ((company, domain) for company, domain in zip(rows["Company Name"], rows["Company Domain"])
+                 if not is_pattern_guess(company, domain)),
+                "output"
+            )
+
+        return added
+
+    def seed_from_cache(self, cache):
+        """
+        Learn domains from the persistent cache's domain entries
+
+        Pattern-based guesses are skipped, only search results are learned.
+
+        Args:
+            cache (PersistentCache): Cache shared by the email finder scripts
+
+        Returns:
+            int: Number of entries added or replaced
+        """
+        return self.add_many(
+            ((company, domain) for company, domain in cache.items("domain")
+             if domain and not is_pattern_guess(company, domain)),
+            "cache"
+        )
+
+    def stats(self):
+        """Return size and hit/miss counters"""
+        with self.lock:
+            return {
+                "size": len(self.domains),
+                "exact_hits": self.exact_hits,
+                "fuzzy_hits": self.fuzzy_hits,
+                "misses": self.misses
+            }
+
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def _index(self, canonical, domain, source):
+        if canonical not in self.domains:
+            for gram in trigrams(canonical):
+                self.postings[gram].add(canonical)
+        self.domains[canonical] = (domain, source)
+
+    def _closest(self, canonical):
+        """Most similar indexed name above the threshold, or None"""
+        grams = trigrams(canonical)
+
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+
+        best, best_score = None, self.threshold
+        for candidate, common in shared.items():
+            # Jaccard similarity of the two trigram sets
+            score = common / (len(grams) + len(trigrams(candidate)) - common)
+            if score >= best_score:
+                best, best_score = candidate, score
+
+        return best
+
+
+def _clean_domain(domain):
+    if not isinstance(domain, str):
+        return ""
+
+    domain = domain.strip().lower()
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain
+
+
+def open_domain_index(cache=None):
+    """
+    Open the company-to-domain index shared by the email finder scripts
+
+    The index lives in DOMAIN_INDEX (default: the EMAIL_FINDER_CACHE file,
+    "off" keeps it in memory only) and is topped up from the persistent
+    cache's domain entries on every start.
+
+    Args:
+        cache (PersistentCache, optional): Cache to seed from
+
+    Returns:
+        CompanyDomainIndex: The index
+    """
+    path = os.getenv("DOMAIN_INDEX", os.getenv("EMAIL_FINDER_CACHE", ".email_finder_cache.sqlite"))
+    if not path or path.lower() == "off":
+        path = None
+
+    try:
+        index = CompanyDomainIndex(path, threshold=float(os.getenv("DOMAIN_INDEX_THRESHOLD", "0.7")))
+    except sqlite3.Error as e:
+        logger.warning(f"Domain index not persisted, could not open {path}: {str(e)}")
+        index = CompanyDomainIndex(None)
+
+    if cache is not None:
+        added = index.seed_from_cache(cache)
+        if added:
+            logger.info(f"Added {added} companies to the domain index from the cache")
+
+    return index
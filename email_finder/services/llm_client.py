@@ -0,0 +1,474 @@
+"""
+Shared OpenAI client for the summary and connection-note generators
+
+One client is kept for the life of the process so every call reuses the
+same HTTP connection pool and TLS sessions. The SDK's own retries are
+turned off: chat_completion() retries transient errors (429s, timeouts,
+connection errors, 5xx) itself with jittered exponential backoff, honoring
+retry-after up to MAX_RETRY_DELAY, and applies a per-call timeout. Every call's model, tokens,
+latency, retries and error class are added to a process-wide UsageTracker
+so the scripts can report what a run cost, and can be appended to a JSONL
+call log to track spend and latency across runs.
+
+Configuration comes from the environment:
+    OPENAI_API_KEY      API key
+    OPENAI_BASE_URL     Alternative endpoint (read by the SDK)
+    OPENAI_TIMEOUT      Seconds per call (default: 60)
+    OPENAI_MAX_ATTEMPTS Attempts per call before giving up (default: 4)
+    OPENAI_PRICES       JSON of {"model": [input, output]} USD per million
+                        tokens, added to / overriding MODEL_PRICES
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+from array import array
+from datetime import datetime
+
+from email_finder.utils.lazy import lazy_import
+from email_finder.utils.rate_limiter import retry_after_seconds
+
+openai = lazy_import("openai")
+
+logger = logging.getLogger("email_finder.llm_client")
+
+# USD per million (input, output) tokens, used to estimate what a run cost
+MODEL_PRICES = {
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50)
+}
+
+# Batch API requests are billed at this fraction of the regular price
+BATCH_PRICE_FACTOR = 0.5
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def transient_errors():
+    """Errors worth retrying, everything else (bad request, auth, ...) fails at once"""
+    return (
+        openai.RateLimitError,
+        openai.APIConnectionError,  # includes APITimeoutError
+        openai.InternalServerError
+    )
+
+
+def default_timeout():
+    """Per-call timeout in seconds from OPENAI_TIMEOUT"""
+    return float(os.getenv("OPENAI_TIMEOUT", "60"))
+
+
+def default_max_attempts():
+    """Attempts per call from OPENAI_MAX_ATTEMPTS"""
+    return max(1, int(os.getenv("OPENAI_MAX_ATTEMPTS", "4")))
+
+
+def get_client():
+    """
+    Return the process-wide OpenAI client, creating it on first use
+
+    Returns:
+        openai.OpenAI: Shared client (thread-safe, keeps its connection pool)
+    """
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = openai.OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    timeout=default_timeout(),
+                    max_retries=0
+                )
+
+    return _client
+
+
+def create_async_client():
+    """
+    Create an async client with the same settings as get_client()
+
+    An async client's connection pool is tied to the event loop it runs on,
+    so create one per asyncio.run() and close it when the loop is done.
+
+    Returns:
+        openai.AsyncOpenAI: New async client
+    """
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        timeout=default_timeout(),
+        max_retries=0
+    )
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential backoff with jitter for the given retry (1, 2, ...)"""
+    ceiling = min(cap, base * 2 ** max(0, attempt - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def usage_dict(usage):
+    """Token counts from an OpenAI usage object (or None)"""
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0
+    }
+
+
+def model_prices():
+    """Price table with the OPENAI_PRICES overrides applied"""
+    prices = dict(MODEL_PRICES)
+
+    override = os.getenv("OPENAI_PRICES")
+    if override:
+        try:
+            prices.update({model: tuple(price) for model, price in json.loads(override).items()})
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring malformed OPENAI_PRICES: {str(e)}")
+
+    return prices
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, batch=False, prices=None):
+    """
+    Estimate the USD cost of tokens
+
+    Args:
+        model (str): OpenAI model name (dated snapshots match their base model)
+        prompt_tokens (int): Input tokens
+        completion_tokens (int): Output tokens
+        batch (bool): Billed through the Batch API
+        prices (dict, optional): Price table (default: model_prices())
+
+    Returns:
+        float: Estimated cost, or None for a model without a known price
+    """
+    prices = model_prices() if prices is None else prices
+
+    # "gpt-4o-mini-2024-07-18" is priced as "gpt-4o-mini", the longest prefix wins
+    matches = [name for name in prices if model and (model == name or model.startswith(f"{name}-"))]
+    if not matches:
+        return None
+
+    input_price, output_price = prices[max(matches, key=len)]
+    cost = (prompt_tokens * input_price + completion_tokens * output_price) / 1e6
+    return cost * BATCH_PRICE_FACTOR if batch else cost
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile of a sorted sequence (0.0 if empty)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class UsageTracker:
+    """Thread-safe per-call telemetry of the OpenAI calls of a run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._totals = {}  # purpose -> totals
+        self._latencies = {}  # purpose -> array of call latencies
+        self._models = {}  # (model, batch) -> token totals
+        self._errors = {}  # error class -> count
+        self._call_log = None
+
+    def open_call_log(self, path):
+        """
+        Append every following call as one JSON line to path
+
+        Args:
+            path (str): Call log file (appended to, so runs accumulate)
+        """
+        with self.lock:
+            if self._call_log is not None:
+                self._call_log.close()
+            self._call_log = open(path, "a", encoding="utf-8", buffering=1)
+
+    def close_call_log(self):
+        """Stop writing the call log"""
+        with self.lock:
+            if self._call_log is not None:
+                self._call_log.close()
+                self._call_log = None
+
+    def record(self, purpose, usage=None, latency=0.0, retries=0, error=None, model=None, batch=False):
+        """
+        Add one call to the telemetry
+
+        Args:
+            purpose (str): What the call was for, e.g. "summary" or "note"
+            usage (dict, optional): Token counts from usage_dict()
+            latency (float): Seconds the call took, including retries (None
+                when unknown, e.g. for batch results)
+            retries (int): Retries before the call succeeded or gave up
+            error (Exception, optional): Error the call finally failed with
+            model (str, optional): Model the call was made to
+            batch (bool): The call ran through the Batch API
+        """
+        usage = usage or {}
+        error_class = type(error).__name__ if error is not None else None
+
+        with self.lock:
+            totals = self._totals.setdefault(purpose, {
+                "calls": 0,
+                "failures": 0,
+                "retries": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+                "latency_total": 0.0,
+                "latency_max": 0.0
+            })
+
+            totals["calls"] += 1
+            totals["retries"] += retries
+            if latency is not None:
+                totals["latency_total"] += latency
+                totals["latency_max"] = max(totals["latency_max"], latency)
+                self._latencies.setdefault(purpose, array("d")).append(latency)
+            if error_class:
+                totals["failures"] += 1
+                self._errors[error_class] = self._errors.get(error_class, 0) + 1
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                totals[key] += usage.get(key, 0)
+
+            tokens = self._models.setdefault((model or "unknown", batch), {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0
+            })
+            tokens["calls"] += 1
+            tokens["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            tokens["completion_tokens"] += usage.get("completion_tokens", 0)
+
+            if self._call_log is not None:
+                self._call_log.write(json.dumps({
+                    "at": round(time.time(), 3),
+                    "purpose": purpose,
+                    "model": model,
+                    "batch": batch,
+                    "prompt_tokens": usage.get("prompt_tokens", 0),
+                    "completion_tokens": usage.get("completion_tokens", 0),
+                    "latency": round(latency, 4) if latency is not None else None,
+                    "retries": retries,
+                    "error": error_class
+                }) + "\n")
+
+    def snapshot(self):
+        """Return a copy of the totals with average and p50/p95 latency added"""
+        with self.lock:
+            report = {}
+            for purpose, totals in self._totals.items():
+                entry = dict(totals)
+                latencies = sorted(self._latencies.get(purpose, ()))
+                entry["latency_avg"] = totals["latency_total"] / len(latencies) if latencies else 0.0
+                entry["latency_p50"] = _percentile(latencies, 0.5)
+                entry["latency_p95"] = _percentile(latencies, 0.95)
+                report[purpose] = entry
+            return report
+
+    def report(self, cache_savings=None):
+        """
+        Build the end-of-run report
+
+        Args:
+            cache_savings (dict, optional): model -> {"hits", "prompt_tokens",
+                "completion_tokens"} answered from a cache instead of the API
+
+        Returns:
+            dict: Per-purpose latency and tokens, per-model tokens and
+                estimated cost, error classes and cache savings
+        """
+        prices = model_prices()
+        purposes = self.snapshot()
+
+        with self.lock:
+            models = {}
+            total_cost = 0.0
+            for (model, batch), tokens in sorted(self._models.items()):
+                cost = estimate_cost(model, tokens["prompt_tokens"], tokens["completion_tokens"], batch, prices)
+                entry = models.setdefault(model, {
+                    "calls": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "estimated_cost_usd": None
+                })
+                for key in ("calls", "prompt_tokens", "completion_tokens"):
+                    entry[key] += tokens[key]
+                if cost is not None:
+                    entry["estimated_cost_usd"] = round((entry["estimated_cost_usd"] or 0.0) + cost, 6)
+                    total_cost += cost
+            errors = dict(self._errors)
+
+        savings = {}
+        saved_cost = 0.0
+        for model, saved in (cache_savings or {}).items():
+            cost = estimate_cost(model, saved.get("prompt_tokens", 0), saved.get("completion_tokens", 0),
+                                 prices=prices)
+            savings[model] = dict(saved, estimated_cost_usd=round(cost, 6) if cost is not None else None)
+            saved_cost += cost or 0.0
+
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "purposes": purposes,
+            "models": models,
+            "errors": errors,
+            "total_tokens": sum(entry["total_tokens"] for entry in purposes.values()),
+            "estimated_cost_usd": round(total_cost, 6),
+            "cache_savings": savings,
+            "estimated_savings_usd": round(saved_cost, 6)
+        }
+
+    def reset(self):
+        """Forget all telemetry"""
+        with self.lock:
+            self._totals.clear()
+            self._latencies.clear()
+            self._models.clear()
+            self._errors.clear()
+
+
+usage_tracker = UsageTracker()
+
+
+def chat_completion(purpose, timeout=None, max_attempts=None, **request):
+    """
+    Create a chat completion with the shared client
+
+    Args:
+        purpose (str): What the call is for, used to group usage totals
+        timeout (float, optional): Seconds per attempt (default: OPENAI_TIMEOUT)
+        max_attempts (int, optional): Attempts before giving up (default: OPENAI_MAX_ATTEMPTS)
+        **request: Arguments for client.chat.completions.create
+
+    Returns:
+        ChatCompletion: The response
+
+    Raises:
+        openai.OpenAIError: When the call fails with a permanent error or
+            keeps failing after max_attempts
+    """
+    client = get_client()
+    timeout = default_timeout() if timeout is None else timeout
+    max_attempts = default_max_attempts() if max_attempts is None else max(1, max_attempts)
+
+    model = request.get("model")
+    start = time.monotonic()
+    attempt = 0
+
+    while True:
+        attempt += 1
+        try:
+            response = client.chat.completions.create(timeout=timeout, **request)
+        except transient_errors() as e:
+            if attempt >= max_attempts:
+                usage_tracker.record(purpose, None, time.monotonic() - start, attempt - 1, e, model)
+                raise
+
+            response = getattr(e, "response", None)
+            delay = retry_after_seconds(response.headers if response is not None else None)
+            if delay is None:
+                delay = backoff_delay(attempt)
+
+            logger.warning(
+                f"OpenAI {purpose} call failed ({type(e).__name__}), "
+                f"retrying in {delay:.1f}s (attempt {attempt}/{max_attempts})"
+            )
+            time.sleep(delay)
+            continue
+        except Exception as e:
+            usage_tracker.record(purpose, None, time.monotonic() - start, attempt - 1, e, model)
+            raise
+
+        usage_tracker.record(
+            purpose,
+            usage_dict(getattr(response, "usage", None)),
+            time.monotonic() - start,
+            attempt - 1,
+            model=getattr(response, "model", None) or model
+        )
+        return response
+
+
+def print_usage_stats():
+    """Print the OpenAI calls, tokens and latency of this run"""
+    for purpose, totals in usage_tracker.snapshot().items():
+        print(
+            f"OpenAI {purpose}: {totals['calls']} calls ({totals['failures']} failed, "
+            f"{totals['retries']} retries), {totals['total_tokens']} tokens "
+            f"({totals['prompt_tokens']} prompt + {totals['completion_tokens']} completion), "
+            f"latency p50 {totals['latency_p50']:.2f}s, p95 {totals['latency_p95']:.2f}s, "
+            f"max {totals['latency_max']:.2f}s"
+        )
+
+
+def open_call_log(output_file):
+    """
+    Start logging every OpenAI call next to an output file
+
+    Calls are appended to LLM_CALL_LOG (default: <output>.llm_calls.jsonl,
+    "off" disables the log), so the file grows into a history across runs.
+
+    Args:
+        output_file (str): Output CSV of the run
+
+    Returns:
+        str: Path of the call log, or None if disabled
+    """
+    path = os.getenv("LLM_CALL_LOG", f"{output_file}.llm_calls.jsonl")
+    if not path or path.lower() == "off":
+        return None
+
+    try:
+        usage_tracker.open_call_log(path)
+    except OSError as e:
+        logger.warning(f"Could not open LLM call log {path}: {str(e)}")
+        return None
+
+    return path
+
+
+def write_usage_report(output_file, cache_savings=None):
+    """
+    Write the run's LLM telemetry report next to an output file
+
+    The report goes to <output>.llm_report.json. Nothing is written when
+    the run made no OpenAI calls and saved none.
+
+    Args:
+        output_file (str): Output CSV of the run
+        cache_savings (dict, optional): See UsageTracker.report()
+
+    Returns:
+        str: Path of the report, or None if nothing was written
+    """
+    report = usage_tracker.report(cache_savings)
+    if not report["purposes"] and not report["cache_savings"]:
+        return None
+
+    report["output_file"] = output_file
+    path = f"{output_file}.llm_report.json"
+
+    try:
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_file, path)
+    except OSError as e:
+        logger.warning(f"Could not write LLM report {path}: {str(e)}")
+        return None
+
+    print(
+        f"OpenAI estimated cost: ${report['estimated_cost_usd']:.4f} "
+        f"(${report['estimated_savings_usd']:.4f} saved by caching), report saved to {path}"
+    )
+    return path
@@ -0,0 +1,246 @@
+"""
+OpenAI Batch API support for bulk profile summaries
+
+Large offline summary jobs don't need answers right away, so instead of one
+chat completion per row the requests are written to a JSONL file, uploaded,
+and run as a batch at the batch price. The batch id is kept in a small state
+file next to the output so an interrupted run picks up polling where it left
+off instead of submitting (and paying for) the same work twice.
+
+The client's base URL can be pointed at a local stand-in server through
+OPENAI_BASE_URL (see benchmarks/fake_openai_server.py).
+"""
+
+import os
+import json
+import time
+import logging
+
+from email_finder.services.llm_client import usage_tracker
+from email_finder.services.summary_generator import SUMMARY_MODEL, build_summary_request
+
+logger = logging.getLogger("email_finder.summary_batch")
+
+# Endpoint every request in the batch is sent to
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# The Batch API accepts at most this many requests per batch
+MAX_BATCH_REQUESTS = 50000
+
+# Batch statuses after which nothing changes any more
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def batch_custom_id(row, fingerprint):
+    """
+    Build the custom_id of a row's request
+
+    The fingerprint is part of the id so results are only merged into a row
+    whose input fields haven't changed since the batch was submitted.
+
+    Args:
+        row: Row label in the input file
+        fingerprint (str): Fingerprint of the row's input fields
+
+    Returns:
+        str: custom_id for the batch request
+    """
+    return f"row-{row}-{fingerprint}"
+
+
+def write_batch_requests(profiles, path):
+    """
+    Write the JSONL request file for a batch
+
+    Args:
+        profiles (iterable): (custom_id, profile_data) pairs
+        path (str): File to write
+
+    Returns:
+        int: Number of requests written
+    """
+    count = 0
+    tmp_file = f"{path}.tmp"
+
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        for custom_id, profile_data in profiles:
+            f.write(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": build_summary_request(profile_data)
+            }, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_file, path)
+    return count
+
+
+def load_batch_state(path):
+    """Load the state of a submitted batch, or None if there is none"""
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable batch state {path}: {str(e)}")
+        return None
+
+
+def save_batch_state(path, state):
+    """Atomically write the state of a submitted batch"""
+    tmp_file = f"{path}.tmp"
+
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_file, path)
+
+
+def submit_batch(client, request_file, state_file, metadata=None):
+    """
+    Upload a request file and start a batch
+
+    The state file is written as soon as the batch exists, so a crash right
+    after submitting doesn't lose track of it.
+
+    Args:
+        client (openai.OpenAI): Client to use
+        request_file (str): JSONL file from write_batch_requests()
+        state_file (str): Where to keep the batch state
+        metadata (dict, optional): Metadata attached to the batch
+
+    Returns:
+        dict: The saved batch state
+    """
+    with open(request_file, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+        metadata=metadata or None
+    )
+
+    state = {
+        "batch_id": batch.id,
+        "input_file_id": uploaded.id,
+        "request_file": request_file,
+        "status": batch.status,
+        "submitted_at": time.time()
+    }
+    save_batch_state(state_file, state)
+
+    return state
+
+
+def wait_for_batch(client, state, state_file, poll_interval=30.0):
+    """
+    Poll a batch until it reaches a terminal status
+
+    Args:
+        client (openai.OpenAI): Client to use
+        state (dict): Batch state from submit_batch() or load_batch_state()
+        state_file (str): Where to keep the batch state
+        poll_interval (float): Seconds between polls
+
+    Returns:
+        Batch: The finished batch
+    """
+    while True:
+        batch = client.batches.retrieve(state["batch_id"])
+
+        counts = batch.request_counts
+        if batch.status != state.get("status"):
+            state["status"] = batch.status
+            save_batch_state(state_file, state)
+
+        if counts:
+            print(
+                f"Batch {batch.id}: {batch.status} "
+                f"({counts.completed} completed, {counts.failed} failed of {counts.total})"
+            )
+        else:
+            print(f"Batch {batch.id}: {batch.status}")
+
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+
+        time.sleep(poll_interval)
+
+
+def download_batch_results(client, batch):
+    """
+    Download and parse the results of a finished batch
+
+    Every result is added to the usage telemetry as a batch call (billed at
+    the batch price, without a latency of its own).
+
+    Args:
+        client (openai.OpenAI): Client to use
+        batch (Batch): Finished batch
+
+    Returns:
+        dict: custom_id -> (summary or "[ERROR: ...]", usage dict)
+    """
+    results = {}
+
+    for file_id in (batch.error_file_id, batch.output_file_id):
+        if not file_id:
+            continue
+
+        content = client.files.content(file_id).text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping malformed line in batch file {file_id}")
+                continue
+
+            summary, usage = results[record.get("custom_id")] = _parse_result(record)
+
+            body = (record.get("response") or {}).get("body") or {}
+            usage_tracker.record(
+                "summary",
+                usage,
+                None,
+                error=RuntimeError(summary) if summary.startswith("[ERROR") else None,
+                model=body.get("model") or SUMMARY_MODEL,
+                batch=True
+            )
+
+    return results
+
+
+def _parse_result(record):
+    response = record.get("response") or {}
+    body = response.get("body") or {}
+
+    if record.get("error") or response.get("status_code") != 200:
+        error = record.get("error") or body.get("error") or {}
+        message = error.get("message") if isinstance(error, dict) else str(error)
+        return f"[ERROR: {message or 'request failed'}]", {}
+
+    try:
+        summary = body["choices"][0]["message"]["content"].strip()
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return "[ERROR: malformed batch response]", {}
+
+    usage = body.get("usage") or {}
+    return summary, {
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "total_tokens": usage.get("total_tokens", 0)
+    }
@@ -0,0 +1,550 @@
+"""
+LinkedIn profile summary generation shared by scraper_tool.py and view_summaries.py
+
+Prompts are kept within a token budget: profile fields go in by priority
+(name, title and company before the about text) and long free text is
+shortened, so input tokens stay predictable per row.
+
+Summaries are cached on disk by a hash of the model, the prompt template
+version, the budget and the normalized profile data, so reruns, retries
+after a crash and duplicate rows reuse an earlier summary instead of
+calling OpenAI again.
+
+generate_summaries_async summarizes many profiles concurrently with the
+async client, bounded and throttled by an AdaptiveRateLimiter.
+"""
+
+import os
+import json
+import time
+import hashlib
+import asyncio
+import threading
+from array import array
+
+from email_finder.services.llm_client import chat_completion, create_async_client, usage_dict, usage_tracker
+from email_finder.utils.cache import MISSING, PersistentCache
+from email_finder.utils.lazy import lazy_import
+from email_finder.utils.tokens import count_tokens, truncate_to_tokens
+
+openai = lazy_import("openai")
+
+# Model used for profile summaries
+SUMMARY_MODEL = "gpt-4-turbo"
+
+# Bump whenever the prompt below changes so old cached summaries are not reused
+PROMPT_TEMPLATE_VERSION = 2
+
+SYSTEM_PROMPT = "You are an assistant that creates concise professional summaries."
+
+PROMPT_HEADER = "Create a professional summary for a sales outreach based on this LinkedIn profile information:"
+
+PROMPT_INSTRUCTIONS = (
+    "The summary should be concise (2-3 sentences) and highlight the person's current role, experience, "
+    "and any relevant background that would be useful for sales outreach. Focus on their professional "
+    "capabilities and decision-making authority. If some information is missing, focus on what is available."
+)
+
+# Default token budget of the user prompt, override with SUMMARY_PROMPT_TOKENS
+DEFAULT_PROMPT_TOKEN_BUDGET = 500
+
+# Profile fields in the order they are kept when the budget runs short,
+# fields not listed here come last
+FIELD_PRIORITY = ["name", "title", "company", "location", "experience", "about"]
+
+# Most tokens a long free-text field may use, so it can't crowd out the rest
+FIELD_TOKEN_CAPS = {"experience": 200, "about": 120}
+
+# Fields that would be cut shorter than this are left out instead
+MIN_FIELD_TOKENS = 8
+
+# Completion settings for summary requests
+SUMMARY_MAX_TOKENS = 250
+SUMMARY_TEMPERATURE = 0.7
+
+# Default location of the summary cache database
+DEFAULT_SUMMARY_CACHE_PATH = ".summary_cache.sqlite"
+
+
+def prompt_token_budget():
+    """Token budget of the summary prompt from SUMMARY_PROMPT_TOKENS"""
+    return int(os.getenv("SUMMARY_PROMPT_TOKENS", str(DEFAULT_PROMPT_TOKEN_BUDGET)))
+
+
+def _prioritized_fields(profile_data):
+    """Non-empty profile fields, most important first"""
+    fields = [(key, str(value).strip()) for key, value in profile_data.items() if value and value == value]
+    fields = [(key, value) for key, value in fields if value]
+
+    def priority(field):
+        key = str(field[0]).lower()
+        return FIELD_PRIORITY.index(key) if key in FIELD_PRIORITY else len(FIELD_PRIORITY)
+
+    # sorted() is stable, so unknown fields keep their original order
+    return sorted(fields, key=priority)
+
+
+def build_budgeted_prompt(profile_data, budget=None):
+    """
+    Build the user prompt for a profile summary within a token budget
+
+    Fields are added in FIELD_PRIORITY order. Long free-text fields are cut
+    to their FIELD_TOKEN_CAPS share, and once the budget runs out the rest
+    are shortened or left out, so name, title and company always make it
+    in before the about text does.
+
+    Args:
+        profile_data (dict): Profile fields
+        budget (int, optional): Token budget of the prompt (default:
+            SUMMARY_PROMPT_TOKENS)
+
+    Returns:
+        tuple: (prompt, dict with original_tokens, prompt_tokens and the
+                truncated and dropped field names)
+    """
+    budget = prompt_token_budget() if budget is None else budget
+    fields = _prioritized_fields(profile_data)
+    lines = [f"{str(key).capitalize()}: {value}" for key, value in fields]
+
+    # Each part is joined with a blank line, count that as one token
+    remaining = budget - count_tokens(PROMPT_HEADER, SUMMARY_MODEL) - count_tokens(PROMPT_INSTRUCTIONS, SUMMARY_MODEL) - 1
+
+    prompt_parts = [PROMPT_HEADER]
+    truncated, dropped = [], []
+
+    for (key, _), line in zip(fields, lines):
+        allowed = remaining - 1
+        cap = FIELD_TOKEN_CAPS.get(str(key).lower())
+        if cap is not None:
+            allowed = min(allowed, cap)
+
+        text = truncate_to_tokens(line, allowed, SUMMARY_MODEL)
+        # A field cut down to little more than its label isn't worth sending
+        if not text or (text != line and count_tokens(text, SUMMARY_MODEL) < MIN_FIELD_TOKENS):
+            dropped.append(key)
+            continue
+
+        if text != line:
+            truncated.append(key)
+
+        prompt_parts.append(text)
+        remaining -= count_tokens(text, SUMMARY_MODEL) + 1
+
+    prompt_parts.append(PROMPT_INSTRUCTIONS)
+    prompt = "\n\n".join(prompt_parts)
+
+    if truncated or dropped:
+        original_tokens = count_tokens("\n\n".join([PROMPT_HEADER] + lines + [PROMPT_INSTRUCTIONS]), SUMMARY_MODEL)
+        prompt_tokens = count_tokens(prompt, SUMMARY_MODEL)
+    else:
+        original_tokens = prompt_tokens = count_tokens(prompt, SUMMARY_MODEL)
+
+    return prompt, {
+        "original_tokens": original_tokens,
+        "prompt_tokens": prompt_tokens,
+        "truncated": truncated,
+        "dropped": dropped
+    }
+
+
+def build_summary_prompt(profile_data, budget=None):
+    """Build the user prompt for a profile summary"""
+    return build_budgeted_prompt(profile_data, budget)[0]
+
+
+class PromptStats:
+    """Per-row prompt token counts before and after budgeting"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.original_tokens = array("I")
+        self.prompt_tokens = array("I")
+        self.truncated_rows = 0
+
+    def record(self, stats):
+        """Record the stats of one prompt from build_budgeted_prompt()"""
+        with self.lock:
+            self.original_tokens.append(stats["original_tokens"])
+            self.prompt_tokens.append(stats["prompt_tokens"])
+            if stats["truncated"] or stats["dropped"]:
+                self.truncated_rows += 1
+
+    def summary(self):
+        """Return totals, savings and the median and 95th percentile prompt size"""
+        with self.lock:
+            rows = len(self.prompt_tokens)
+            original = sum(self.original_tokens)
+            sent = sum(self.prompt_tokens)
+            sizes = sorted(self.prompt_tokens)
+
+            return {
+                "rows": rows,
+                "truncated_rows": self.truncated_rows,
+                "original_tokens": original,
+                "prompt_tokens": sent,
+                "tokens_saved": original - sent,
+                "p50_prompt_tokens": sizes[rows // 2] if rows else 0,
+                "p95_prompt_tokens": sizes[min(rows - 1, int(rows * 0.95))] if rows else 0
+            }
+
+
+prompt_stats = PromptStats()
+
+
+def build_summary_request(profile_data):
+    """Keyword arguments for the chat completion that summarizes a profile"""
+    prompt, stats = build_budgeted_prompt(profile_data)
+    prompt_stats.record(stats)
+
+    return {
+        "model": SUMMARY_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": SUMMARY_MAX_TOKENS,
+        "temperature": SUMMARY_TEMPERATURE
+    }
+
+
+def has_summary_data(profile_data):
+    """Whether there is enough profile data to summarize"""
+    return bool(profile_data) and bool(profile_data.get("name") or profile_data.get("title"))
+
+
+def normalize_profile_data(profile_data):
+    """
+    Normalize profile data so equivalent profiles hash the same
+
+    Keys are lowercased, whitespace inside values is collapsed, and empty or
+    NaN values are dropped.
+
+    Args:
+        profile_data (dict): Profile fields
+
+    Returns:
+        dict: Normalized profile fields
+    """
+    normalized = {}
+
+    for key, value in profile_data.items():
+        if value is None or value != value:  # None or NaN
+            continue
+
+        text = " ".join(str(value).split())
+        if text:
+            normalized[str(key).strip().lower()] = text
+
+    return normalized
+
+
+class SummaryCache:
+    """Content-addressed on-disk cache of generated summaries"""
+
+    NAMESPACE = "summary"
+
+    def __init__(self, path=DEFAULT_SUMMARY_CACHE_PATH, max_entries=1000000):
+        """
+        Open (or create) the summary cache
+
+        Args:
+            path (str): Path to the SQLite database file
+            max_entries (int): Number of summaries kept before the least
+                recently used ones are evicted
+        """
+        # Summaries don't go stale on their own, the key changes with the input
+        self.store = PersistentCache(path, max_entries=max_entries, default_ttl=10 * 365 * 24 * 3600)
+
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.prompt_tokens_saved = 0
+        self.completion_tokens_saved = 0
+
+    @staticmethod
+    def key_for(model, profile_data, template_version=PROMPT_TEMPLATE_VERSION, budget=None):
+        """
+        Compute the cache key for a summary request
+
+        Args:
+            model (str): OpenAI model name
+            profile_data (dict): Profile fields the prompt is built from
+            template_version (int): Version of the prompt template
+            budget (int, optional): Prompt token budget (default: SUMMARY_PROMPT_TOKENS)
+
+        Returns:
+            str: SHA-256 hex digest identifying the request
+        """
+        payload = json.dumps(
+            {
+                "model": model,
+                "template_version": template_version,
+                "prompt_budget": prompt_token_budget() if budget is None else budget,
+                "profile": normalize_profile_data(profile_data)
+            },
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached summary for key, or None"""
+        entry = self.store.get(self.NAMESPACE, key)
+
+        with self.lock:
+            if entry is MISSING or entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.tokens_saved += entry.get("total_tokens", 0)
+            self.prompt_tokens_saved += entry.get("prompt_tokens", 0)
+            self.completion_tokens_saved += entry.get("completion_tokens", 0)
+
+        return entry["summary"]
+
+    def put(self, key, summary, usage=None):
+        """
+        Store a generated summary
+
+        Args:
+            key (str): Cache key from key_for()
+            summary (str): Generated summary
+            usage (dict, optional): Token usage of the call that produced it
+        """
+        entry = {"summary": summary}
+        entry.update(usage or {})
+        self.store.set(self.NAMESPACE, key, entry)
+
+    def stats(self):
+        """Return hit rate and tokens saved"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "tokens_saved": self.tokens_saved,
+                "prompt_tokens_saved": self.prompt_tokens_saved,
+                "completion_tokens_saved": self.completion_tokens_saved
+            }
+
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """
+    Return the process-wide summary cache
+
+    The location comes from SUMMARY_CACHE (set it to "off" to disable).
+
+    Returns:
+        SummaryCache: The shared cache, or None if disabled
+    """
+    global _summary_cache
+
+    path = os.getenv("SUMMARY_CACHE", DEFAULT_SUMMARY_CACHE_PATH)
+    if not path or path.lower() == "off":
+        return None
+
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = SummaryCache(path)
+        return _summary_cache
+
+
+def generate_summary(profile_data):
+    """Generate a summary of the LinkedIn profile using OpenAI"""
+    try:
+        print("Generating summary using OpenAI...")
+
+        # Check if we have at least some data to work with
+        if not has_summary_data(profile_data):
+            print("⚠️ Insufficient profile data for summary generation")
+            return ""
+
+        # Reuse an earlier summary of the same profile if we have one
+        cache = get_summary_cache()
+        cache_key = SummaryCache.key_for(SUMMARY_MODEL, profile_data)
+        if cache:
+            cached = cache.get(cache_key)
+            if cached:
+                print(f"Summary loaded from cache: {cached[:100]}...")
+                return cached
+
+        print("Sending request to OpenAI API...")
+
+        # Shared client, retries transient errors and records token usage
+        response = chat_completion("summary", **build_summary_request(profile_data))
+
+        summary = response.choices[0].message.content.strip()
+        print(f"Summary generated: {summary[:100]}...")
+
+        if cache and summary:
+            cache.put(cache_key, summary, usage_dict(getattr(response, "usage", None)))
+
+        return summary
+
+    except Exception as e:
+        print(f"❌ Error generating summary: {str(e)}")
+        return f"[ERROR: {str(e)}]"  # Return error message instead of empty string
+
+
+async def generate_summary_async(profile_data, client, limiter, max_attempts=5):
+    """
+    Generate a summary with the async OpenAI client
+
+    The request waits for a slot from the limiter, and 429s and transient
+    errors are retried after the limiter's backoff. Rate-limit headers of
+    every response are fed back to the limiter so it can slow down before
+    the quota runs out.
+
+    Args:
+        profile_data (dict): Profile fields
+        client (openai.AsyncOpenAI): Client from create_async_client()
+        limiter (AdaptiveRateLimiter): Shared concurrency limiter
+        max_attempts (int): Attempts before giving up on a profile
+
+    Returns:
+        str: The summary, "" for insufficient data, or "[ERROR: ...]"
+    """
+    if not has_summary_data(profile_data):
+        return ""
+
+    cache = get_summary_cache()
+    cache_key = SummaryCache.key_for(SUMMARY_MODEL, profile_data)
+    if cache:
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
+
+    request = build_summary_request(profile_data)
+    start = time.monotonic()
+    error = None
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            async with limiter:
+                raw = await client.chat.completions.with_raw_response.create(**request)
+        except openai.RateLimitError as e:
+            error = e
+            limiter.on_rate_limited(e.response.headers)
+            continue
+        except (openai.APIConnectionError, openai.InternalServerError) as e:
+            error = e
+            limiter.on_error(attempt)
+            continue
+        except Exception as e:
+            usage_tracker.record("summary", None, time.monotonic() - start, attempt - 1, e, SUMMARY_MODEL)
+            return f"[ERROR: {str(e)}]"
+
+        response = raw.parse()
+        usage = usage_dict(getattr(response, "usage", None))
+        limiter.on_success(raw.headers, usage["total_tokens"])
+        usage_tracker.record("summary", usage, time.monotonic() - start, attempt - 1,
+                             model=response.model or SUMMARY_MODEL)
+
+        summary = response.choices[0].message.content.strip()
+        if cache and summary:
+            cache.put(cache_key, summary, usage)
+        return summary
+
+    usage_tracker.record("summary", None, time.monotonic() - start, max_attempts - 1, error, SUMMARY_MODEL)
+    return f"[ERROR: {str(error)}]"
+
+
+async def generate_summaries_async(profiles, limiter, on_result):
+    """
+    Summarize many profiles concurrently
+
+    Results are handed to on_result in the order of profiles, however the
+    requests finish, so callers can write them straight to a checkpoint.
+
+    Args:
+        profiles (list): (key, profile_data) pairs
+        limiter (AdaptiveRateLimiter): Limits requests in flight
+        on_result (callable): Called as on_result(key, summary) in input order
+    """
+    # One pooled client for the whole run of requests
+    client = create_async_client()
+
+    async def summarize(position, profile_data):
+        return position, await generate_summary_async(profile_data, client, limiter)
+
+    tasks = []
+    try:
+        tasks = [
+            asyncio.ensure_future(summarize(position, profile_data))
+            for position, (_, profile_data) in enumerate(profiles)
+        ]
+
+        finished = {}
+        next_position = 0
+        for future in asyncio.as_completed(tasks):
+            position, summary = await future
+            finished[position] = summary
+
+            # Hand over everything up to the first row still in flight
+            while next_position in finished:
+                on_result(profiles[next_position][0], finished.pop(next_position))
+                next_position += 1
+    finally:
+        for task in tasks:
+            task.cancel()
+        await client.close()
+
+
+def summary_cache_savings():
+    """
+    Tokens the summary cache saved in this run, for write_usage_report()
+
+    Returns:
+        dict: model -> {"hits", "prompt_tokens", "completion_tokens"}, empty
+            without cache hits
+    """
+    cache = get_summary_cache()
+    if not cache:
+        return {}
+
+    stats = cache.stats()
+    if not stats["hits"]:
+        return {}
+
+    return {
+        SUMMARY_MODEL: {
+            "hits": stats["hits"],
+            "prompt_tokens": stats["prompt_tokens_saved"],
+            "completion_tokens": stats["completion_tokens_saved"]
+        }
+    }
+
+
+def print_summary_cache_stats():
+    """Print the summary cache hit rate and tokens saved for this run"""
+    cache = get_summary_cache()
+    if not cache:
+        return
+
+    stats = cache.stats()
+    if stats["hits"] or stats["misses"]:
+        print(
+            f"Summary cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate'] * 100:.1f}% hit rate), {stats['tokens_saved']} tokens saved"
+        )
+
+
+def print_prompt_stats():
+    """Print how many prompt tokens the budget saved in this run"""
+    stats = prompt_stats.summary()
+    if not stats["rows"]:
+        return
+
+    print(
+        f"Summary prompts: {stats['rows']} rows, {stats['prompt_tokens']} tokens sent "
+        f"({stats['tokens_saved']} saved by the {prompt_token_budget()}-token budget, "
+        f"{stats['truncated_rows']} rows shortened), "
+        f"median {stats['p50_prompt_tokens']}, p95 {stats['p95_prompt_tokens']} tokens per prompt"
+    )
@@ -0,0 +1,403 @@
+"""
+Caches for the email finder
+
+LRUCache is a bounded, thread-safe in-memory cache. Entries expire after a
+TTL, the least recently used entry is evicted once the cache is full, and
+concurrent misses on the same key share a single computation.
+
+PersistentCache keeps domain, MX and verification results in a small SQLite
+database so later runs do not repeat the same search, DNS and SMTP lookups.
+Every entry has its own expiry time, negative results (nothing found) get a
+shorter TTL than positive ones, and the oldest entries are evicted once the
+cache grows past its size limit.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("email_finder.cache")
+
+# Default location of the shared cache database
+DEFAULT_CACHE_PATH = ".email_finder_cache.sqlite"
+
+# Sentinel returned when a key is not cached (None is a valid cached value)
+MISSING = object()
+
+# Cache hits whose last_used times are written in one transaction
+TOUCH_BATCH = 100
+
+
+class Expiring:
+    """
+    Result of a get_or_compute() function that sets its own TTL
+
+    A ttl of 0 hands the value to the callers without caching it, e.g. for
+    an error that may be transient.
+    """
+
+    __slots__ = ("value", "ttl")
+
+    def __init__(self, value, ttl):
+        """
+        Args:
+            value: The computed value
+            ttl (float): Seconds the value stays cached, 0 to not cache it
+        """
+        self.value = value
+        self.ttl = ttl
+
+
+class _Flight:
+    """An in-progress computation that other callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class LRUCache:
+    """Bounded, thread-safe in-memory LRU cache with TTL and single-flight loading"""
+
+    def __init__(self, maxsize=10000, ttl=None):
+        """
+        Initialize the cache
+
+        Args:
+            maxsize (int): Maximum number of entries kept
+            ttl (float, optional): Seconds an entry stays valid (default: forever)
+        """
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl
+
+        self.lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._inflight = {}  # key -> _Flight
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        with self.lock:
+            return len(self._data)
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for key, or default if missing or expired"""
+        with self.lock:
+            return self._get_locked(key, default)
+
+    def set(self, key, value, ttl=None):
+        """Store a value (for ttl seconds, default: the cache's TTL), evicting the least recently used entry if full"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self.lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing it on a miss
+
+        If another thread is already computing the same key, wait for its
+        result instead of running compute() a second time. Exceptions raised
+        by compute() are not cached and are re-raised in every waiting caller.
+
+        Args:
+            key: Cache key
+            compute (callable): Called without arguments to produce the value,
+                may return an Expiring to choose how long it's cached
+
+        Returns:
+            The cached or freshly computed value
+        """
+        with self.lock:
+            value = self._get_locked(key, MISSING)
+            if value is not MISSING:
+                return value
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            result = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            if isinstance(result, Expiring):
+                flight.value = result.value
+                if result.ttl > 0:
+                    self.set(key, result.value, result.ttl)
+            else:
+                flight.value = result
+                self.set(key, result)
+        finally:
+            with self.lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+        return flight.value
+
+    def clear(self):
+        """Remove all entries"""
+        with self.lock:
+            self._data.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters"""
+        with self.lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced
+            }
+
+    def _get_locked(self, key, default):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+
+class PersistentCache:
+    """SQLite-backed key/value cache with per-entry TTLs"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=100000,
+                 default_ttl=30 * 24 * 3600, negative_ttl=24 * 3600):
+        """
+        Open (or create) the cache database
+
+        Args:
+            path (str): Path to the SQLite database file
+            max_entries (int): Number of entries kept before the least
+                recently used ones are evicted
+            default_ttl (float): Seconds a positive result stays valid
+            negative_ttl (float): Seconds a negative (None) result stays valid
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._writes_since_evict = 0
+        # (namespace, key) -> time of hits whose last_used isn't written yet
+        self._touched = {}
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT,"
+                " expires_at REAL NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+    def get(self, namespace, key, default=MISSING):
+        """
+        Look up a cached value
+
+        Args:
+            namespace (str): Kind of entry, e.g. "domain" or "mx"
+            key (str): Cache key within the namespace
+            default: Returned when the key is missing or expired
+
+        Returns:
+            The cached value (which may be None for a negative result) or default
+        """
+        now = time.time()
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = row
+            if expires_at <= now:
+                self.expirations += 1
+                self.misses += 1
+                with self.conn:
+                    self.conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                return default
+
+            # last_used only orders evictions, it's written with the next
+            # set() or every TOUCH_BATCH hits instead of committing per read
+            self.hits += 1
+            self._touched[(namespace, key)] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                with self.conn:
+                    self._write_touched()
+
+        return json.loads(value)
+
+    def set(self, namespace, key, value, ttl=None):
+        """
+        Store a value
+
+        Args:
+            namespace (str): Kind of entry, e.g. "domain" or "mx"
+            key (str): Cache key within the namespace
+            value: JSON-serializable value; None marks a negative result
+            ttl (float, optional): Seconds until the entry expires (default:
+                default_ttl, or negative_ttl when value is None)
+        """
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.default_ttl
+
+        now = time.time()
+
+        with self.lock:
+            with self.conn:
+                self._write_touched()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value), now + ttl, now)
+                )
+
+            # Counting rows on every write is wasteful, check now and then
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 100:
+                self._writes_since_evict = 0
+                self._evict(now)
+
+    def items(self, namespace):
+        """
+        Return every unexpired entry of a namespace
+
+        Args:
+            namespace (str): Kind of entry, e.g. "domain"
+
+        Returns:
+            list: (key, value) pairs
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, value FROM entries WHERE namespace = ? AND expires_at > ?",
+                (namespace, time.time())
+            ).fetchall()
+
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def stats(self):
+        """Return hit/miss/eviction counters"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions
+            }
+
+    def close(self):
+        """Write the pending last_used times and close the database connection"""
+        with self.lock:
+            if self._touched:
+                with self.conn:
+                    self._write_touched()
+            self.conn.close()
+
+    def _write_touched(self):
+        """Write the last_used times of recent hits, in the caller's transaction"""
+        if not self._touched:
+            return
+        self.conn.executemany(
+            "UPDATE entries SET last_used = ? WHERE namespace = ? AND key = ?",
+            [(used, namespace, key) for (namespace, key), used in self._touched.items()]
+        )
+        self._touched = {}
+
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        with self.conn:
+            self.expirations += self.conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+
+            count = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if count <= self.max_entries:
+                return
+
+            # Evict down to 90% of the limit so we don't evict on every write
+            excess = count - int(self.max_entries * 0.9)
+            self.evictions += self.conn.execute(
+                "DELETE FROM entries WHERE rowid IN"
+                " (SELECT rowid FROM entries ORDER BY last_used LIMIT ?)",
+                (excess,)
+            ).rowcount
+
+        logger.debug(f"Evicted {excess} entries from {self.path}")
+
+
+def open_default_cache():
+    """
+    Open the persistent cache shared by the email finder scripts
+
+    The location comes from EMAIL_FINDER_CACHE (set it to "off" to disable
+    the cache) and the size limit from EMAIL_FINDER_CACHE_MAX_ENTRIES.
+
+    Returns:
+        PersistentCache: The shared cache, or None if disabled or unavailable
+    """
+    path = os.getenv("EMAIL_FINDER_CACHE", DEFAULT_CACHE_PATH)
+    if not path or path.lower() == "off":
+        return None
+
+    try:
+        return PersistentCache(
+            path,
+            max_entries=int(os.getenv("EMAIL_FINDER_CACHE_MAX_ENTRIES", "100000"))
+        )
+    except sqlite3.Error as e:
+        logger.warning(f"Persistent cache disabled, could not open {path}: {str(e)}")
+        return None
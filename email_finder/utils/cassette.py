@@ -0,0 +1,610 @@
+"""
+Record/replay of the network calls the tools make
+
+A cassette is a JSON lines file of recorded interactions. While one is
+active, the calls the pipelines make to the outside world are intercepted:
+
+    http    requests (search pages, Hunter, email validation, tiktoken data)
+    openai  httpx, which the OpenAI SDK sends its requests through
+    dns     dns.resolver.resolve (MX lookups)
+    smtp    smtplib.SMTP connections and RCPT checks
+
+In record mode the real call is made and its response (or error) and
+latency are appended to the cassette. In replay mode the recorded response
+is served without touching the network, after an optional injected delay,
+so a run over the same input is repeatable and works offline. Requests are
+matched by method, URL and a hash of the body; a request made several times
+gets its recordings in order, the last one repeating. A request that was
+never recorded fails the way it would without a network connection.
+
+API keys in query strings are redacted before anything is written, and
+request headers are never recorded.
+
+Configuration comes from the environment:
+    CASSETTE            Cassette file (unset: nothing is intercepted)
+    CASSETTE_MODE       record or replay (default: replay)
+    CASSETTE_LATENCY    Delay of every replayed call: seconds, or "recorded"
+                        for the latency measured while recording (default: 0)
+
+Replayed runs are only repeatable if the local caches don't answer first,
+so set EMAIL_FINDER_CACHE=off and SUMMARY_CACHE=off alongside CASSETTE. The
+tools' own rate limits still apply while replaying; raise them (e.g.
+MAX_EMAIL_CHECKS_PER_MINUTE) to time the pipeline rather than the pacing.
+"""
+
+import os
+import json
+import time
+import atexit
+import base64
+import asyncio
+import hashlib
+import logging
+import importlib
+import smtplib
+import builtins
+import threading
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from email_finder.utils.lazy import lazy_import
+
+requests = lazy_import("requests")
+dns_exception = lazy_import("dns.exception")
+dns_rdata = lazy_import("dns.rdata")
+dns_rdataclass = lazy_import("dns.rdataclass")
+dns_rdatatype = lazy_import("dns.rdatatype")
+dns_resolver = lazy_import("dns.resolver")
+
+# Optional dependency, only the OpenAI SDK needs it
+httpx = lazy_import("httpx", optional=True)
+
+logger = logging.getLogger("email_finder.cassette")
+
+MODES = ("record", "replay")
+
+# Query parameters whose values never go into a cassette
+REDACTED_PARAMS = {"api_key", "apikey", "key", "token", "access_token", "secret"}
+
+# Response headers that no longer apply to the decoded body, or identify a session
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie", "connection"}
+
+_active = None
+_active_lock = threading.Lock()
+
+
+class CassetteMiss(Exception):
+    """No recording of a request in replay mode"""
+
+
+def redact_url(url):
+    """URL with the values of credential query parameters replaced"""
+    parts = urlsplit(str(url))
+    if not parts.query:
+        return str(url)
+
+    query = [
+        (name, "REDACTED" if name.lower() in REDACTED_PARAMS else value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def body_hash(body):
+    """Short hash of a request body (str, bytes or None)"""
+    if not body:
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def encode_body(content):
+    """JSON-safe form of a response body"""
+    try:
+        return {"body": content.decode("utf-8"), "encoding": "utf-8"}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(content).decode("ascii"), "encoding": "base64"}
+
+
+def decode_body(recording):
+    """Response body bytes from encode_body()'s form"""
+    if recording.get("encoding") == "base64":
+        return base64.b64decode(recording["body"])
+    return recording.get("body", "").encode("utf-8")
+
+
+def kept_headers(headers):
+    """Response headers worth recording"""
+    return {name: value for name, value in headers.items() if name.lower() not in DROPPED_HEADERS}
+
+
+def rebuild_error(recording, *namespaces):
+    """
+    Exception recorded for an interaction
+
+    Args:
+        recording (dict): Interaction with "error" (class name) and "message"
+        *namespaces: Modules searched for the exception class, builtins last
+
+    Returns:
+        Exception: Instance of the recorded class, or OSError if it can't be built
+    """
+    message = recording.get("message", "")
+    for namespace in namespaces + (builtins,):
+        error_class = getattr(namespace, recording["error"], None)
+        if isinstance(error_class, type) and issubclass(error_class, BaseException):
+            try:
+                return error_class(message)
+            except TypeError:
+                break
+    return OSError(f"{recording['error']}: {message}")
+
+
+class CassetteAnswer(list):
+    """Replayed DNS answer: its records, plus the rrset (for the TTL)"""
+
+    def __init__(self, records, ttl):
+        super().__init__(records)
+        self.rrset = type("CassetteRRset", (), {"ttl": ttl})()
+
+
+class Cassette:
+    """Records or replays the network calls made while it is installed"""
+
+    def __init__(self, path, mode="replay", latency=0.0):
+        """
+        Open a cassette
+
+        Args:
+            path (str): Cassette file (JSON lines, appended to when recording)
+            mode (str): "record" or "replay"
+            latency (float or str): Seconds every replayed call takes, or
+                "recorded" for the latency measured while recording
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {', '.join(MODES)}")
+
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+
+        self.lock = threading.Lock()
+        self.recordings = {}  # (kind, key) -> list of interactions
+        self.positions = {}  # (kind, key) -> next recording to replay
+        self.counts = {"recorded": 0, "replayed": 0, "missed": 0}
+        self._originals = {}
+        self._handle = None
+
+        if mode == "replay":
+            self._load()
+        else:
+            self._handle = open(path, "a", encoding="utf-8", buffering=1)
+
+    def _load(self):
+        """Read the recorded interactions"""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette {self.path} not found, record it first with CASSETTE_MODE=record")
+
+        with open(self.path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    interaction = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping unreadable line {number} of cassette {self.path}")
+                    continue
+                self.recordings.setdefault((interaction["kind"], interaction["key"]), []).append(interaction)
+
+    def __len__(self):
+        return sum(len(interactions) for interactions in self.recordings.values())
+
+    # -- Recording and lookup ---------------------------------------------
+
+    def record(self, kind, key, latency, response=None, error=None, **details):
+        """
+        Append one interaction to the cassette
+
+        Args:
+            kind (str): http, openai, dns or smtp
+            key (str): What replay matches the request by
+            latency (float): Seconds the real call took
+            response (dict, optional): Recorded response
+            error (Exception, optional): Error the call failed with
+            **details: Extra fields kept for people reading the cassette
+        """
+        interaction = dict(details, kind=kind, key=key, latency=round(latency, 4))
+        if error is not None:
+            interaction.update(error=type(error).__name__, message=str(error))
+        else:
+            interaction["response"] = response
+
+        line = json.dumps(interaction, ensure_ascii=False) + "\n"
+        with self.lock:
+            if self._handle is not None and not self._handle.closed:
+                self._handle.write(line)
+                self.counts["recorded"] += 1
+
+    def lookup(self, kind, key):
+        """
+        Next recorded interaction for a request
+
+        Raises:
+            CassetteMiss: When the request was never recorded
+        """
+        with self.lock:
+            interactions = self.recordings.get((kind, key))
+            if not interactions:
+                self.counts["missed"] += 1
+                raise CassetteMiss(f"No recorded {kind} response for {key}")
+
+            position = self.positions.get((kind, key), 0)
+            self.positions[(kind, key)] = position + 1
+            self.counts["replayed"] += 1
+            return interactions[min(position, len(interactions) - 1)]
+
+    def delay(self, interaction):
+        """Seconds a replayed interaction should take"""
+        if self.latency == "recorded":
+            return interaction.get("latency", 0.0)
+        return float(self.latency or 0.0)
+
+    # -- Installation -----------------------------------------------------
+
+    def install(self):
+        """Start intercepting network calls"""
+        cassette = self
+
+        # Plain functions, so the patched classes bind their instance as usual
+        def requests_send(session, request, **kwargs):
+            return cassette._requests_send(session, request, **kwargs)
+
+        def httpx_send(client, request, **kwargs):
+            return cassette._httpx_send(client, request, **kwargs)
+
+        async def httpx_send_async(client, request, **kwargs):
+            return await cassette._httpx_send_async(client, request, **kwargs)
+
+        self._patch(requests.Session, "send", requests_send)
+        # The real module, not its lazy stand-in, is patched
+        self._patch(importlib.import_module("dns.resolver"), "resolve", self._dns_resolve)
+        self._patch(smtplib, "SMTP", self._smtp_class())
+        if httpx is not None:
+            self._patch(httpx.Client, "send", httpx_send)
+            self._patch(httpx.AsyncClient, "send", httpx_send_async)
+        return self
+
+    def uninstall(self):
+        """Stop intercepting and restore the real network calls"""
+        for (owner, name), original in self._originals.items():
+            setattr(owner, name, original)
+        self._originals = {}
+
+    def close(self):
+        """Uninstall and close the cassette file"""
+        self.uninstall()
+        with self.lock:
+            if self._handle is not None:
+                self._handle.close()
+
+    def stats(self):
+        """Return the recorded/replayed/missed counters"""
+        with self.lock:
+            return dict(self.counts)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _patch(self, owner, name, replacement):
+        self._originals[(owner, name)] = getattr(owner, name)
+        setattr(owner, name, replacement)
+
+    def _original(self, owner, name):
+        return self._originals[(owner, name)]
+
+    # -- requests ---------------------------------------------------------
+
+    def _requests_send(self, session, request, **kwargs):
+        key = f"{request.method} {redact_url(request.url)} {body_hash(request.body)}".rstrip()
+
+        if self.mode == "replay":
+            try:
+                interaction = self.lookup("http", key)
+            except CassetteMiss as e:
+                raise requests.ConnectionError(str(e), request=request)
+
+            time.sleep(self.delay(interaction))
+            if "error" in interaction:
+                raise rebuild_error(interaction, requests.exceptions)
+
+            recorded = interaction["response"]
+            response = requests.Response()
+            response.status_code = recorded["status"]
+            response.reason = recorded.get("reason")
+            response.headers = requests.structures.CaseInsensitiveDict(recorded["headers"])
+            response._content = decode_body(recorded)
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            response.url = request.url
+            response.request = request
+            response.elapsed = timedelta(seconds=interaction.get("latency", 0.0))
+            return response
+
+        send = self._original(requests.Session, "send")
+        start = time.monotonic()
+        try:
+            response = send(session, request, **kwargs)
+            content = response.content
+        except Exception as e:
+            self.record("http", key, time.monotonic() - start, error=e)
+            raise
+
+        recorded = dict(
+            encode_body(content),
+            status=response.status_code,
+            reason=response.reason,
+            headers=kept_headers(response.headers)
+        )
+        self.record("http", key, time.monotonic() - start, recorded)
+        return response
+
+    # -- httpx (OpenAI SDK) -----------------------------------------------
+
+    def _httpx_key(self, request):
+        return f"{request.method} {redact_url(request.url)} {body_hash(request.content)}".rstrip()
+
+    def _httpx_replay(self, request, interaction):
+        if "error" in interaction:
+            return rebuild_error(interaction, httpx)
+
+        recorded = interaction["response"]
+        return httpx.Response(
+            recorded["status"],
+            headers=recorded["headers"],
+            content=decode_body(recorded),
+            request=request
+        )
+
+    def _httpx_recording(self, response):
+        return dict(encode_body(response.content), status=response.status_code,
+                    headers=kept_headers(response.headers))
+
+    def _httpx_send(self, client, request, **kwargs):
+        key = self._httpx_key(request)
+
+        if self.mode == "replay":
+            try:
+                interaction = self.lookup("openai", key)
+            except CassetteMiss as e:
+                raise httpx.ConnectError(str(e), request=request)
+
+            time.sleep(self.delay(interaction))
+            result = self._httpx_replay(request, interaction)
+            if isinstance(result, BaseException):
+                raise result
+            return result
+
+        send = self._original(httpx.Client, "send")
+        start = time.monotonic()
+        try:
+            response = send(client, request, **kwargs)
+            response.read()
+        except Exception as e:
+            self.record("openai", key, time.monotonic() - start, error=e)
+            raise
+
+        self.record("openai", key, time.monotonic() - start, self._httpx_recording(response))
+        return response
+
+    async def _httpx_send_async(self, client, request, **kwargs):
+        key = self._httpx_key(request)
+
+        if self.mode == "replay":
+            try:
+                interaction = self.lookup("openai", key)
+            except CassetteMiss as e:
+                raise httpx.ConnectError(str(e), request=request)
+
+            await asyncio.sleep(self.delay(interaction))
+            result = self._httpx_replay(request, interaction)
+            if isinstance(result, BaseException):
+                raise result
+            return result
+
+        send = self._original(httpx.AsyncClient, "send")
+        start = time.monotonic()
+        try:
+            response = await send(client, request, **kwargs)
+            await response.aread()
+        except Exception as e:
+            self.record("openai", key, time.monotonic() - start, error=e)
+            raise
+
+        self.record("openai", key, time.monotonic() - start, self._httpx_recording(response))
+        return response
+
+    # -- DNS --------------------------------------------------------------
+
+    def _dns_resolve(self, qname, rdtype="A", *args, **kwargs):
+        rdtype_name = rdtype if isinstance(rdtype, str) else dns_rdatatype.to_text(rdtype)
+        key = f"{str(qname).rstrip('.').lower()} {rdtype_name.upper()}"
+
+        if self.mode == "replay":
+            try:
+                interaction = self.lookup("dns", key)
+            except CassetteMiss as e:
+                raise dns_resolver.NoNameservers(str(e))
+
+            time.sleep(self.delay(interaction))
+            if "error" in interaction:
+                raise rebuild_error(interaction, dns_resolver, dns_exception)
+
+            recorded = interaction["response"]
+            records = [
+                dns_rdata.from_text(dns_rdataclass.IN, dns_rdatatype.from_text(rdtype_name), text)
+                for text in recorded["records"]
+            ]
+            return CassetteAnswer(records, recorded["ttl"])
+
+        resolve = self._original(importlib.import_module("dns.resolver"), "resolve")
+        start = time.monotonic()
+        try:
+            answer = resolve(qname, rdtype, *args, **kwargs)
+        except Exception as e:
+            self.record("dns", key, time.monotonic() - start, error=e)
+            raise
+
+        recorded = {"records": [record.to_text() for record in answer], "ttl": answer.rrset.ttl}
+        self.record("dns", key, time.monotonic() - start, recorded)
+        return answer
+
+    # -- SMTP -------------------------------------------------------------
+
+    def _smtp_class(self):
+        """SMTP class that records, or one that replays without connecting"""
+        cassette = self
+
+        if self.mode == "record":
+            class RecordingSMTP(smtplib.SMTP):
+                def connect(self, host="localhost", port=0, source_address=None):
+                    self._cassette_host = host
+                    key = f"connect {host}"
+                    start = time.monotonic()
+                    try:
+                        code, message = super().connect(host, port, source_address)
+                    except Exception as e:
+                        cassette.record("smtp", key, time.monotonic() - start, error=e)
+                        raise
+                    cassette.record("smtp", key, time.monotonic() - start,
+                                    [code, message.decode("utf-8", "replace")])
+                    return code, message
+
+                def rcpt(self, recip, options=()):
+                    key = f"rcpt {getattr(self, '_cassette_host', '')} {recip}"
+                    start = time.monotonic()
+                    try:
+                        code, message = super().rcpt(recip, options)
+                    except Exception as e:
+                        cassette.record("smtp", key, time.monotonic() - start, error=e)
+                        raise
+                    cassette.record("smtp", key, time.monotonic() - start,
+                                    [code, message.decode("utf-8", "replace")])
+                    return code, message
+
+            return RecordingSMTP
+
+        class ReplaySMTP:
+            """Serves a recorded SMTP session; only the greeting and RCPT replies vary"""
+
+            def __init__(self, host="", port=0, local_hostname=None, timeout=None, source_address=None):
+                self.host = None
+                if host:
+                    self.connect(host, port)
+
+            def _reply(self, key, fallback_error):
+                try:
+                    interaction = cassette.lookup("smtp", key)
+                except CassetteMiss as e:
+                    raise fallback_error(str(e))
+
+                time.sleep(cassette.delay(interaction))
+                if "error" in interaction:
+                    raise rebuild_error(interaction, smtplib)
+                code, message = interaction["response"]
+                return code, message.encode("utf-8")
+
+            def connect(self, host="localhost", port=0, source_address=None):
+                reply = self._reply(f"connect {host}", ConnectionRefusedError)
+                self.host = host
+                return reply
+
+            def rcpt(self, recip, options=()):
+                return self._reply(f"rcpt {self.host} {recip}", smtplib.SMTPServerDisconnected)
+
+            def set_debuglevel(self, debuglevel):
+                pass
+
+            def has_extn(self, opt):
+                return False
+
+            def helo(self, name=""):
+                return 250, b"OK"
+
+            def ehlo(self, name=""):
+                return 250, b"OK"
+
+            def starttls(self, *args, **kwargs):
+                return 220, b"Ready to start TLS"
+
+            def mail(self, sender, options=()):
+                return 250, b"OK"
+
+            def quit(self):
+                return 221, b"Bye"
+
+            def close(self):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                self.quit()
+
+        return ReplaySMTP
+
+
+def active_cassette():
+    """The cassette installed by open_cassette(), if any"""
+    return _active
+
+
+def open_cassette():
+    """
+    Install the cassette configured by CASSETTE/CASSETTE_MODE/CASSETTE_LATENCY
+
+    Does nothing when CASSETTE is unset or a cassette is already installed.
+    The cassette is closed and its counters printed when the process exits.
+
+    Returns:
+        Cassette: The installed cassette, or None
+    """
+    global _active
+
+    path = os.getenv("CASSETTE")
+    if not path:
+        return None
+
+    mode = os.getenv("CASSETTE_MODE", "replay").lower()
+    latency = os.getenv("CASSETTE_LATENCY", "0").lower()
+    if latency != "recorded":
+        latency = float(latency or 0)
+
+    with _active_lock:
+        if _active is None:
+            _active = Cassette(path, mode, latency).install()
+            atexit.register(close_cassette)
+            print(f"Cassette {mode}: {path}" + (f" ({len(_active)} recorded calls)" if mode == "replay" else ""))
+
+    return _active
+
+
+def close_cassette():
+    """Close the cassette installed by open_cassette() and print what it did"""
+    global _active
+
+    with _active_lock:
+        cassette, _active = _active, None
+
+    if cassette is None:
+        return
+
+    cassette.close()
+    counts = cassette.stats()
+    if cassette.mode == "record":
+        print(f"Cassette: {counts['recorded']} calls recorded to {cassette.path}")
+    else:
+        print(f"Cassette: {counts['replayed']} calls replayed, {counts['missed']} not recorded")
@@ -0,0 +1,830 @@
+"""
+CSV checkpoint helpers shared by the scraper, email finder and connector
+
+Instead of rewriting the whole output CSV after every processed row, each
+result is appended to a journal file that sits next to the output CSV. Every
+journal line carries a CRC32 checksum so a line torn by a crash is detected
+and ignored on replay. The journal is fsynced in groups and compacted into
+the final CSV with an atomic rename at batch end or on shutdown. Outputs
+named .parquet or .feather are written in that format instead (see
+table_io).
+
+Large lead files can also be streamed chunk by chunk, and single rows can be
+read through a byte-offset index without parsing the whole file.
+
+select_pending_rows() works out which rows still need work with vectorized
+masks, so the processing loops only visit those rows.
+
+A journal can also be given a LeadStore (see lead_store): every value it
+journals is then written to the store under the row's LinkedIn URL too, and
+committed whenever the journal syncs. Given a ResumeState (see resume), it
+records each journaled row as finished once the journal is on disk. Each
+record carries the row's identity too, so a journal replays onto the right
+rows even when the input was reordered before the restart.
+
+With worker threads, a ResultWriter owns the DataFrame and its journal:
+workers only queue their results, and one writer thread applies them and
+fsyncs the journal when enough results have piled up or enough time has
+passed. The output itself is only rewritten when the journal is closed, so
+a large file isn't rewritten over and over while it is being processed.
+"""
+
+import os
+import csv
+import io
+import json
+import zlib
+import atexit
+import time
+import signal
+import sqlite3
+import logging
+import threading
+from array import array
+from itertools import islice
+from queue import Queue, Empty
+
+from email_finder.utils.dtypes import make_assignable
+from email_finder.utils.lazy import lazy_import
+from email_finder.utils.table_io import (
+    TablePartWriter,
+    is_columnar,
+    iter_table_chunks,
+    read_columns,
+    write_table
+)
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger("email_finder.csv_handler")
+
+
+def _json_default(value):
+    """Convert numpy/pandas scalars to plain Python values for JSON"""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def filled_mask(values):
+    """Boolean mask of cells in a Series that hold a non-blank value"""
+    return values.notna() & (values.astype(str).str.strip() != "")
+
+
+def select_pending_rows(df, key_column, done_columns, start_row=0, done_rows=None):
+    """
+    Find the rows that still need processing
+
+    A row is pending when its label is at least start_row, key_column (if
+    given) has a value, none of done_columns has one and done_rows doesn't
+    mark it. Everything is computed with column-wide masks instead of per-row
+    lookups.
+
+    Args:
+        df (DataFrame): Rows to check
+        key_column (str): Column a row needs to be processable, or None
+        done_columns (list): Columns that mark a row as already done
+        start_row (int): Rows labelled below this are skipped
+        done_rows (array, optional): Boolean mask of rows known to be
+            finished, e.g. from ResumeState.done_mask()
+
+    Returns:
+        tuple: (array of pending row positions, dict with total, before_start,
+                missing_key, done and pending row counts)
+    """
+    total = len(df)
+    in_range = np.asarray(df.index) >= start_row
+
+    if key_column is None:
+        has_key = np.ones(total, dtype=bool)
+    else:
+        has_key = filled_mask(df[key_column]).to_numpy(dtype=bool)
+
+    done = np.zeros(total, dtype=bool)
+    for column in done_columns:
+        if column in df.columns:
+            done |= filled_mask(df[column]).to_numpy(dtype=bool)
+    if done_rows is not None:
+        done |= np.asarray(done_rows, dtype=bool)
+
+    pending = in_range & has_key & ~done
+    counts = {
+        "total": total,
+        "before_start": int((~in_range).sum()),
+        "missing_key": int((in_range & ~has_key).sum()),
+        "done": int((in_range & has_key & done).sum()),
+        "pending": int(pending.sum())
+    }
+
+    return np.flatnonzero(pending), counts
+
+
+def describe_pending(counts, missing_label, done_label):
+    """One-line description of select_pending_rows() counts"""
+    skipped = [
+        f"{count} {label}"
+        for count, label in (
+            (counts["before_start"], "before the start row"),
+            (counts["missing_key"], missing_label),
+            (counts["done"], done_label)
+        )
+        if count
+    ]
+
+    description = f"{counts['pending']} of {counts['total']} rows pending"
+    if skipped:
+        description += f" (skipping {', '.join(skipped)})"
+    return description
+
+
+# Marks an identity that hasn't been worked out yet (None means the row has none)
+_UNKNOWN = object()
+
+
+def _row_identity(df, row):
+    # resume imports this module, so it can't be imported at the top
+    from email_finder.utils.resume import identity_of_row
+    return identity_of_row(df, row)
+
+
+def _identity_labels(df):
+    """Row identity -> label of the first row with it"""
+    from email_finder.utils.resume import row_identities
+    labels = {}
+    for label, identity in row_identities(df).items():
+        if identity is not None:
+            labels.setdefault(identity, label)
+    return labels
+
+
+class CheckpointJournal:
+    """Append-only journal of per-row results for one output CSV"""
+
+    def __init__(self, output_file, df, fsync_every=20, journal_file=None, base_file=None, store=None,
+                 store_key="LinkedIn Profile", state=None):
+        """
+        Initialize the journal
+
+        Args:
+            output_file (str): Path to the file the journal compacts into
+                (CSV, Parquet or Feather by extension), or None if the caller
+                persists the DataFrame itself
+            df (DataFrame): DataFrame the journaled values are applied to
+            fsync_every (int): Number of records to group into one fsync
+            journal_file (str, optional): Path to the journal file
+                (default: output_file + ".journal")
+            base_file (str, optional): Input file df was read from with only
+                some of its columns; the others are copied from it on compaction
+            store (LeadStore, optional): Pipeline store that also receives
+                every journaled value
+            store_key (str): Column holding the LinkedIn URL a row is stored under
+            state (ResumeState, optional): Resume state that records every
+                journaled row as finished
+        """
+        self.output_file = output_file
+        self.journal_file = journal_file or f"{output_file}.journal"
+        self.base_file = base_file
+        self.df = df
+        self.store = store if store is not None and store_key in df.columns else None
+        self.store_key = store_key
+        self.state = state
+        self.fsync_every = max(1, int(fsync_every))
+
+        self.lock = threading.RLock()
+        self.unsynced = 0
+        self.records_written = 0
+        self.closed = False
+
+        self._handle = open(self.journal_file, "a", encoding="utf-8")
+
+        # Compact whatever is left if the process exits without close()
+        atexit.register(self.close)
+        _install_sigterm_handler()
+
+    def replay(self):
+        """
+        Apply records left behind by an earlier, interrupted run
+
+        Replay stops at the first line whose checksum does not match, since
+        only the tail of the journal can be torn by a crash. The torn tail is
+        cut off so new records are appended after the last good one.
+
+        Records are matched to rows by the row identity they carry (see
+        resume), so results land on the right leads even if the input was
+        reordered or grew rows before the restart. Records of leads that are
+        no longer in the input are dropped.
+
+        Returns:
+            int: Number of records applied to the DataFrame
+        """
+        applied = 0
+        moved = 0
+        dropped = 0
+        good_offset = 0
+        labels = None  # identity -> row label, built when the first record has moved
+
+        with self.lock:
+            if not os.path.exists(self.journal_file):
+                return 0
+
+            with open(self.journal_file, "rb") as f:
+                for line_number, line in enumerate(f, 1):
+                    record = self._decode(line)
+                    if record is None:
+                        logger.warning(f"Ignoring corrupt journal tail at line {line_number} of {self.journal_file}")
+                        self._handle.truncate(good_offset)
+                        break
+
+                    good_offset += len(line)
+                    row = record["row"]
+                    identity = record.get("id", _UNKNOWN)  # missing in journals of older versions
+                    moved_row = identity is not _UNKNOWN and (
+                        row not in self.df.index or _row_identity(self.df, row) != identity
+                    )
+                    if moved_row:
+                        if labels is None:
+                            labels = _identity_labels(self.df)
+                        row = labels.get(identity) if identity is not None else None
+                        if row is None:
+                            dropped += 1
+                            continue
+                        moved += 1
+                    elif row not in self.df.index:
+                        continue
+
+                    self._set_values(row, record["values"])
+                    self._store_values(row, record["values"])
+                    if self.state is not None:
+                        self.state.mark_row(self.df, row, record["values"])
+                    applied += 1
+
+            self._commit_store()
+            if self.state is not None:
+                self.state.sync()
+
+        if moved or dropped:
+            logger.info(f"Input changed since {self.journal_file} was written: {moved} journaled rows moved, "
+                        f"{dropped} no longer in the input")
+        return applied
+
+    def apply(self, row, values):
+        """
+        Update a row of the DataFrame and journal the new values
+
+        Args:
+            row: Index label of the row in the DataFrame
+            values (dict): Column name to new value
+        """
+        with self.lock:
+            self._set_values(row, values)
+            self._store_values(row, values)
+            identity = _row_identity(self.df, row)
+            if self.state is not None:
+                self.state.mark(identity, values)
+            self.record(row, values, identity)
+
+    def record(self, row, values, identity=_UNKNOWN):
+        """
+        Append a record to the journal without touching the DataFrame
+
+        Args:
+            row: Index label of the row in the DataFrame
+            values (dict): Column name to new value
+            identity (str, optional): The row's identity, when the caller has it already
+        """
+        if identity is _UNKNOWN:
+            identity = _row_identity(self.df, row) if row in self.df.index else None
+        payload = json.dumps({"row": row, "id": identity, "values": values}, default=_json_default,
+                             ensure_ascii=False)
+        checksum = zlib.crc32(payload.encode("utf-8"))
+
+        with self.lock:
+            self._handle.write(f"{checksum:08x}\t{payload}\n")
+            self.records_written += 1
+            self.unsynced += 1
+
+            if self.unsynced >= self.fsync_every:
+                self.sync()
+
+    def sync(self):
+        """Flush buffered journal records to disk"""
+        with self.lock:
+            if self.closed or not self.unsynced:
+                return
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self.unsynced = 0
+            self._commit_store()
+
+            # Only now is every row the state is about to list on disk
+            if self.state is not None:
+                self.state.sync()
+
+    def compact(self):
+        """Write the DataFrame to the output file atomically and reset the journal"""
+        with self.lock:
+            if self.closed:
+                return
+            self.sync()
+
+            # Without an output file the journal is the only copy, keep it
+            if not self.output_file:
+                return
+
+            write_table(self.df, self.output_file, self.base_file)
+
+            # Everything in the journal is now in the output file
+            self._handle.seek(0)
+            self._handle.truncate()
+
+    def close(self):
+        """Compact the journal into the output CSV and remove it"""
+        with self.lock:
+            if self.closed:
+                return
+            self.compact()
+            self._handle.close()
+            self.closed = True
+
+            if self.output_file and os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+
+        atexit.unregister(self.close)
+
+    def discard(self):
+        """Close the journal and delete it once its rows are persisted elsewhere"""
+        with self.lock:
+            if not self.closed:
+                self._commit_store()
+                self._handle.close()
+                self.closed = True
+
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+
+        atexit.unregister(self.close)
+
+    def _set_values(self, row, values):
+        try:
+            for column, value in values.items():
+                self.df.at[row, column] = value
+        except (TypeError, ValueError):
+            # A value the column's dtype can't hold (a new category, a fraction
+            # in an Int16 column, ...): widen the columns and write the whole
+            # row again, so it isn't left half written
+            for column, value in values.items():
+                make_assignable(self.df, column, value)
+            for column, value in values.items():
+                self.df.at[row, column] = value
+
+    def _store_values(self, row, values):
+        if self.store is None:
+            return
+        try:
+            self.store.update(self.df.at[row, self.store_key], values)
+        except sqlite3.Error as e:
+            # The journal and output file still have the value, don't stop the run
+            logger.warning(f"Could not write row {row} to the lead store: {str(e)}")
+
+    def _commit_store(self):
+        if self.store is None:
+            return
+        try:
+            self.store.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not commit the lead store: {str(e)}")
+
+    @staticmethod
+    def _decode(line):
+        """Return the decoded record, or None if the line is torn or corrupt"""
+        if not line.endswith(b"\n"):
+            return None
+
+        checksum, sep, payload = line[:-1].partition(b"\t")
+        if not sep:
+            return None
+
+        try:
+            if int(checksum, 16) != zlib.crc32(payload):
+                return None
+            return json.loads(payload.decode("utf-8"))
+        except ValueError:
+            return None
+
+
+class ResultWriter:
+    """Single writer thread that owns a DataFrame and its checkpoint journal"""
+
+    _STOP = object()
+
+    def __init__(self, journal, flush_rows=50, flush_interval=30.0, drain_limit=500):
+        """
+        Initialize the writer
+
+        Args:
+            journal (CheckpointJournal): Journal (and DataFrame) the results go to
+            flush_rows (int): Fsync the journal after this many results
+            flush_interval (float): Fsync the journal at least this often
+                (seconds) while results are arriving
+            drain_limit (int): Most queued results applied in one go
+        """
+        self.journal = journal
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval = flush_interval
+        self.drain_limit = max(1, int(drain_limit))
+
+        self.queue = Queue()
+        self.thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+
+        self.applied = 0
+        self.flushes = 0
+        self.error = None
+
+    def start(self):
+        """Start the writer thread"""
+        self.thread.start()
+        return self
+
+    def submit(self, row, values):
+        """
+        Queue a result for the writer (safe to call from any thread)
+
+        Args:
+            row: Index label of the row in the DataFrame
+            values (dict): Column name to new value
+        """
+        self.queue.put((row, values))
+
+    def flush(self):
+        """Block until every queued result is applied and its journal record is on disk"""
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Apply and fsync the remaining results and stop the writer thread"""
+        if self.thread.is_alive():
+            self.queue.put(self._STOP)
+            self.thread.join()
+
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _run(self):
+        unflushed = 0
+        last_flush = time.monotonic()
+
+        while True:
+            timeout = None
+            if unflushed:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+
+            try:
+                items = [self.queue.get(timeout=timeout)]
+            except Empty:
+                items = []
+
+            # Take whatever else is already waiting so it's applied as one batch
+            while len(items) < self.drain_limit:
+                try:
+                    items.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            stop = False
+            waiters = []
+            for item in items:
+                if item is self._STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    try:
+                        self.journal.apply(*item)
+                        self.applied += 1
+                        unflushed += 1
+                    except Exception as e:
+                        logger.error(f"Could not apply result for row {item[0]}: {str(e)}")
+                        self.error = self.error or e
+
+            due = unflushed and (
+                unflushed >= self.flush_rows
+                or time.monotonic() - last_flush >= self.flush_interval
+            )
+            if due or waiters or (stop and unflushed):
+                try:
+                    # Only fsync, the journal survives a crash; rewriting the
+                    # output is left to journal.close()
+                    self.journal.sync()
+                    self.flushes += 1
+                except Exception as e:
+                    logger.error(f"Could not flush results: {str(e)}")
+                    self.error = self.error or e
+                unflushed = 0
+                last_flush = time.monotonic()
+
+            for waiter in waiters:
+                waiter.set()
+
+            if stop:
+                return
+
+
+def _install_sigterm_handler():
+    """Turn SIGTERM into a normal exit so atexit compaction runs"""
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    try:
+        if signal.getsignal(signal.SIGTERM) is not signal.SIG_DFL:
+            return
+
+        def handle_sigterm(signum, frame):
+            raise SystemExit(128 + signum)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+    except (AttributeError, ValueError):
+        # Platform without SIGTERM or not allowed to install handlers
+        pass
+
+
+def _scan_record_offsets(path):
+    """
+    Find the byte offset where each CSV record starts
+
+    Quoted fields may contain newlines, so a line only starts a new record
+    when every quote seen so far is balanced. Blank lines are skipped the
+    same way pandas skips them.
+
+    Args:
+        path (str): Path to the CSV file
+
+    Returns:
+        array: Offsets of the header followed by every data row
+    """
+    offsets = array("Q")
+    offset = 0
+    in_quotes = False
+
+    with open(path, "rb") as f:
+        for line in f:
+            if not in_quotes and line.strip(b"\r\n"):
+                offsets.append(offset)
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            offset += len(line)
+
+    return offsets
+
+
+def count_csv_rows(path):
+    """Count data rows in a CSV file without parsing it into a DataFrame"""
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return 0
+    return max(0, len(_scan_record_offsets(path)) - 1)
+
+
+class CsvRowIndex:
+    """Byte-offset index for reading single rows of a large CSV file"""
+
+    OFFSET_SIZE = 8
+
+    def __init__(self, csv_file):
+        """
+        Open the index for a CSV file, building it if missing or stale
+
+        The index is stored next to the CSV as <csv_file>.rowidx and rebuilt
+        whenever the CSV's size or modification time changes.
+
+        Args:
+            csv_file (str): Path to the CSV file
+        """
+        self.csv_file = csv_file
+        self.index_file = f"{csv_file}.rowidx"
+
+        stat = os.stat(csv_file)
+        self.signature = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        if not self._load():
+            self._build()
+
+        self.columns = self._read_header()
+
+    def __len__(self):
+        return self.row_count
+
+    def read_row(self, row_number):
+        """
+        Read one data row
+
+        Args:
+            row_number (int): 0-based data row number
+
+        Returns:
+            dict: Column name to string value
+        """
+        if row_number < 0 or row_number >= self.row_count:
+            raise IndexError(f"Row {row_number} out of range (0-{self.row_count - 1})")
+
+        # Offsets of the row and the next record (or end of file)
+        with open(self.index_file, "rb") as f:
+            f.seek(self.data_start + (row_number + 1) * self.OFFSET_SIZE)
+            bounds = array("Q")
+            bounds.frombytes(f.read(2 * self.OFFSET_SIZE))
+
+        start = bounds[0]
+        end = bounds[1] if len(bounds) > 1 else self.signature["size"]
+
+        with open(self.csv_file, "rb") as f:
+            f.seek(start)
+            raw = f.read(end - start).decode("utf-8")
+
+        values = next(csv.reader(io.StringIO(raw)), [])
+        values += [""] * (len(self.columns) - len(values))
+        return dict(zip(self.columns, values))
+
+    def _read_header(self):
+        with open(self.index_file, "rb") as f:
+            f.seek(self.data_start)
+            bounds = array("Q")
+            bounds.frombytes(f.read(2 * self.OFFSET_SIZE))
+
+        end = bounds[1] if len(bounds) > 1 else self.signature["size"]
+        with open(self.csv_file, "rb") as f:
+            raw = f.read(end).decode("utf-8-sig")
+
+        return next(csv.reader(io.StringIO(raw)), [])
+
+    def _load(self):
+        """Load index metadata, returning False if the index is missing or stale"""
+        if not os.path.exists(self.index_file):
+            return False
+
+        try:
+            with open(self.index_file, "rb") as f:
+                meta_line = f.readline()
+            meta = json.loads(meta_line.decode("utf-8"))
+        except (OSError, ValueError):
+            return False
+
+        if meta.get("size") != self.signature["size"] or meta.get("mtime_ns") != self.signature["mtime_ns"]:
+            return False
+
+        self.data_start = len(meta_line)
+        self.row_count = meta["rows"]
+        return True
+
+    def _build(self):
+        offsets = _scan_record_offsets(self.csv_file)
+        if not offsets:
+            offsets.append(0)
+
+        meta = dict(self.signature, rows=len(offsets) - 1)
+        meta_line = (json.dumps(meta) + "\n").encode("utf-8")
+
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(meta_line)
+            f.write(offsets.tobytes())
+        os.replace(tmp_file, self.index_file)
+
+        self.data_start = len(meta_line)
+        self.row_count = meta["rows"]
+
+
+def _file_identities(paths, chunk_size):
+    """Row identities of the rows of some table files in order, None without identity columns"""
+    from email_finder.utils.resume import IDENTITY_COLUMNS, row_identities
+
+    for path in paths:
+        header = read_columns(path)
+        columns = [column for column in IDENTITY_COLUMNS if column in header]
+        if not columns:
+            return
+        for chunk in iter_table_chunks(path, chunk_size, columns=columns, dtype=str):
+            yield from row_identities(chunk)
+
+
+def check_partial_output(input_file, partial_files, done_rows, chunk_size=50000):
+    """
+    Check that the rows of a partial chunked output are the first rows of the input
+
+    Args:
+        input_file (str): Input of the chunked run
+        partial_files (list): Partial output file, or its parts in order
+        done_rows (int): Rows in the partial output
+        chunk_size (int): Rows read at a time
+
+    Raises:
+        ValueError: At the first row whose identity differs
+    """
+    written = _file_identities(partial_files, chunk_size)
+    current = islice(_file_identities([input_file], chunk_size), done_rows)
+    for row, (before, now) in enumerate(zip(written, current)):
+        if before != now:
+            raise ValueError(
+                f"{input_file} changed since {done_rows} rows were written to {partial_files[0]} "
+                f"(row {row} is a different lead), resuming by position would skip or repeat rows. "
+                f"Restore the original input or delete the partial output to start over"
+            )
+
+
+def process_csv_in_chunks(input_file, output_file, chunk_size, process_chunk, fsync_every=20, store=None,
+                          **read_kwargs):
+    """
+    Stream a table file through process_chunk with bounded memory
+
+    Only one chunk is held in memory at a time. Finished chunks are appended
+    to <output_file>.partial and the partial file is renamed over the output
+    once the whole input has been processed. Rows inside the current chunk are
+    journaled, so an interrupted run resumes at the first unfinished chunk and
+    keeps the rows that chunk had already completed.
+
+    Input and output may be CSV, Parquet or Feather (by extension). A
+    columnar output keeps each finished chunk as a part file in
+    <output_file>.parts/ instead, and the parts become the row groups of the
+    output at the end.
+
+    Chunks are indexed by their global row number, so row labels match the
+    row numbers of the input file.
+
+    Resuming is by position, so before it the rows already in the partial
+    output are checked against the first rows of the input by row identity
+    (see resume). If the input was reordered or rows were inserted in
+    between, the run refuses to continue instead of skipping or repeating
+    the wrong rows.
+
+    Args:
+        input_file (str): Path to the input CSV file
+        output_file (str): Path to the output CSV file
+        chunk_size (int): Number of rows per chunk
+        process_chunk (callable): Called as process_chunk(chunk, journal); it
+            should call journal.replay() once the chunk's columns are set up
+            and may return a replacement DataFrame to write instead
+        fsync_every (int): Number of journal records to group into one fsync
+        store (LeadStore, optional): Pipeline store the chunk journals also write to
+        **read_kwargs: Extra keyword arguments for pandas.read_csv (dtype
+            also applies to columnar input)
+
+    Returns:
+        int: Number of rows written to the output file
+
+    Raises:
+        ValueError: When the partial output doesn't match the input
+    """
+    journal_file = f"{output_file}.chunk.journal"
+
+    if is_columnar(output_file):
+        parts = TablePartWriter(output_file)
+        done_rows = parts.done_rows()
+        if done_rows:
+            check_partial_output(input_file, parts.parts(), done_rows, chunk_size)
+            logger.info(f"Resuming chunked run after {done_rows} rows already in {parts.parts_dir}")
+    else:
+        # Skip rows already written by an interrupted run
+        partial_file = f"{output_file}.partial"
+        done_rows = count_csv_rows(partial_file)
+        header_written = os.path.exists(partial_file) and os.path.getsize(partial_file) > 0
+        if done_rows:
+            check_partial_output(input_file, [partial_file], done_rows, chunk_size)
+            logger.info(f"Resuming chunked run after {done_rows} rows already in {partial_file}")
+        out = open(partial_file, "a", encoding="utf-8", newline="")
+
+    row_offset = done_rows
+    try:
+        for chunk in iter_table_chunks(input_file, chunk_size, done_rows, **read_kwargs):
+            chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+
+            journal = CheckpointJournal(None, chunk, fsync_every, journal_file=journal_file, store=store)
+
+            result = process_chunk(chunk, journal)
+            if result is not None:
+                chunk = result
+
+            if is_columnar(output_file):
+                parts.write(chunk)
+            else:
+                chunk.to_csv(out, header=not header_written, index=False)
+                out.flush()
+                os.fsync(out.fileno())
+                header_written = True
+
+            # The chunk is now in the partial output, its journal is no longer needed
+            journal.discard()
+            row_offset += len(chunk)
+    finally:
+        if not is_columnar(output_file):
+            out.close()
+
+    if is_columnar(output_file):
+        return parts.finish()
+
+    os.replace(partial_file, output_file)
+    return row_offset
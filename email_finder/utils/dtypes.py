@@ -0,0 +1,229 @@
+"""
+Compact in-memory dtypes for lead DataFrames
+
+Lead files are loaded with one Python object per cell. The columns that
+repeat across rows (companies, domains, statuses) become categoricals that
+store each distinct value once, long free text (summaries, notes, URLs)
+becomes Arrow-backed strings kept in one contiguous buffer, and small
+integer columns become nullable 16-bit integers (blanks stay blank). compact_dtypes() reports memory before and
+after so the saving is visible.
+
+Arrow strings need pyarrow, without it text columns stay as they are.
+Set COMPACT_DTYPES=off to load everything with the default dtypes.
+"""
+
+import os
+import logging
+
+from email_finder.utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+pyarrow = lazy_import("pyarrow", optional=True)  # only needed for Arrow-backed strings
+
+logger = logging.getLogger("email_finder.dtypes")
+
+# Columns that repeat across rows, stored as categoricals
+CATEGORICAL_COLUMNS = [
+    "Company Name", "Company Domain", "Email Method", "Connection Status", "Job Title", "Location"
+]
+
+# Free-text columns, stored as Arrow-backed strings
+TEXT_COLUMNS = [
+    "LinkedIn Summary", "Summary Fingerprint", "Connection Note", "Connection Date", "LinkedIn Profile",
+    "Email", "First Name", "Last Name", "Full Name"
+]
+
+# Integer columns with a small range, stored as nullable 16-bit integers
+SMALL_INT_COLUMNS = ["Email Confidence"]
+SMALL_INT_DTYPE = "Int16"
+
+# A column only becomes categorical when it has at most this many distinct
+# values per row, otherwise the categories cost more than they save
+MAX_CATEGORY_RATIO = 0.5
+
+
+def compact_dtypes_enabled():
+    """False when COMPACT_DTYPES is set to off"""
+    return os.getenv("COMPACT_DTYPES", "on").lower() not in ("off", "0", "false", "no")
+
+
+def arrow_string_dtype():
+    """
+    Arrow-backed string dtype, or None without pyarrow
+
+    Missing values stay NaN where pandas supports it (2.3+), so the column
+    behaves like the object column it replaces.
+    """
+    if pyarrow is None:
+        return None
+
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:  # pandas < 2.3 only has pd.NA semantics
+        return pd.StringDtype("pyarrow")
+
+
+def memory_usage(df):
+    """Bytes used by a DataFrame, counting the Python objects it holds"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def compact_dtypes(df, categorical=CATEGORICAL_COLUMNS, text=TEXT_COLUMNS, small_int=SMALL_INT_COLUMNS,
+                   max_category_ratio=MAX_CATEGORY_RATIO):
+    """
+    Convert the columns of a DataFrame to compact dtypes in place
+
+    Columns that aren't in the DataFrame are skipped, as is any conversion
+    that fails, so the DataFrame is always usable afterwards.
+
+    Args:
+        df (DataFrame): Lead data, modified in place
+        categorical (list): Columns to store as categoricals if they repeat enough
+        text (list): Columns to store as Arrow-backed strings
+        small_int (list): Integer columns to store as SMALL_INT_DTYPE
+        max_category_ratio (float): Most distinct values per row for a categorical
+
+    Returns:
+        dict: before and after bytes, and column -> (old dtype, new dtype,
+            bytes before, bytes after) for every converted column
+    """
+    report = {"before": memory_usage(df), "after": 0, "columns": {}}
+    string_dtype = arrow_string_dtype()
+
+    for column in df.columns:
+        values = df[column]
+        converted = None
+
+        try:
+            if column in categorical and not isinstance(values.dtype, pd.CategoricalDtype):
+                if len(values) and values.nunique(dropna=True) <= max_category_ratio * len(values):
+                    converted = values.astype("category")
+            elif column in text and string_dtype is not None and values.dtype != string_dtype:
+                if string_dtype.na_value is pd.NA:
+                    # Blank instead of pd.NA, which doesn't work as a truth value
+                    values = values.where(values.notna(), "")
+                converted = values.astype(string_dtype)
+            elif column in small_int and values.dtype.kind in "iuf":
+                # Raises for fractions or values out of range, the column is kept then
+                converted = values.astype(SMALL_INT_DTYPE)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Keeping {column} as {values.dtype}: {str(e)}")
+            continue
+
+        if converted is None:
+            continue
+
+        before = int(values.memory_usage(deep=True, index=False))
+        after = int(converted.memory_usage(deep=True, index=False))
+        report["columns"][column] = (str(values.dtype), str(converted.dtype), before, after)
+        df[column] = converted
+
+    report["after"] = memory_usage(df)
+    return report
+
+
+def format_memory_report(report):
+    """
+    Describe a compact_dtypes() report in one line per converted column
+
+    Args:
+        report (dict): Report from compact_dtypes()
+
+    Returns:
+        list: Lines, the total first
+    """
+    before, after = report["before"], report["after"]
+    saved = (1 - after / before) * 100 if before else 0.0
+
+    lines = [f"Memory: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB ({saved:.0f}% less)"]
+    columns = sorted(report["columns"].items(), key=lambda item: item[1][2] - item[1][3], reverse=True)
+    for column, (old_dtype, new_dtype, column_before, column_after) in columns:
+        lines.append(
+            f"  {column}: {old_dtype} -> {new_dtype}, "
+            f"{column_before / 1e6:.1f} MB -> {column_after / 1e6:.1f} MB"
+        )
+    return lines
+
+
+def add_category(df, column, value):
+    """
+    Make value assignable to a categorical column
+
+    Args:
+        df (DataFrame): DataFrame holding the column
+        column (str): Column name
+        value: Value about to be assigned
+    """
+    values = df[column]
+    if value is None or value != value or value in values.cat.categories:
+        return
+    df[column] = values.cat.add_categories([value])
+
+
+def make_assignable(df, column, value):
+    """
+    Make value assignable to a column, widening the column's dtype if needed
+
+    A categorical column gets the value as a new category. A column whose
+    dtype can't hold the value exactly (a fraction or 9200 in an Int16
+    column, text in a float column) becomes float64 for numbers and object
+    dtype otherwise, the way set_column_values() widens.
+
+    Args:
+        df (DataFrame): DataFrame holding the column, modified in place
+        column (str): Column name
+        value: Value about to be assigned
+    """
+    if column not in df.columns:
+        return
+
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        add_category(df, column, value)
+        return
+    if value is None or value != value or values.dtype == object:
+        return
+
+    try:
+        # Numpy int dtypes truncate fractions silently, so compare the result
+        fits = bool(pd.array([value], dtype=values.dtype)[0] == value)
+    except (TypeError, ValueError, OverflowError):
+        fits = False
+    if fits:
+        return
+
+    numeric = isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+    df[column] = values.astype("float64" if numeric and values.dtype.kind in "iuf" else object)
+
+
+def set_column_values(df, column, values):
+    """
+    Assign values to some rows of a column, widening its dtype if needed
+
+    Values read back from another file or a database may not fit the
+    column (text into a float column of blanks, ints read as floats), the
+    column becomes object dtype in that case instead of raising.
+
+    Args:
+        df (DataFrame): DataFrame holding the column, modified in place
+        column (str): Column name, created blank if missing
+        values (Series): New values, indexed by the labels of the rows to set
+    """
+    values = values.dropna()
+    if not len(values):
+        return
+
+    if values.dtype.kind == "f" and (values % 1 == 0).all():
+        # Integers come back as floats when other rows had none
+        values = values.astype("int64")
+
+    if column not in df.columns:
+        df[column] = ""
+    try:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            raise TypeError("categories are fixed")
+        values = values.astype(df[column].dtype)
+    except (TypeError, ValueError):
+        df[column] = df[column].astype(object)
+    df.loc[values.index, column] = values
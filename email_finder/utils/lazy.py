@@ -0,0 +1,114 @@
+"""
+Lazy imports of heavy dependencies
+
+pandas, numpy, pyarrow, openai, requests, BeautifulSoup, dnspython and
+selenium together take most of a second to import, which every tool used
+to pay before it could even print --help. Modules bind them with
+lazy_import() instead, and the import happens on first attribute access:
+
+    pd = lazy_import("pandas")
+    pa = lazy_import("pyarrow", optional=True)   # None when not installed
+    BeautifulSoup = lazy_attribute("bs4", "BeautifulSoup")
+
+Exception classes used in except clauses must be real classes, so refer to
+them through a lazy module (except openai.RateLimitError) rather than a
+lazy_attribute().
+"""
+
+import sys
+import types
+import importlib
+import importlib.util
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that imports it on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded yet"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+class LazyAttribute:
+    """Stand-in for a class or function of a module imported on first use"""
+
+    def __init__(self, module_name, name):
+        self._module = LazyModule(module_name)
+        self._name = name
+
+    def _load(self):
+        return getattr(self._module, self._name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        return f"<lazy {self._module.__name__}.{self._name}>"
+
+
+def is_installed(name):
+    """True when the top-level package of a module can be imported (without importing it)"""
+    return importlib.util.find_spec(name.partition(".")[0]) is not None
+
+
+def lazy_import(name, optional=False):
+    """
+    Module that is imported on first attribute access
+
+    A module that is already imported is returned as it is.
+
+    Args:
+        name (str): Module name, e.g. "pandas" or "dns.resolver"
+        optional (bool): Return None instead of raising when the package
+            isn't installed
+
+    Returns:
+        module: The module or its lazy stand-in (None for a missing optional one)
+
+    Raises:
+        ModuleNotFoundError: When a required package isn't installed
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    if not is_installed(name):
+        if optional:
+            return None
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    return LazyModule(name)
+
+
+def lazy_attribute(module_name, name):
+    """
+    Class or function of a module, imported on its first use
+
+    Args:
+        module_name (str): Module defining it
+        name (str): Its name in the module
+
+    Returns:
+        LazyAttribute: Stand-in that forwards calls and attribute access
+    """
+    return LazyAttribute(module_name, name)
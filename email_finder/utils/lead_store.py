@@ -0,0 +1,438 @@
+"""
+Pipeline store shared by the scraper, email finder and connector
+
+Every lead is one row of a SQLite table keyed by its normalized LinkedIn
+URL, so the same person is the same row whichever lead file they came in
+through and however the URL was written (http/https, www, trailing slash,
+query string). Each tool registers the rows of its input, reads back what
+earlier runs already stored for them, and writes only the columns it owns
+(the scraper its summary, the email finder the email columns, the
+connector the connection columns). The joined lead list is produced on
+demand with export():
+
+    python -m email_finder export leads.sqlite leads_full.csv
+
+Columns are added to the table the first time a tool writes them and are
+exported in that order. Rows without a LinkedIn URL can't be keyed and
+stay in the per-tool output files only.
+
+Set LEAD_STORE to the database file to turn the store on for every tool.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+
+from email_finder.utils.csv_handler import filled_mask
+from email_finder.utils.dtypes import set_column_values
+from email_finder.utils.lazy import lazy_import
+from email_finder.utils.table_io import TableWriter
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger("email_finder.lead_store")
+
+# Column the lead key is derived from
+URL_COLUMN = "LinkedIn Profile"
+
+# linkedin.com/in/<slug> (or /pub/, /sales/lead/...), ignoring scheme, subdomain and query
+_LINKEDIN_PATH = re.compile(r"^(?:[a-z0-9-]+\.)*linkedin\.com(/.*)?$")
+
+
+def normalize_linkedin_url(url):
+    """
+    Reduce a LinkedIn profile URL to the key a lead is stored under
+
+    "https://www.linkedin.com/in/Jane-Doe/?trk=x" and "linkedin.com/in/jane-doe"
+    both become "linkedin.com/in/jane-doe". Other URLs are lowercased with
+    their scheme, query and trailing slash removed.
+
+    Args:
+        url (str): Profile URL as found in a lead file
+
+    Returns:
+        str: Normalized key, or None for a blank value
+    """
+    if url is None or url != url:  # None or NaN
+        return None
+
+    key = str(url).strip().lower()
+    if not key:
+        return None
+
+    key = re.sub(r"^[a-z][a-z0-9+.-]*://", "", key)
+    key = key.split("?", 1)[0].split("#", 1)[0].rstrip("/")
+
+    match = _LINKEDIN_PATH.match(key)
+    if match:
+        key = "linkedin.com" + (match.group(1) or "")
+
+    return key or None
+
+
+def _quote(column):
+    """Quote a column name for SQL, lead file columns contain spaces"""
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _sql_value(value):
+    """Plain Python value for SQLite, None for NaN/NA"""
+    if value is None:
+        return None
+    if hasattr(value, "item"):  # numpy scalar
+        value = value.item()
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if isinstance(value, (str, int, float, bytes)):
+        return value
+    return str(value)
+
+
+class LeadStore:
+    """SQLite table of leads keyed by normalized LinkedIn URL, one column per field"""
+
+    def __init__(self, path, tool=None):
+        """
+        Open (or create) the store
+
+        Args:
+            path (str): Path to the SQLite database file
+            tool (str, optional): Name of the tool writing to the store,
+                recorded as the owner of the columns it adds
+        """
+        self.path = path
+        self.tool = tool
+
+        self.lock = threading.Lock()
+        self.pending = 0  # updates since the last commit
+        self.updates = 0
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS leads ("
+                " lead_key TEXT PRIMARY KEY,"
+                " first_seen REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS lead_columns ("
+                " name TEXT PRIMARY KEY,"
+                " tool TEXT,"
+                " added_at REAL NOT NULL)"
+            )
+
+        self.columns = []
+        self._refresh_columns()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def add_leads(self, df, key_column=URL_COLUMN):
+        """
+        Register the rows of a lead file
+
+        New leads are inserted with every non-blank value of the row. For
+        leads already in the store only the fields the store doesn't have
+        yet are filled in, so a stale lead file never overwrites newer
+        results.
+
+        Args:
+            df (DataFrame): Lead rows
+            key_column (str): Column holding the LinkedIn URL
+
+        Returns:
+            int: Number of leads that were new to the store
+        """
+        if key_column not in df.columns or not len(df):
+            return 0
+
+        keys = df[key_column].map(normalize_linkedin_url)
+        has_key = keys.notna().to_numpy(dtype=bool)
+        if not has_key.any():
+            return 0
+
+        keys = keys[has_key].to_numpy()
+        now = time.time()
+
+        with self.lock:
+            before = self.conn.total_changes
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO leads (lead_key, first_seen, updated_at) VALUES (?, ?, ?)",
+                    ((key, now, now) for key in keys)
+                )
+                added = self.conn.total_changes - before
+
+                for column in df.columns:
+                    filled = filled_mask(df[column]).to_numpy(dtype=bool)[has_key]
+                    if not filled.any():
+                        continue
+
+                    self._add_column(column, "input")
+                    values = df[column].to_numpy()[has_key][filled]
+                    quoted = _quote(column)
+                    self.conn.executemany(
+                        f"UPDATE leads SET {quoted} = ? WHERE lead_key = ? AND ({quoted} IS NULL OR {quoted} = '')",
+                        ((_sql_value(value), key) for value, key in zip(values, keys[filled]))
+                    )
+
+        return added
+
+    def update(self, url, values):
+        """
+        Store the values a tool produced for one lead
+
+        The write joins the current transaction, call commit() to make it
+        durable (CheckpointJournal does this whenever it syncs).
+
+        Args:
+            url (str): LinkedIn URL of the lead
+            values (dict): Column name to new value
+
+        Returns:
+            bool: False if the URL is blank and nothing was stored
+        """
+        key = normalize_linkedin_url(url)
+        if key is None or not values:
+            return False
+
+        now = time.time()
+
+        with self.lock:
+            for column in values:
+                self._add_column(column, self.tool)
+
+            assignments = ", ".join(f"{_quote(column)} = ?" for column in values)
+            params = [_sql_value(value) for value in values.values()]
+
+            self.conn.execute(
+                "INSERT OR IGNORE INTO leads (lead_key, first_seen, updated_at) VALUES (?, ?, ?)",
+                (key, now, now)
+            )
+            self.conn.execute(
+                f"UPDATE leads SET {assignments}, updated_at = ? WHERE lead_key = ?",
+                params + [now, key]
+            )
+            self.pending += 1
+            self.updates += 1
+
+        return True
+
+    def commit(self):
+        """Commit the updates made since the last commit"""
+        with self.lock:
+            if self.pending:
+                self.conn.commit()
+                self.pending = 0
+
+    def read(self, columns, keys=None):
+        """
+        Read stored columns
+
+        Args:
+            columns (list): Columns to read, ones the store doesn't have are
+                returned empty
+            keys (iterable, optional): Normalized keys to read (default: all)
+
+        Returns:
+            DataFrame: The columns indexed by lead key
+        """
+        self._refresh_columns()
+        known = [column for column in columns if column in self.columns]
+        query = "SELECT lead_key" + "".join(f", {_quote(column)}" for column in known) + " FROM leads"
+
+        with self.lock:
+            if keys is None:
+                stored = pd.read_sql_query(query, self.conn)
+            else:
+                # Look up through a temporary table, a large IN (...) hits SQLite's variable limit
+                self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (lead_key TEXT PRIMARY KEY)")
+                self.conn.execute("DELETE FROM wanted")
+                self.conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((key,) for key in keys))
+                stored = pd.read_sql_query(query + " WHERE lead_key IN (SELECT lead_key FROM wanted)", self.conn)
+                self.conn.execute("DELETE FROM wanted")
+
+        stored = stored.set_index("lead_key")
+        return stored.reindex(columns=columns)
+
+    def fill(self, df, columns, done_columns=None, key_column=URL_COLUMN):
+        """
+        Copy stored results into the rows of df that don't have them yet
+
+        A row is filled when none of its done_columns has a value in df but
+        the store has one for that lead; all of columns are then copied for
+        it, so a result's columns always stay together.
+
+        Args:
+            df (DataFrame): Lead rows, modified in place
+            columns (list): Columns the calling tool produces
+            done_columns (list, optional): Columns that mark a row as done
+                (default: columns)
+            key_column (str): Column holding the LinkedIn URL
+
+        Returns:
+            int: Number of rows filled from the store
+        """
+        done_columns = done_columns or columns
+        self._refresh_columns()
+        if key_column not in df.columns or not any(column in self.columns for column in done_columns):
+            return 0
+
+        keys = df[key_column].map(normalize_linkedin_url)
+        stored = self.read(columns, keys.dropna().unique())
+        if not len(stored):
+            return 0
+
+        stored_values = {column: keys.map(stored[column]) for column in columns}
+
+        missing = np.ones(len(df), dtype=bool)
+        available = np.zeros(len(df), dtype=bool)
+        for column in done_columns:
+            if column in df.columns:
+                missing &= ~filled_mask(df[column]).to_numpy(dtype=bool)
+            available |= filled_mask(stored_values[column]).to_numpy(dtype=bool)
+
+        take = missing & available
+        if not take.any():
+            return 0
+
+        for column in columns:
+            set_column_values(df, column, stored_values[column][take])
+
+        return int(take.sum())
+
+    def merge(self, df, columns, done_columns=None, key_column=URL_COLUMN):
+        """
+        Register the rows of df and fill in the results already stored for them
+
+        This is what a tool calls after loading its input: add_leads() and
+        then fill().
+
+        Args:
+            df (DataFrame): Lead rows, modified in place
+            columns (list): Columns the calling tool produces
+            done_columns (list, optional): Columns that mark a row as done
+            key_column (str): Column holding the LinkedIn URL
+
+        Returns:
+            tuple: (leads new to the store, rows filled from the store)
+        """
+        added = self.add_leads(df, key_column)
+        filled = self.fill(df, columns, done_columns, key_column)
+        return added, filled
+
+    def export(self, path, columns=None, chunk_size=100000):
+        """
+        Write the joined lead list to a file, streaming chunk by chunk
+
+        Args:
+            path (str): Output file, its extension picks CSV, Parquet or Feather
+            columns (list, optional): Columns to export (default: all, in the
+                order they were added)
+            chunk_size (int): Leads held in memory at a time
+
+        Returns:
+            int: Number of leads written
+        """
+        self._refresh_columns()
+        columns = list(columns or self.columns)
+        unknown = [column for column in columns if column not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+
+        query = "SELECT " + ", ".join(_quote(column) for column in columns) + " FROM leads ORDER BY rowid"
+
+        # A separate connection so a long export doesn't hold the lock tools write through
+        conn = sqlite3.connect(self.path, timeout=30)
+        writer = TableWriter(path)
+        try:
+            for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            conn.close()
+
+        writer.close()
+        return writer.rows
+
+    def stats(self):
+        """
+        Count the stored leads and the filled values of every column
+
+        Returns:
+            dict: leads, and column -> (filled count, owning tool)
+        """
+        self._refresh_columns()
+        with self.lock:
+            owners = dict(self.conn.execute("SELECT name, tool FROM lead_columns"))
+            counts = {}
+            if self.columns:
+                row = self.conn.execute(
+                    "SELECT COUNT(*)" + "".join(
+                        f", SUM({_quote(column)} IS NOT NULL AND {_quote(column)} != '')" for column in self.columns
+                    ) + " FROM leads"
+                ).fetchone()
+                total = row[0]
+                counts = {column: (row[i + 1] or 0, owners.get(column)) for i, column in enumerate(self.columns)}
+            else:
+                total = self.conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+        return {"leads": total, "columns": counts}
+
+    def close(self):
+        """Commit pending updates and close the database"""
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def _refresh_columns(self):
+        """Pick up columns another process has added since we last looked"""
+        with self.lock:
+            self.columns = [name for name, in self.conn.execute("SELECT name FROM lead_columns ORDER BY rowid")]
+
+    def _add_column(self, column, tool):
+        """Add a column to the leads table the first time it is written (lock held)"""
+        if column in self.columns:
+            return
+
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(leads)")}
+        if column not in existing:
+            self.conn.execute(f"ALTER TABLE leads ADD COLUMN {_quote(column)}")
+        self.conn.execute(
+            "INSERT OR IGNORE INTO lead_columns (name, tool, added_at) VALUES (?, ?, ?)",
+            (column, tool, time.time())
+        )
+        self.columns.append(column)
+
+
+def open_lead_store(tool):
+    """
+    Open the pipeline store named by LEAD_STORE
+
+    Args:
+        tool (str): Name of the calling tool, e.g. "scraper"
+
+    Returns:
+        LeadStore: The store, or None when LEAD_STORE isn't set
+    """
+    path = os.getenv("LEAD_STORE", "").strip()
+    if not path or path.lower() == "off":
+        return None
+
+    try:
+        return LeadStore(path, tool)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not open lead store {path}: {str(e)}")
+        return None
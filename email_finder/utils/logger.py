@@ -0,0 +1,135 @@
+"""
+Logging setup for the email finder
+
+Worker threads only put records on a queue; a QueueListener thread formats
+them and writes them to the console and to a size-rotated log file, so
+logging never blocks a worker on terminal or disk I/O. Messages should use
+lazy %-style arguments (logger.debug("Verifying %s", email)): records are
+formatted on the listener thread, and not at all when their level is off.
+
+Configuration comes from the environment:
+    LOG_FILE            Log file (default: logs/<logger name>.log, "off" for none)
+    LOG_MAX_BYTES       Size a log file is rotated at (default: 10 MB)
+    LOG_BACKUP_COUNT    Rotated files kept (default: 5)
+    LOG_FORMAT          text or json, one JSON object per line (default: text)
+"""
+
+import os
+import json
+import queue
+import atexit
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL
+}
+
+_listeners = []
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread
+
+    The stock handler formats every record in the logging thread so it can
+    be pickled; the queue here never leaves the process, so the record is
+    passed on as it is.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def set_log_level(logger, log_level):
+    """
+    Set a logger's level by name
+
+    Args:
+        logger (logging.Logger): Logger to configure
+        log_level (str): DEBUG, INFO, WARNING, ERROR or CRITICAL (default INFO)
+    """
+    logger.setLevel(LEVELS.get(str(log_level).upper(), logging.INFO))
+
+
+def setup_logger(name, log_level="INFO"):
+    """
+    Set up a logger that writes through a background listener thread
+
+    Records go to the console and, unless LOG_FILE is "off", to a log file
+    rotated at LOG_MAX_BYTES. Calling it again for the same name only
+    changes the level.
+
+    Args:
+        name (str): Logger name
+        log_level (str): Level name (default: INFO)
+
+    Returns:
+        logging.Logger: The configured logger
+    """
+    logger = logging.getLogger(name)
+    set_log_level(logger, log_level)
+
+    if logger.handlers:
+        return logger
+
+    formatter = JsonFormatter() if os.getenv("LOG_FORMAT", "text").lower() == "json" else logging.Formatter(TEXT_FORMAT)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+
+    log_file = os.getenv("LOG_FILE", os.path.join("logs", f"{name}.log"))
+    if log_file and log_file.lower() != "off":
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+            encoding="utf-8",
+            delay=True
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    logger.propagate = False
+
+    return logger
+
+
+@atexit.register
+def stop_listeners():
+    """Write out the queued records and stop the listener threads"""
+    while _listeners:
+        _listeners.pop().stop()
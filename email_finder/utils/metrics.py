@@ -0,0 +1,249 @@
+"""
+In-process metrics for the email finder
+
+Stage latencies go into fixed-bucket histograms, stage outcomes into
+counters, and cache effectiveness into hit/miss gauges, all behind one lock
+so worker threads can record freely. Time spent waiting on a rate limiter is
+recorded on its own and subtracted from the stage it happened in, so a
+stage's histogram shows real work rather than throttling.
+
+A run's metrics are written as a JSON summary, and optionally as a
+Prometheus textfile for node_exporter's textfile collector.
+"""
+
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (not thread-safe, guarded by Metrics)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (max for +Inf)"""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "max": round(self.max, 6)
+        }
+
+
+class Metrics:
+    """Thread-safe registry of stage histograms, counters and cache gauges"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.stages = {}  # stage -> Histogram of work seconds
+        self.waits = {}  # limiter -> Histogram of wait seconds
+        self.outcomes = {}  # (stage, outcome) -> count
+        self.caches = {}  # cache -> (hits, misses)
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a stage of work in the current thread
+
+        Rate-limiter waits recorded by the same thread while the stage runs
+        are subtracted from its latency. Call outcome() to count the result,
+        a stage that raises is counted as an "error" outcome.
+
+        Args:
+            name (str): Stage name, e.g. "domain" or "verify"
+        """
+        waited_before = self._waited()
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.outcome(name, "error")
+            raise
+        finally:
+            elapsed = time.perf_counter() - start - (self._waited() - waited_before)
+            self._observe(self.stages, name, max(0.0, elapsed))
+
+    @contextmanager
+    def wait(self, limiter):
+        """
+        Time a wait on a rate limiter
+
+        Args:
+            limiter (str): Name of the rate limiter
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.waited = self._waited() + elapsed
+            self._observe(self.waits, limiter, elapsed)
+
+    def outcome(self, stage, outcome):
+        """
+        Count the outcome of a stage
+
+        Args:
+            stage (str): Stage name
+            outcome (str): e.g. "success", "miss" or "error"
+        """
+        with self.lock:
+            key = (stage, outcome)
+            self.outcomes[key] = self.outcomes.get(key, 0) + 1
+
+    def set_cache(self, name, hits, misses):
+        """
+        Record the hit and miss counts of a cache
+
+        Args:
+            name (str): Cache name
+            hits (int): Lookups answered by the cache
+            misses (int): Lookups that had to be computed
+        """
+        with self.lock:
+            self.caches[name] = (hits, misses)
+
+    def summary(self):
+        """
+        Return every metric as a JSON-serializable dict
+
+        Returns:
+            dict: stages (latency and outcomes), rate limiter waits and cache
+                hit ratios
+        """
+        with self.lock:
+            stages = {}
+            for name in sorted(set(self.stages) | {stage for stage, _ in self.outcomes}):
+                entry = self.stages[name].summary() if name in self.stages else Histogram(self.buckets).summary()
+                entry["outcomes"] = {
+                    outcome: count for (stage, outcome), count in sorted(self.outcomes.items()) if stage == name
+                }
+                stages[name] = entry
+
+            caches = {}
+            for name, (hits, misses) in sorted(self.caches.items()):
+                lookups = hits + misses
+                caches[name] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": round(hits / lookups, 4) if lookups else 0.0
+                }
+
+            return {
+                "stages": stages,
+                "rate_limit_wait": {name: hist.summary() for name, hist in sorted(self.waits.items())},
+                "caches": caches
+            }
+
+    def write_json(self, path, extra=None):
+        """
+        Atomically write the summary as JSON
+
+        Args:
+            path (str): File to write
+            extra (dict, optional): Additional top-level fields (run info, ...)
+        """
+        report = dict(extra or {})
+        report.update(self.summary())
+        _write_atomic(path, json.dumps(report, indent=2))
+
+    def write_prometheus(self, path, prefix="email_finder"):
+        """
+        Atomically write the metrics in the Prometheus text exposition format
+
+        Args:
+            path (str): File to write (e.g. in node_exporter's textfile directory)
+            prefix (str): Metric name prefix
+        """
+        lines = []
+
+        with self.lock:
+            for metric, label, histograms, help_text in (
+                ("stage_seconds", "stage", self.stages, "Seconds of work per stage, rate-limit waits excluded"),
+                ("rate_limit_wait_seconds", "limiter", self.waits, "Seconds spent waiting on a rate limiter")
+            ):
+                name = f"{prefix}_{metric}"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for value, hist in sorted(histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{{label}="{value}"}} {hist.sum}')
+                    lines.append(f'{name}_count{{{label}="{value}"}} {hist.count}')
+
+            name = f"{prefix}_stage_outcomes_total"
+            lines.append(f"# HELP {name} Stage results by outcome")
+            lines.append(f"# TYPE {name} counter")
+            for (stage, outcome), count in sorted(self.outcomes.items()):
+                lines.append(f'{name}{{stage="{stage}",outcome="{outcome}"}} {count}')
+
+            name = f"{prefix}_cache_lookups_total"
+            lines.append(f"# HELP {name} Cache lookups by result")
+            lines.append(f"# TYPE {name} counter")
+            for cache, (hits, misses) in sorted(self.caches.items()):
+                lines.append(f'{name}{{cache="{cache}",result="hit"}} {hits}')
+                lines.append(f'{name}{{cache="{cache}",result="miss"}} {misses}')
+
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self.lock:
+            self.stages.clear()
+            self.waits.clear()
+            self.outcomes.clear()
+            self.caches.clear()
+
+    def _waited(self):
+        return getattr(self._local, "waited", 0.0)
+
+    def _observe(self, histograms, name, value):
+        with self.lock:
+            hist = histograms.get(name)
+            if hist is None:
+                hist = histograms[name] = Histogram(self.buckets)
+            hist.observe(value)
+
+
+def _write_atomic(path, text):
+    # The textfile collector may read at any moment, never let it see half a file
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, path)
@@ -0,0 +1,244 @@
+"""
+--profile support for the command line tools
+
+Runs the rest of a tool under cProfile and, when the process exits, writes
+the profile next to the output file:
+
+    <output>.profile-<time>.pstats   full profile (pstats, snakeviz, ...)
+    <output>.profile-<time>.txt      top functions by own and cumulative
+                                     time, and own time per library
+
+The profiler's clock is the CPU time of the thread being profiled, so time
+spent sleeping, waiting on locks, rate limiters, the network or the browser
+doesn't count and only real work shows up. Worker threads get a profiler of
+their own (merged into the report) on Python versions that allow several
+profilers at once; from Python 3.12 one profiler sees every thread and the
+process CPU clock is used instead.
+"""
+
+import os
+import sys
+import time
+import atexit
+import cProfile
+import pstats
+import logging
+import threading
+from io import StringIO
+from datetime import datetime
+
+logger = logging.getLogger("email_finder.profiling")
+
+# From 3.12 cProfile is built on sys.monitoring: one profiler, all threads
+SHARED_PROFILER = sys.version_info >= (3, 12)
+
+# Own time of functions from these modules is reported under one name
+LIBRARY_NAMES = {
+    "_csv": "csv",
+    "_sre": "re",
+    "_json": "json",
+    "_sqlite3": "sqlite3",
+    "_socket": "socket",
+    "_ssl": "ssl",
+    "lxml": "bs4",
+    "html": "bs4",
+    "soupsieve": "bs4"
+}
+
+# Files under here are reported as email_finder
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))).replace(os.sep, "/") + "/"
+
+_profiler = None
+
+
+def add_profile_arguments(parser):
+    """
+    Add --profile and --profile-top to a tool's argument parser
+
+    Args:
+        parser (argparse.ArgumentParser): Parser of the tool
+    """
+    parser.add_argument(
+        "--profile",
+        help="Profile the run's CPU time and write the profile next to the output file",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--profile-top",
+        help="Functions listed in the profile summary (default: 30)",
+        type=int,
+        default=30
+    )
+
+
+def library_of(filename, function):
+    """
+    Library a profiled function belongs to
+
+    Args:
+        filename (str): Source file from the profile ("~" for built-ins)
+        function (str): Function name from the profile
+
+    Returns:
+        str: Top-level package or module name, or the script's file name
+    """
+    if filename == "~":
+        # "<built-in method _sre.compile>", "<method 'sub' of 're.Pattern' objects>"
+        text = function.strip("<>").replace("'", " ").replace(".", " ")
+        for word in text.split():
+            if word in LIBRARY_NAMES or word in ("re", "time", "builtins", "posix", "select"):
+                return LIBRARY_NAMES.get(word, word)
+        return "builtins"
+
+    if filename.startswith("<frozen "):
+        # "<frozen os>", "<frozen _collections_abc>"
+        name = filename[len("<frozen "):-1].lstrip("_").split(".", 1)[0]
+        return LIBRARY_NAMES.get(name, name)
+
+    path = filename.replace(os.sep, "/")
+    for marker in ("/site-packages/", "/dist-packages/"):
+        if marker in path:
+            name = path.split(marker, 1)[1].split("/", 1)[0]
+            name = name[:-3] if name.endswith(".py") else name
+            return LIBRARY_NAMES.get(name, name)
+
+    stdlib = os.path.dirname(os.__file__).replace(os.sep, "/") + "/"
+    if path.startswith(stdlib):
+        name = path[len(stdlib):].split("/", 1)[0]
+        name = name[:-3] if name.endswith(".py") else name
+        return LIBRARY_NAMES.get(name, name)
+
+    # The tools themselves: the email_finder package or the script's name
+    if path.startswith(PACKAGE_DIR):
+        return "email_finder"
+    return os.path.basename(filename)
+
+
+class Profiler:
+    """cProfile on CPU time, covering the main and worker threads"""
+
+    def __init__(self, output_file, top=30):
+        """
+        Args:
+            output_file (str): Output file of the run, the profile is written next to it
+            top (int): Functions listed in the summary
+        """
+        self.output_file = output_file
+        self.top = top
+        self.base_name = f"{output_file}.profile-{datetime.now():%Y%m%d-%H%M%S}"
+
+        self.lock = threading.Lock()
+        self.thread_profiles = []
+        self.started_at = None
+        self.main = cProfile.Profile(time.process_time if SHARED_PROFILER else time.thread_time)
+
+    def start(self):
+        """Start profiling this thread and the threads started from now on"""
+        self.started_at = time.perf_counter()
+        if not SHARED_PROFILER:
+            threading.setprofile(self._start_thread)
+        self.main.enable()
+        return self
+
+    def _start_thread(self, frame, event, arg):
+        """Profile hook of new threads: swap itself for a profiler of the thread"""
+        sys.setprofile(None)
+        profile = cProfile.Profile(time.thread_time)
+        with self.lock:
+            self.thread_profiles.append(profile)
+        profile.enable()
+
+    def stop(self):
+        """
+        Stop profiling and write the profile and its summary
+
+        Returns:
+            tuple: Paths of the pstats file and of the summary
+        """
+        self.main.disable()
+        threading.setprofile(None)
+        wall = time.perf_counter() - self.started_at
+
+        stats = pstats.Stats(self.main)
+        with self.lock:
+            profiles = list(self.thread_profiles)
+        for profile in profiles:
+            stats.add(profile)
+
+        stats_file = f"{self.base_name}.pstats"
+        summary_file = f"{self.base_name}.txt"
+        stats.dump_stats(stats_file)
+
+        summary = self.summary(stats, wall, len(profiles))
+        with open(summary_file, "w", encoding="utf-8") as f:
+            f.write(summary)
+
+        return stats_file, summary_file
+
+    def summary(self, stats, wall, threads):
+        """Text report of the hottest functions and the time per library"""
+        libraries = {}
+        for (filename, line, function), (_, _, own_time, _, _) in stats.stats.items():
+            library = library_of(filename, function)
+            libraries[library] = libraries.get(library, 0.0) + own_time
+
+        cpu = sum(libraries.values())
+        lines = [
+            f"Profile of the run writing {self.output_file}",
+            f"Wall time {wall:.2f}s, profiled CPU time {cpu:.2f}s "
+            f"(main thread + {threads} worker threads, sleeps and waits excluded)",
+            "",
+            "Own CPU time by library:"
+        ]
+        for library, own_time in sorted(libraries.items(), key=lambda item: -item[1])[:self.top]:
+            share = own_time / cpu * 100 if cpu else 0.0
+            lines.append(f"  {library:<28} {own_time:>9.3f}s  {share:5.1f}%")
+
+        for order, title in (("tottime", "own"), ("cumulative", "cumulative")):
+            text = StringIO()
+            stats.stream = text
+            stats.sort_stats(order).print_stats(self.top)
+            listing = text.getvalue()
+            # Skip pstats' header, the table starts at the column names
+            start = listing.find("   ncalls")
+            lines += ["", f"Top {self.top} functions by {title} CPU time:", listing[start:].rstrip()]
+
+        return "\n".join(lines) + "\n"
+
+
+def start_profiling(output_file, top=30):
+    """
+    Profile the rest of the run, writing the profile when the process exits
+
+    Args:
+        output_file (str): Output file of the run
+        top (int): Functions listed in the summary
+
+    Returns:
+        Profiler: The running profiler
+    """
+    global _profiler
+
+    if _profiler is None:
+        _profiler = Profiler(output_file, top).start()
+        atexit.register(stop_profiling)
+        print(f"Profiling CPU time, the profile will be written to {_profiler.base_name}.pstats")
+
+    return _profiler
+
+
+def stop_profiling():
+    """Stop the profiler started by start_profiling() and print where the profile went"""
+    global _profiler
+
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return
+
+    try:
+        stats_file, summary_file = profiler.stop()
+    except OSError as e:
+        logger.warning(f"Could not write profile {profiler.base_name}: {str(e)}")
+        return
+
+    print(f"Profile written to {stats_file}, hotspot summary in {summary_file}")
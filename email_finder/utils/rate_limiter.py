@@ -0,0 +1,273 @@
+"""
+Adaptive rate limiting for concurrent OpenAI requests
+
+AdaptiveRateLimiter caps the number of requests in flight and adapts to the
+limits the API reports. The x-ratelimit-* response headers pause new
+requests before a quota runs out, a 429 halves the allowed concurrency and
+pauses for the retry-after time (or an exponential backoff with jitter),
+and a run of successful requests raises the concurrency again one step at
+a time.
+"""
+
+import re
+import time
+import random
+import asyncio
+import logging
+
+logger = logging.getLogger("email_finder.rate_limiter")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# Longer waits asked for by the server are ignored in favour of our own
+# backoff, like the OpenAI SDK does, so one odd header can't stall a run
+MAX_RETRY_DELAY = 60.0
+
+
+def parse_reset_duration(value):
+    """
+    Parse an OpenAI reset duration such as "20ms", "1s" or "6m0s"
+
+    Args:
+        value (str): Header value
+
+    Returns:
+        float: Seconds, or None if the value can't be parsed
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def _header_int(headers, name):
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(headers, max_delay=MAX_RETRY_DELAY):
+    """
+    Read how long the server asked us to wait from the response headers
+
+    Args:
+        headers (Mapping): Response headers (may be None)
+        max_delay (float): Longest wait taken from the headers
+
+    Returns:
+        float: Seconds to wait, or None if the headers don't say or ask for
+            a negative wait or one longer than max_delay
+    """
+    delay = _header_delay(headers)
+    if delay is None or not 0 <= delay <= max_delay:
+        return None
+    return delay
+
+
+def _header_delay(headers):
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = parse_reset_duration(headers.get("retry-after"))
+    if retry_after is not None:
+        return retry_after
+
+    # Fall back to whichever quota resets last
+    resets = [
+        parse_reset_duration(headers.get("x-ratelimit-reset-requests")),
+        parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+class AdaptiveRateLimiter:
+    """Async concurrency limiter that backs off on OpenAI rate limits"""
+
+    def __init__(self, max_concurrency=8, min_concurrency=1, base_backoff=1.0, max_backoff=60.0):
+        """
+        Initialize the limiter
+
+        Args:
+            max_concurrency (int): Most requests allowed in flight at once
+            min_concurrency (int): Fewest requests allowed in flight after backing off
+            base_backoff (float): First backoff in seconds after a 429 without retry-after
+            max_backoff (float): Longest single pause in seconds
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+
+        self._cond = None
+        self._loop = None
+        self._successes = 0
+        self._consecutive_throttles = 0
+        self._tokens_per_request = 0.0
+
+        self.requests = 0
+        self.throttled = 0
+        self.pauses = 0
+        self.paused_seconds = 0.0
+
+    async def __aenter__(self):
+        cond = self._condition()
+
+        while True:
+            delay = self.paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            async with cond:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    self.requests += 1
+                    return self
+                await cond.wait()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        cond = self._condition()
+        async with cond:
+            self.in_flight -= 1
+            cond.notify_all()
+
+    def on_success(self, headers=None, tokens=0):
+        """
+        Record a successful request
+
+        Pauses new requests until the quota resets when the remaining
+        request or token budget wouldn't cover the requests in flight.
+
+        Args:
+            headers (Mapping, optional): Response headers
+            tokens (int): Tokens the request used
+        """
+        self._consecutive_throttles = 0
+
+        if tokens:
+            # Moving average so one long profile doesn't skew the estimate
+            if self._tokens_per_request:
+                self._tokens_per_request = 0.9 * self._tokens_per_request + 0.1 * tokens
+            else:
+                self._tokens_per_request = float(tokens)
+
+        # Additive increase: one more slot after a full window without throttling
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_concurrency:
+            self._successes = 0
+            # Waiters pick up the extra slot on the next release
+            self.limit += 1
+
+        if not headers:
+            return
+
+        remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests")
+        if remaining_requests is not None and remaining_requests <= self.in_flight:
+            self._pause(parse_reset_duration(headers.get("x-ratelimit-reset-requests")), "request quota")
+
+        remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None and remaining_tokens <= self._tokens_per_request * max(1, self.in_flight):
+            self._pause(parse_reset_duration(headers.get("x-ratelimit-reset-tokens")), "token quota")
+
+    def on_rate_limited(self, headers=None):
+        """
+        Record a 429 response
+
+        Halves the allowed concurrency and pauses new requests for the
+        retry-after time, or an exponential backoff with jitter.
+
+        Args:
+            headers (Mapping, optional): Response headers
+
+        Returns:
+            float: Seconds new requests are paused for
+        """
+        self.throttled += 1
+        self._consecutive_throttles += 1
+        self._successes = 0
+        self.limit = max(self.min_concurrency, self.limit // 2)
+
+        delay = retry_after_seconds(headers)
+        if delay is None:
+            delay = self.backoff_delay(self._consecutive_throttles)
+
+        return self._pause(delay, "429 response")
+
+    def on_error(self, attempt):
+        """
+        Record a transient error (timeout, connection error, 5xx)
+
+        Args:
+            attempt (int): 1 for the first retry, 2 for the second, ...
+
+        Returns:
+            float: Seconds new requests are paused for
+        """
+        return self._pause(self.backoff_delay(attempt), "transient error")
+
+    def backoff_delay(self, attempt):
+        """Exponential backoff with jitter for the given attempt"""
+        ceiling = min(self.max_backoff, self.base_backoff * 2 ** max(0, attempt - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def stats(self):
+        """Return request, throttling and pause counters"""
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "pauses": self.pauses,
+            "paused_seconds": round(self.paused_seconds, 3),
+            "concurrency": self.limit,
+            "max_concurrency": self.max_concurrency
+        }
+
+    def _pause(self, delay, reason):
+        if not delay or delay <= 0:
+            return 0.0
+
+        delay = min(delay, self.max_backoff)
+        now = time.monotonic()
+        until = now + delay
+
+        if until > self.paused_until:
+            # Only count the part that extends an existing pause
+            self.paused_seconds += until - max(now, self.paused_until)
+            self.paused_until = until
+            self.pauses += 1
+            logger.debug(f"Pausing requests for {delay:.2f}s ({reason}), concurrency {self.limit}")
+
+        return delay
+
+    def _condition(self):
+        # The condition is bound to the event loop that first uses it, so a
+        # limiter reused across asyncio.run() calls needs a fresh one per loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._cond = asyncio.Condition()
+            self.in_flight = 0
+        return self._cond
@@ -0,0 +1,316 @@
+"""
+Automatic resume keyed by row identity
+
+Every tool keeps a small state file next to its output (<output>.state)
+listing the rows it has finished, one line per row with the row's identity
+and a short status. A row's identity is a hash of its normalized LinkedIn
+URL, or of its name and company when it has no URL, so it stays the same
+when the input is sorted differently or grows new rows.
+
+On restart the state is loaded into a dict, finished rows get their results
+back from the output file and are skipped with one lookup each, so
+START_ROW is only needed to skip rows on purpose. describe_status() reports
+progress from the state file alone, without reading the output.
+
+State lines carry the same CRC32 checksum as the checkpoint journal and are
+written only when the journal syncs, after it, so the state never claims a
+row whose result isn't on disk yet.
+"""
+
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+from email_finder.utils.csv_handler import count_csv_rows, filled_mask
+from email_finder.utils.dtypes import set_column_values
+from email_finder.utils.lazy import lazy_import
+from email_finder.utils.lead_store import normalize_linkedin_url
+from email_finder.utils.table_io import TablePartWriter, count_table_rows, is_columnar, read_columns, read_table
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger("email_finder.resume")
+
+# Columns a row's identity is derived from
+IDENTITY_COLUMNS = ["LinkedIn Profile", "First Name", "Last Name", "Company Name"]
+
+
+def row_identity(url, first_name=None, last_name=None, company=None):
+    """
+    Stable identity of a lead row
+
+    Args:
+        url (str): LinkedIn profile URL
+        first_name (str, optional): Used with last_name and company when the
+            row has no URL
+        last_name (str, optional): Last name
+        company (str, optional): Company name
+
+    Returns:
+        str: 16 hex digits, or None when the row has neither a URL nor a name
+    """
+    key = normalize_linkedin_url(url)
+    if key is None:
+        parts = [
+            " ".join(str(value).lower().split()) if isinstance(value, str) else ""
+            for value in (first_name, last_name, company)
+        ]
+        if not parts[0] and not parts[1]:
+            return None
+        key = "name:" + "\x1f".join(parts)
+
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def identity_of_row(df, row):
+    """Identity of one row of df (None when it has neither a URL nor a name)"""
+    return row_identity(*[df.at[row, column] if column in df.columns else None for column in IDENTITY_COLUMNS])
+
+
+def row_identities(df):
+    """Series with the identity of every row of df (None where there is none)"""
+    fields = df.reindex(columns=IDENTITY_COLUMNS)
+    return pd.Series(
+        [row_identity(*values) for values in fields.itertuples(index=False, name=None)],
+        index=df.index,
+        dtype=object
+    )
+
+
+class ResumeState:
+    """Append-only record of the rows one tool has finished for one output file"""
+
+    def __init__(self, output_file, status=None, state_file=None):
+        """
+        Load the state of an earlier run
+
+        The state is only trusted while the output file it describes exists,
+        without it the state is started over.
+
+        Args:
+            output_file (str): Output file the finished rows are written to
+            status (callable, optional): Called with the values journaled for
+                a row, returns the short status recorded for it (default: "done")
+            state_file (str, optional): Path to the state file
+                (default: output_file + ".state")
+        """
+        self.output_file = output_file
+        self.state_file = state_file or f"{output_file}.state"
+        self.status = status
+
+        self.lock = threading.Lock()
+        self.done = {}  # identity -> status
+        self.unsynced = []  # lines waiting for the next sync()
+
+        if not os.path.exists(output_file) and os.path.exists(self.state_file):
+            logger.warning(f"Output {output_file} is missing, starting {self.state_file} over")
+            os.remove(self.state_file)
+
+        self.done, good_offset = _read_state(self.state_file)
+        self._handle = open(self.state_file, "a", encoding="utf-8")
+        if self._handle.tell() > good_offset:
+            logger.warning(f"Ignoring corrupt tail of {self.state_file}")
+            self._handle.truncate(good_offset)
+
+    def __len__(self):
+        return len(self.done)
+
+    def __contains__(self, identity):
+        return identity in self.done
+
+    def mark(self, identity, values=None):
+        """
+        Record a row as finished (written to disk on the next sync())
+
+        Args:
+            identity (str): Row identity from row_identity()
+            values (dict, optional): Values journaled for the row, passed to
+                the status function
+        """
+        if identity is None:
+            return
+
+        status = self.status(values or {}) if self.status else "done"
+        payload = json.dumps({"id": identity, "status": status, "at": round(time.time())}, ensure_ascii=False)
+        checksum = zlib.crc32(payload.encode("utf-8"))
+
+        with self.lock:
+            self.done[identity] = status
+            self.unsynced.append(f"{checksum:08x}\t{payload}\n")
+
+    def mark_row(self, df, row, values=None):
+        """
+        Record a row of df as finished
+
+        Args:
+            df (DataFrame): DataFrame holding the row
+            row: Index label of the row
+            values (dict, optional): Values journaled for the row
+        """
+        self.mark(identity_of_row(df, row), values)
+
+    def sync(self):
+        """Write and fsync the rows marked since the last sync"""
+        with self.lock:
+            if self._handle.closed or not self.unsynced:
+                return
+            self._handle.write("".join(self.unsynced))
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self.unsynced = []
+
+    def close(self):
+        """Sync and close the state file"""
+        self.sync()
+        with self.lock:
+            self._handle.close()
+
+    def done_mask(self, identities):
+        """
+        Boolean mask of the rows already finished
+
+        Args:
+            identities (Series): Row identities from row_identities()
+
+        Returns:
+            array: True for every finished row
+        """
+        if not self.done:
+            return np.zeros(len(identities), dtype=bool)
+        return identities.isin(self.done.keys()).to_numpy(dtype=bool, copy=True)
+
+    def restore(self, df, identities, columns, done_columns=None):
+        """
+        Copy the results of finished rows back from the output file
+
+        Only the identity and result columns of the output are read. Rows
+        that already have a value in one of done_columns are left alone.
+
+        Args:
+            df (DataFrame): Rows just loaded from the input, modified in place
+            identities (Series): Identities of the rows of df
+            columns (list): Columns the tool writes
+            done_columns (list, optional): Columns that hold a row's result
+                once it is done (default: columns)
+
+        Returns:
+            int: Number of rows whose results were restored
+        """
+        done = self.done_mask(identities)
+        for column in done_columns or columns:
+            if column in df.columns:
+                done &= ~filled_mask(df[column]).to_numpy(dtype=bool)
+        if not done.any() or not os.path.exists(self.output_file):
+            return 0
+
+        header = read_columns(self.output_file)
+        wanted = [column for column in columns if column in header]
+        if not wanted:
+            return 0
+
+        previous = read_table(
+            self.output_file,
+            columns=[column for column in IDENTITY_COLUMNS if column in header] + wanted
+        )
+        previous.index = row_identities(previous)
+        previous = previous[previous.index.notna() & ~previous.index.duplicated(keep="last")]
+
+        keys = identities[done]
+        for column in wanted:
+            set_column_values(df, column, keys.map(previous[column]))
+
+        return int(keys.isin(previous.index).sum())
+
+
+def _read_state(path):
+    """
+    Read a state file
+
+    Returns:
+        tuple: (dict of identity -> status, byte offset after the last good line)
+    """
+    done = {}
+    good_offset = 0
+
+    if not os.path.exists(path):
+        return done, good_offset
+
+    with open(path, "rb") as f:
+        for line in f:
+            checksum, sep, payload = line.rstrip(b"\n").partition(b"\t")
+            try:
+                if not line.endswith(b"\n") or not sep or int(checksum, 16) != zlib.crc32(payload):
+                    break
+                record = json.loads(payload.decode("utf-8"))
+            except ValueError:
+                break
+
+            done[record["id"]] = record["status"]
+            good_offset += len(line)
+
+    return done, good_offset
+
+
+def describe_status(input_file, output_file, state_file=None):
+    """
+    Describe the progress of a tool from its state file
+
+    Neither the output nor the input is parsed: the state file gives the
+    finished rows, the input's row count comes from Parquet/Feather metadata
+    or a scan for CSV record boundaries.
+
+    Args:
+        input_file (str): Input file of the tool
+        output_file (str): Output file of the tool
+        state_file (str, optional): Path to the state file
+            (default: output_file + ".state")
+
+    Returns:
+        list: Lines of the report
+    """
+    state_file = state_file or f"{output_file}.state"
+    done, _ = _read_state(state_file)
+
+    lines = [f"Output: {output_file}"]
+
+    total = None
+    if os.path.exists(input_file):
+        total = count_table_rows(input_file) if is_columnar(input_file) else count_csv_rows(input_file)
+
+    if total:
+        lines.append(f"Finished: {len(done)} of {total} input rows ({len(done) / total * 100:.1f}%)")
+    else:
+        lines.append(f"Finished: {len(done)} rows")
+
+    for status, count in Counter(done.values()).most_common():
+        lines.append(f"  {status}: {count}")
+
+    if os.path.exists(state_file):
+        updated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(os.path.getmtime(state_file)))
+        lines.append(f"Last update: {updated}")
+
+    journal_file = f"{output_file}.journal"
+    if os.path.exists(journal_file) and os.path.getsize(journal_file):
+        with open(journal_file, "rb") as f:
+            pending = sum(1 for _ in f)
+        lines.append(f"Journal: {pending} results not yet compacted into the output")
+
+    # Chunked runs resume by position from their partial output, after
+    # checking its rows are still the first rows of the input (by identity)
+    if os.path.exists(f"{output_file}.partial"):
+        lines.append(f"Chunked run: {count_csv_rows(f'{output_file}.partial')} rows in {output_file}.partial")
+    elif os.path.isdir(f"{output_file}.parts"):
+        lines.append(f"Chunked run: {TablePartWriter(output_file).done_rows()} rows in {output_file}.parts")
+
+    if os.path.exists(output_file):
+        lines.append(f"Output size: {os.path.getsize(output_file) / 1e6:.1f} MB")
+    else:
+        lines.append("Output not written yet")
+
+    return lines
@@ -0,0 +1,586 @@
+"""
+Format-agnostic reading and writing of lead and result tables
+
+The format of a file is chosen by its extension: ".parquet"/".pq" for
+Parquet, ".feather"/".arrow" for Feather (Arrow IPC), anything else is CSV.
+The columnar formats need pyarrow, which is optional: CSV works without it.
+
+Columnar files are read without parsing text and can be read one column set
+at a time, so a tool only loads the columns it works on. A projected
+DataFrame is written back with write_table(..., base_file=input), which
+fills in the columns that were left out from the input file.
+
+TableWriter streams DataFrames into one file: CSV chunks are appended as
+text, Parquet chunks become row groups and Feather chunks record batches.
+"""
+
+import os
+import logging
+
+from email_finder.utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Optional dependency, only the columnar formats need it
+pa = lazy_import("pyarrow", optional=True)
+ipc = lazy_import("pyarrow.ipc", optional=True)
+pq = lazy_import("pyarrow.parquet", optional=True)
+
+logger = logging.getLogger("email_finder.table_io")
+
+# File extension -> format
+FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather"
+}
+
+
+def table_format(path):
+    """
+    Format of a table file by its extension
+
+    Args:
+        path (str): File path
+
+    Returns:
+        str: "csv", "parquet" or "feather"
+    """
+    return FORMATS.get(os.path.splitext(path)[1].lower(), "csv")
+
+
+def is_columnar(path):
+    """True for Parquet and Feather files"""
+    return table_format(path) != "csv"
+
+
+def _require_pyarrow(path):
+    if pa is None:
+        raise ImportError(f"Reading or writing {path} needs pyarrow (pip install pyarrow)")
+
+
+def read_columns(path):
+    """
+    Column names of a table file without reading its rows
+
+    Args:
+        path (str): Table file
+
+    Returns:
+        list: Column names in file order
+    """
+    fmt = table_format(path)
+    if fmt == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+
+    _require_pyarrow(path)
+    if fmt == "parquet":
+        return list(pq.read_schema(path).names)
+
+    with pa.memory_map(path) as source:
+        return list(ipc.open_file(source).schema.names)
+
+
+def count_table_rows(path):
+    """
+    Number of rows of a Parquet or Feather file from its metadata
+
+    Args:
+        path (str): Columnar table file
+
+    Returns:
+        int: Row count
+    """
+    _require_pyarrow(path)
+    if table_format(path) == "parquet":
+        return pq.ParquetFile(path).metadata.num_rows
+
+    with pa.memory_map(path) as source:
+        reader = ipc.open_file(source)
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def _project(path, columns):
+    """The requested columns that exist in the file, in the requested order"""
+    if columns is None:
+        return None
+
+    available = set(read_columns(path))
+    return [column for column in columns if column in available]
+
+
+def _apply_dtypes(df, dtype):
+    """Apply read_csv-style dtypes to a DataFrame read from a columnar file"""
+    if not dtype:
+        return df
+
+    mapping = dtype if isinstance(dtype, dict) else {column: dtype for column in df.columns}
+    for column, kind in mapping.items():
+        if column not in df.columns:
+            continue
+        if kind is str:
+            # Like read_csv(dtype=str): values become text, missing values stay missing
+            values = df[column]
+            df[column] = values.astype(object).where(values.isna(), values.astype(str))
+        else:
+            df[column] = df[column].astype(kind)
+    return df
+
+
+def _to_pandas(table, dtype=None):
+    return _apply_dtypes(table.to_pandas(), dtype)
+
+
+def read_table(path, columns=None, dtype=None, **csv_kwargs):
+    """
+    Read a table file into a DataFrame
+
+    Args:
+        path (str): Table file
+        columns (list, optional): Only read these columns (ones missing from
+            the file are ignored)
+        dtype (type or dict, optional): Column types, as for pandas.read_csv
+        **csv_kwargs: Extra keyword arguments for pandas.read_csv
+
+    Returns:
+        DataFrame: The table with a fresh RangeIndex
+    """
+    columns = _project(path, columns)
+    fmt = table_format(path)
+
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns, dtype=dtype, **csv_kwargs)
+
+    _require_pyarrow(path)
+    if fmt == "parquet":
+        return _to_pandas(pq.read_table(path, columns=columns), dtype)
+
+    with pa.memory_map(path) as source:
+        table = ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return _to_pandas(table, dtype)
+
+
+def iter_table_chunks(path, chunk_size, skip_rows=0, columns=None, dtype=None, **csv_kwargs):
+    """
+    Read a table file chunk by chunk
+
+    Args:
+        path (str): Table file
+        chunk_size (int): Rows per chunk
+        skip_rows (int): Data rows to skip at the start
+        columns (list, optional): Only read these columns
+        dtype (type or dict, optional): Column types, as for pandas.read_csv
+        **csv_kwargs: Extra keyword arguments for pandas.read_csv
+
+    Yields:
+        DataFrame: Chunks of at most chunk_size rows, labelled with their
+            row numbers in the file (whatever the format and skip_rows)
+    """
+    columns = _project(path, columns)
+    fmt = table_format(path)
+
+    if fmt == "csv":
+        chunks = pd.read_csv(
+            path,
+            chunksize=chunk_size,
+            skiprows=range(1, skip_rows + 1) if skip_rows else None,
+            usecols=columns,
+            dtype=dtype,
+            **csv_kwargs
+        )
+        for chunk in chunks:
+            # read_csv counts from 0 after the skipped rows
+            if skip_rows:
+                chunk.index = chunk.index + skip_rows
+            yield chunk
+        return
+
+    _require_pyarrow(path)
+    if fmt == "parquet":
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns)
+        yield from _rechunk(batches, chunk_size, skip_rows, dtype)
+        return
+
+    # Memory-mapped, so only the rows being converted are paged in
+    with pa.memory_map(path) as source:
+        reader = ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        if columns is not None:
+            batches = (batch.select(columns) for batch in batches)
+        yield from _rechunk(batches, chunk_size, skip_rows, dtype)
+
+
+def _rechunk(batches, chunk_size, skip_rows, dtype):
+    """Turn record batches of any size into DataFrames of chunk_size rows, labelled by row number"""
+    pending = []
+    pending_rows = 0
+    row_offset = skip_rows
+
+    for batch in batches:
+        if skip_rows:
+            if batch.num_rows <= skip_rows:
+                skip_rows -= batch.num_rows
+                continue
+            batch = batch.slice(skip_rows)
+            skip_rows = 0
+
+        pending.append(batch)
+        pending_rows += batch.num_rows
+
+        while pending_rows >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield _labelled(_to_pandas(table.slice(0, chunk_size), dtype), row_offset)
+            row_offset += chunk_size
+            rest = table.slice(chunk_size)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+
+    if pending_rows:
+        yield _labelled(_to_pandas(pa.Table.from_batches(pending), dtype), row_offset)
+
+
+def _labelled(df, row_offset):
+    """Label the rows of a chunk with their row numbers in the file"""
+    df.index = pd.RangeIndex(row_offset, row_offset + len(df))
+    return df
+
+
+def atomic_write_csv(df, output_file):
+    """
+    Write a DataFrame to CSV atomically
+
+    The data is written to a temporary file in the same directory, fsynced
+    and then renamed over the target, so readers never see a half-written file.
+
+    Args:
+        df (DataFrame): Data to write
+        output_file (str): Path to the target CSV file
+    """
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8", newline="") as f:
+        df.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, output_file)
+
+
+def with_base_columns(df, base_file):
+    """
+    Add the columns of base_file that a projected DataFrame left out
+
+    Rows are matched by position, so df must hold every row of base_file in
+    file order (as read_table() returns them).
+
+    Args:
+        df (DataFrame): Projected table, possibly with new columns
+        base_file (str): File df was read from
+
+    Returns:
+        DataFrame: Every column, in base_file's order followed by new ones
+    """
+    base_columns = read_columns(base_file)
+    missing = [column for column in base_columns if column not in df.columns]
+    if not missing:
+        return df
+
+    rest = read_table(base_file, columns=missing)
+    if len(rest) != len(df):
+        raise ValueError(f"{base_file} has {len(rest)} rows, the table being written has {len(df)}")
+
+    rest.index = df.index
+    combined = pd.concat([df, rest], axis=1)
+    order = [column for column in base_columns if column in combined.columns]
+    order += [column for column in df.columns if column not in order]
+    return combined[order]
+
+
+def write_table(df, path, base_file=None):
+    """
+    Atomically write a DataFrame in the format of path
+
+    Args:
+        df (DataFrame): Data to write
+        path (str): Target file, its extension picks the format
+        base_file (str, optional): File df was read from with a column
+            projection; the columns it left out are filled in from there
+    """
+    if base_file:
+        df = with_base_columns(df, base_file)
+
+    fmt = table_format(path)
+    if fmt == "csv":
+        atomic_write_csv(df, path)
+        return
+
+    writer = TableWriter(path)
+    try:
+        writer.write(df)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+
+def _arrow_schema(table):
+    """
+    Schema for a stream of tables, taken from the first one
+
+    Used when later tables aren't known yet, see _unified_schema() for
+    when they are.
+
+    Columns without a single value in the first table (e.g. an Email column
+    nothing has been found for yet) can't be typed from it and are stored
+    as text, which later values of any type can be cast to. Categorical
+    columns get 32-bit dictionary indices, so a later table with more
+    categories still fits.
+    """
+    fields = []
+    for field, column in zip(table.schema, table.columns):
+        if column.null_count == len(column) and len(column):
+            field = field.with_type(pa.string())
+        fields.append(_widen_dictionary(field))
+    return pa.schema(fields)
+
+
+def _unified_schema(schemas, dictionaries=True):
+    """
+    One schema every table of a stream can be cast to, from all their schemas
+
+    Types are promoted the way Arrow does it (int to float when a later part
+    has fractions, null to whatever a later part holds), columns whose types
+    can't be reconciled become text. Columns no table has a value for are
+    stored as text, and dictionaries get 32-bit indices, as in _arrow_schema().
+    Without dictionaries, categorical columns are stored as plain values:
+    an Arrow IPC (Feather) file holds one dictionary per column, so parts
+    with different categories can't share it.
+    """
+    fields = []
+    for name in schemas[0].names:
+        column_schemas = [pa.schema([schema.field(name)]) for schema in schemas]
+        try:
+            field = pa.unify_schemas(column_schemas, promote_options="permissive").field(name)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, NotImplementedError):
+            field = pa.field(name, pa.string())
+        if pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        elif pa.types.is_dictionary(field.type) and not dictionaries:
+            field = field.with_type(field.type.value_type)
+        fields.append(_widen_dictionary(field))
+    return pa.schema(fields)
+
+
+def _widen_dictionary(field):
+    # 32-bit dictionary indices, so a later table with more categories still fits
+    if pa.types.is_dictionary(field.type):
+        return field.with_type(pa.dictionary(pa.int32(), field.type.value_type, field.type.ordered))
+    return field
+
+
+class TableWriter:
+    """Streams DataFrames into one table file, replacing it atomically on close"""
+
+    def __init__(self, path, schema=None):
+        """
+        Open the writer
+
+        Args:
+            path (str): Target file, its extension picks the format
+            schema (pyarrow.Schema, optional): Schema of the columnar file
+                (default: taken from the first table written)
+        """
+        self.path = path
+        self.format = table_format(path)
+        self.tmp_file = f"{path}.tmp"
+        self.rows = 0
+
+        self._writer = None
+        self._schema = schema
+        self._handle = None
+
+        if self.format != "csv":
+            _require_pyarrow(path)
+
+    def write(self, df):
+        """
+        Append a DataFrame (one Parquet row group or Feather record batch)
+
+        Args:
+            df (DataFrame): Rows to append, with the same columns every time
+        """
+        if self.format == "csv":
+            if self._handle is None:
+                self._handle = open(self.tmp_file, "w", encoding="utf-8", newline="")
+                df.to_csv(self._handle, index=False)
+            else:
+                df.to_csv(self._handle, header=False, index=False)
+            self.rows += len(df)
+            return
+
+        self.write_arrow(pa.Table.from_pandas(df, preserve_index=False))
+
+    def write_arrow(self, table):
+        """
+        Append an Arrow table (columnar formats only)
+
+        Args:
+            table (pyarrow.Table): Rows to append
+        """
+        if self._writer is None:
+            if self._schema is None:
+                self._schema = _arrow_schema(table)
+            if self.format == "parquet":
+                self._writer = pq.ParquetWriter(self.tmp_file, self._schema)
+            else:
+                self._handle = pa.OSFile(self.tmp_file, "wb")
+                self._writer = ipc.new_file(self._handle, self._schema)
+
+        table = table.select(self._schema.names).cast(self._schema)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        """Finish the file and move it into place"""
+        if self.format == "csv":
+            if self._handle is None:
+                self._handle = open(self.tmp_file, "w", encoding="utf-8", newline="")
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self._handle.close()
+        else:
+            if self._writer is None:
+                # Nothing was written, still leave a valid (empty) file behind
+                self.write_arrow(pa.table({}))
+            self._writer.close()
+            if self._handle is not None:
+                self._handle.close()
+
+        os.replace(self.tmp_file, self.path)
+
+    def abort(self):
+        """Drop the partly written file"""
+        try:
+            if self._writer is not None:
+                self._writer.close()
+            if self._handle is not None:
+                self._handle.close()
+        finally:
+            if os.path.exists(self.tmp_file):
+                os.remove(self.tmp_file)
+
+
+class TablePartWriter:
+    """
+    Resumable chunk output for columnar files: one part file per chunk
+
+    Each finished chunk is written to its own file in <output>.parts/, so an
+    interrupted run keeps every finished chunk. finish() streams the parts
+    into the output file, one row group (or record batch) per part, and
+    removes the directory.
+    """
+
+    def __init__(self, output_file):
+        """
+        Open the part directory of an output file
+
+        Args:
+            output_file (str): Parquet or Feather output file
+        """
+        _require_pyarrow(output_file)
+        self.output_file = output_file
+        self.parts_dir = f"{output_file}.parts"
+        self.extension = os.path.splitext(output_file)[1]
+        os.makedirs(self.parts_dir, exist_ok=True)
+
+    def parts(self):
+        """Paths of the finished parts in order"""
+        return [
+            os.path.join(self.parts_dir, name)
+            for name in sorted(os.listdir(self.parts_dir))
+            if name.startswith("part-") and name.endswith(self.extension)
+        ]
+
+    def done_rows(self):
+        """Rows already in finished parts"""
+        return sum(count_table_rows(path) for path in self.parts())
+
+    def write(self, df):
+        """
+        Store a finished chunk as the next part
+
+        Args:
+            df (DataFrame): Finished chunk
+        """
+        path = os.path.join(self.parts_dir, f"part-{len(self.parts()):06d}{self.extension}")
+        write_table(df, path)
+
+    def finish(self):
+        """
+        Combine the parts into the output file and remove them
+
+        Returns:
+            int: Rows written to the output file
+        """
+        parts = self.parts()
+        # A later chunk may hold what the first can't (fractions in an int column)
+        schema = None
+        if parts:
+            schema = _unified_schema(
+                [_read_arrow_schema(path) for path in parts],
+                dictionaries=table_format(self.output_file) == "parquet"
+            )
+
+        writer = TableWriter(self.output_file, schema)
+        try:
+            for path in parts:
+                writer.write_arrow(_read_arrow(path))
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+
+        for path in self.parts():
+            os.remove(path)
+        os.rmdir(self.parts_dir)
+        return writer.rows
+
+
+def _read_arrow_schema(path):
+    if table_format(path) == "parquet":
+        return pq.read_schema(path)
+
+    with pa.memory_map(path) as source:
+        return ipc.open_file(source).schema
+
+
+def _read_arrow(path):
+    if table_format(path) == "parquet":
+        return pq.read_table(path)
+
+    with pa.memory_map(path) as source:
+        return ipc.open_file(source).read_all()
+
+
+def convert_table(source, target, chunk_size=100000):
+    """
+    Convert a table file to another format, streaming chunk by chunk
+
+    Args:
+        source (str): Input file
+        target (str): Output file, its extension picks the format
+        chunk_size (int): Rows held in memory at a time
+
+    Returns:
+        int: Rows converted
+    """
+    writer = TableWriter(target)
+    try:
+        for chunk in iter_table_chunks(source, chunk_size):
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return writer.rows
@@ -0,0 +1,103 @@
+"""
+Local token counting for prompt budgets
+
+Uses tiktoken when it is installed. The encoding is loaded once per model
+and cached. Without tiktoken (or when its encoding files can't be loaded),
+an estimate of four characters per token is used, which is close enough
+for English prose to keep prompts inside a budget.
+"""
+
+import logging
+from functools import lru_cache
+
+from email_finder.utils.lazy import lazy_import
+
+tiktoken = lazy_import("tiktoken", optional=True)
+
+logger = logging.getLogger("email_finder.tokens")
+
+# Characters per token assumed when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model):
+    """
+    Return the tiktoken encoding for a model, or None if unavailable
+
+    Args:
+        model (str): OpenAI model name
+
+    Returns:
+        tiktoken.Encoding: Cached encoding, or None to fall back to estimates
+    """
+    if tiktoken is None:
+        return None
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # e.g. the encoding file can't be downloaded on an offline machine
+        logger.warning(f"tiktoken unavailable for {model}, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text, model):
+    """
+    Count the tokens of text for a model
+
+    Args:
+        text (str): Text to count
+        model (str): OpenAI model name
+
+    Returns:
+        int: Number of tokens (estimated without tiktoken)
+    """
+    if not text:
+        return 0
+
+    encoding = get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens, model, marker="..."):
+    """
+    Cut text down to at most max_tokens tokens
+
+    The cut is moved back to the last whitespace so words aren't split,
+    and marker is appended to show the text was shortened.
+
+    Args:
+        text (str): Text to shorten
+        max_tokens (int): Token limit, including the marker
+        model (str): OpenAI model name
+        marker (str): Appended to truncated text
+
+    Returns:
+        str: text itself if it fits, otherwise the shortened text ("" if
+            not even the marker fits)
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    limit = max_tokens - count_tokens(marker, model)
+    if limit <= 0:
+        return ""
+
+    encoding = get_encoding(model)
+    if encoding is None:
+        cut = text[:limit * CHARS_PER_TOKEN]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:limit])
+
+    # Don't leave half a word behind
+    space = max(cut.rfind(" "), cut.rfind("\n"))
+    if space > len(cut) // 2:
+        cut = cut[:space]
+
+    return cut.rstrip() + marker
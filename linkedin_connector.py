@@ -2,22 +2,39 @@ import os
 import time
 import random
 import json
-import pandas as pd
+import argparse
 from datetime import datetime
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from openai import OpenAI
 import platform
 
+from email_finder.services.llm_client import chat_completion, open_call_log, print_usage_stats, write_usage_report
+from email_finder.utils.cassette import open_cassette
+from email_finder.utils.csv_handler import CheckpointJournal, describe_pending, select_pending_rows
+from email_finder.utils.dtypes import compact_dtypes, compact_dtypes_enabled, format_memory_report
+from email_finder.utils.lazy import lazy_attribute, lazy_import
+from email_finder.utils.lead_store import open_lead_store
+from email_finder.utils.profiling import add_profile_arguments, start_profiling
+from email_finder.utils.resume import ResumeState, describe_status, row_identities
+from email_finder.utils.table_io import read_table
+
+# Selenium's webdriver load when the browser starts, not for --help
+webdriver = lazy_import("selenium.webdriver")
+EC = lazy_import("selenium.webdriver.support.expected_conditions")
+Options = lazy_attribute("selenium.webdriver.chrome.options", "Options")
+By = lazy_attribute("selenium.webdriver.common.by", "By")
+WebDriverWait = lazy_attribute("selenium.webdriver.support.ui", "WebDriverWait")
+
 # Load environment variables
 load_dotenv()
 
 
+def connection_status(values):
+    """Resume state status of a row from the connection result journaled for it"""
+    status = values.get("Connection Status") or "unknown"
+    return "error" if status.startswith("Error") else status
+
+
 def generate_personalized_note(profile_data, character_limit=300):
     """
     Generate a personalized connection note based on LinkedIn profile data using OpenAI
@@ -30,13 +47,6 @@ def generate_personalized_note(profile_data, character_limit=300):
         str: Personalized connection note
     """
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        if not client:
-            print("⚠️ OpenAI client initialization failed")
-            return None
-
         # Create a prompt for the personalized note with improved guidelines
         prompt = f"""
         Create a brief, friendly LinkedIn connection request note (max {character_limit} characters) based on this profile:
@@ -61,8 +71,9 @@ def generate_personalized_note(profile_data, character_limit=300):
         Format as plain text without quotation marks.
         """
 
-        # Generate the note using OpenAI
-        response = client.chat.completions.create(
+        # Generate the note using the shared OpenAI client
+        response = chat_completion(
+            "note",
             model="gpt-4-turbo",  # Or a more appropriate model
             messages=[
                 {"role": "system",
@@ -709,7 +720,7 @@ def process_connections(input_file, output_file, connector, batch_size=5,
         return None
 
     try:
-        df = pd.read_csv(input_file)
+        df = read_table(input_file)
         print(f"CSV loaded successfully with {len(df)} rows and {len(df.columns)} columns")
 
         # Verify LinkedIn Profile column exists
@@ -731,8 +742,57 @@ def process_connections(input_file, output_file, connector, batch_size=5,
             df["Connection Note"] = ""
             print("Added 'Connection Note' column to the dataframe")
 
-        # Track progress
+        # With LEAD_STORE set, leads contacted by any earlier run are skipped
+        store = open_lead_store("connector")
+        if store is not None:
+            added, filled = store.merge(
+                df, ["Connection Status", "Connection Date", "Connection Note"], ["Connection Status"]
+            )
+            print(f"Lead store {store.path}: {added} new leads, {filled} already contacted")
+
+        # Rows finished by an earlier run get their status back from the output
+        state = ResumeState(output_file, connection_status)
+        identities = row_identities(df)
+        restored = state.restore(
+            df, identities, ["Connection Status", "Connection Date", "Connection Note"], ["Connection Status"]
+        )
+        if len(state):
+            print(f"Resuming: {len(state)} rows finished by earlier runs, {restored} restored from {output_file}")
+
+        # Categoricals and Arrow strings instead of one Python object per cell
+        if compact_dtypes_enabled():
+            print("\n".join(format_memory_report(compact_dtypes(df))))
+
+        # Recover rows journaled by an interrupted earlier run
+        journal = CheckpointJournal(output_file, df, store=store, state=state)
+        recovered = journal.replay()
+        if recovered:
+            print(f"Recovered {recovered} rows from checkpoint journal {journal.journal_file}")
+
+        # Work out once which rows still need a connection request
         total_rows = len(df)
+        positions, counts = select_pending_rows(
+            df, "LinkedIn Profile", ["Connection Status"], start_row, state.done_mask(identities)
+        )
+        pending_rows = len(positions)
+
+        # Plain per-row tuples for the fields the loop reads
+        def column_values(name):
+            if name in df.columns:
+                return df[name].to_numpy()[positions]
+            return [""] * pending_rows
+
+        rows = list(zip(
+            df.index.to_numpy()[positions],
+            column_values("LinkedIn Profile"),
+            column_values("First Name"),
+            column_values("Last Name"),
+            column_values("Full Name"),
+            column_values("Company Name"),
+            column_values("Job Title")
+        ))
+
+        # Track progress
         processed_rows = 0
         requests_sent = 0
         requests_failed = 0
@@ -744,25 +804,27 @@ def process_connections(input_file, output_file, connector, batch_size=5,
         print(f"Batch size: {batch_size}")
         print(f"Maximum requests: {max_requests}")
         print(f"Using AI-generated notes: {use_ai_notes}")
+        print(describe_pending(counts, "without a LinkedIn URL", "already processed"))
 
         # Get current date for tracking
         current_date = time.strftime("%Y-%m-%d")
 
-        # Process in batches
-        for i in range(start_row, total_rows, batch_size):
+        # Process the pending rows in batches
+        for i in range(0, pending_rows, batch_size):
             if requests_sent >= max_requests:
                 print(f"\n⚠️ Maximum requests reached ({max_requests})")
                 print("Saving progress and exiting...")
-                df.to_csv(output_file, index=False)
                 return df
 
-            batch_end = min(i + batch_size, total_rows)
+            batch_end = min(i + batch_size, pending_rows)
             print(f"\n{'=' * 50}")
-            print(f"Processing batch {i // batch_size + 1}: rows {i} to {batch_end - 1}")
+            print(f"Processing batch {i // batch_size + 1}: rows {positions[i] + 1} to {positions[batch_end - 1] + 1}")
             print(f"{'=' * 50}")
 
             # Process each row in the batch
-            for j in range(i, batch_end):
+            for k in range(i, batch_end):
+                j, linkedin_url, first_name, last_name, full_name, company, title = rows[k]
+
                 # Check if we've reached the limit
                 if requests_sent >= max_requests:
                     print(f"\n⚠️ Maximum requests reached ({max_requests})")
@@ -777,32 +839,18 @@ def process_connections(input_file, output_file, connector, batch_size=5,
 
                 try:
                     print(f"\n{'*' * 30}")
-                    print(f"Row {j + 1}/{total_rows}: Processing")
-
-                    # Get LinkedIn URL
-                    linkedin_url = df.iloc[j]["LinkedIn Profile"]
-
-                    # Skip if URL is missing
-                    if pd.isna(linkedin_url) or linkedin_url == "":
-                        print(f"⚠️ Row {j + 1}: No LinkedIn URL, skipping")
-                        continue
-
-                    # Skip if already processed
-                    if not pd.isna(df.iloc[j]["Connection Status"]) and df.iloc[j]["Connection Status"] != "":
-                        print(f"⚠️ Row {j + 1}: Already processed, skipping")
-                        continue
+                    print(f"Row {positions[k] + 1}/{total_rows}: Processing")
 
                     print(f"Processing URL: {linkedin_url}")
 
                     # Create personalized note if template provided and not using AI
                     personalized_note = None
                     if personalized_note_template and not use_ai_notes:
-                        # Get data for personalization
-                        first_name = df.iloc[j].get("First Name", "")
-                        last_name = df.iloc[j].get("Last Name", "")
-                        full_name = df.iloc[j].get("Full Name", "")
-                        company = df.iloc[j].get("Company Name", "")
-                        title = df.iloc[j].get("Job Title", "")
+                        # Missing values come through as NaN
+                        first_name, last_name, full_name, company, title = (
+                            value if isinstance(value, str) else ""
+                            for value in (first_name, last_name, full_name, company, title)
+                        )
 
                         if not first_name and full_name:
                             # Try to extract first name from full name
@@ -829,14 +877,14 @@ def process_connections(input_file, output_file, connector, batch_size=5,
                     result = connector.send_connection_request(linkedin_url, personalized_note, use_ai_notes)
 
                     # Update status in DataFrame based on result
-                    df.at[j, "Connection Status"] = result["status"]
+                    updates = {"Connection Status": result["status"]}
                     if result["success"]:
-                        df.at[j, "Connection Date"] = current_date
+                        updates["Connection Date"] = current_date
                         if result["status"] == "request_sent":
                             requests_sent += 1
                             # Save the note used (if any)
                             if personalized_note:
-                                df.at[j, "Connection Note"] = personalized_note
+                                updates["Connection Note"] = personalized_note
                         print(f"✅ Row {j + 1}: {result['status']}")
                         consecutive_errors = 0  # Reset consecutive errors counter
                     else:
@@ -846,35 +894,34 @@ def process_connections(input_file, output_file, connector, batch_size=5,
                         if "error" in result["status"].lower():
                             consecutive_errors += 1
 
-                    # Save progress after each profile
-                    df.to_csv(output_file, index=False)
-                    print(f"Progress saved to {output_file}")
+                    # Journal progress after each profile
+                    journal.apply(j, updates)
+                    print(f"Progress journaled to {journal.journal_file}")
 
                     # Add random delay between profiles for safety
-                    if j < batch_end - 1 and requests_sent < max_requests:
+                    if k < batch_end - 1 and requests_sent < max_requests:
                         delay = random.uniform(45, 75)  # 45-75 seconds between profiles
                         print(f"Adding delay of {delay:.2f} seconds before next profile...")
                         time.sleep(delay)
 
                 except Exception as e:
                     print(f"❌ Error processing row {j + 1}: {str(e)}")
-                    df.at[j, "Connection Status"] = f"Error: {str(e)}"
                     consecutive_errors += 1
-                    # Save on error to preserve progress
-                    df.to_csv(output_file, index=False)
+                    # Journal the error to preserve progress
+                    journal.apply(j, {"Connection Status": f"Error: {str(e)}"})
 
             # After each batch, take a longer break
-            if batch_end < total_rows and requests_sent < max_requests:
+            if batch_end < pending_rows and requests_sent < max_requests:
                 batch_delay = random.uniform(300, 600)  # 5-10 minutes between batches
                 print(f"\nTaking a longer break for {batch_delay / 60:.2f} minutes between batches...")
                 time.sleep(batch_delay)
 
-            # Save progress after each batch
+            # Compact the journal into the output CSV after each batch
             print(f"\nSaving progress to {output_file}...")
-            df.to_csv(output_file, index=False)
+            journal.compact()
             processed_rows += batch_end - i
-            completion_percentage = processed_rows / total_rows * 100
-            print(f"Progress: {processed_rows}/{total_rows} rows processed ({completion_percentage:.2f}%)")
+            completion_percentage = processed_rows / pending_rows * 100
+            print(f"Progress: {processed_rows}/{pending_rows} pending rows processed ({completion_percentage:.2f}%)")
             print(f"Connection requests: {requests_sent} sent, {requests_failed} failed")
 
         return df
@@ -883,9 +930,39 @@ def process_connections(input_file, output_file, connector, batch_size=5,
         print(f"❌ Error processing CSV: {str(e)}")
         return None
 
+    finally:
+        # Compact on the way out so no journaled row is lost
+        if 'journal' in locals():
+            journal.close()
+        if 'store' in locals() and store is not None:
+            store.close()
+        if 'state' in locals():
+            state.close()
+
 
 def main():
     """Main function to run the LinkedIn connection automation"""
+    parser = argparse.ArgumentParser(
+        description="Send LinkedIn connection requests to a lead list (configured through .env)"
+    )
+    parser.add_argument(
+        "--status",
+        help="Show the progress of the configured output file and exit",
+        action="store_true"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.status:
+        output_file = os.getenv("OUTPUT_CSV", "connection_status.csv")
+        print("\n".join(describe_status(os.getenv("INPUT_CSV", "input.csv"), output_file)))
+        return
+
+    # Record or replay the OpenAI calls when CASSETTE is set (the browser isn't intercepted)
+    open_cassette()
+    if args.profile:
+        start_profiling(os.getenv("OUTPUT_CSV", "connection_status.csv"), args.profile_top)
+
     print("\n" + "=" * 70)
     print("LinkedIn Connection Automation Tool")
     print("=" * 70 + "\n")
@@ -998,6 +1075,8 @@ def main():
 
         # Process the CSV file and send connection requests
         print("\nBeginning connection request process...")
+        if use_ai_notes:
+            open_call_log(output_file)
         df = process_connections(
             input_file,
             output_file,
@@ -1031,6 +1110,9 @@ def main():
                 print(f"Could not save weekly tracking data: {str(e)}")
 
             print(f"\n✅ Processing complete. Results saved to {output_file}")
+            if use_ai_notes:
+                print_usage_stats()
+                write_usage_report(output_file)
         else:
             print("\n❌ Processing failed. Check the error messages above.")
 
@@ -1,21 +1,45 @@
 import os
 import time
 import random
-import pandas as pd
+import argparse
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import openai
 import platform
 
+from email_finder.services.llm_client import open_call_log, print_usage_stats, write_usage_report
+from email_finder.services.summary_generator import (
+    generate_summary,
+    print_prompt_stats,
+    print_summary_cache_stats,
+    summary_cache_savings
+)
+from email_finder.utils.cassette import open_cassette
+from email_finder.utils.csv_handler import CheckpointJournal, describe_pending, select_pending_rows
+from email_finder.utils.dtypes import compact_dtypes, compact_dtypes_enabled, format_memory_report
+from email_finder.utils.lazy import lazy_attribute, lazy_import
+from email_finder.utils.lead_store import open_lead_store
+from email_finder.utils.profiling import add_profile_arguments, start_profiling
+from email_finder.utils.resume import ResumeState, describe_status, row_identities
+from email_finder.utils.table_io import read_table
+
+# Selenium's webdriver (and pandas) load when the browser starts, not for --help
+webdriver = lazy_import("selenium.webdriver")
+EC = lazy_import("selenium.webdriver.support.expected_conditions")
+Options = lazy_attribute("selenium.webdriver.chrome.options", "Options")
+By = lazy_attribute("selenium.webdriver.common.by", "By")
+WebDriverWait = lazy_attribute("selenium.webdriver.support.ui", "WebDriverWait")
+pd = lazy_import("pandas")
+
 # Load environment variables
 load_dotenv()
 
 
+def summary_status(values):
+    """Resume state status of a row from the summary journaled for it"""
+    summary = values.get("LinkedIn Summary") or ""
+    return "failed" if summary.startswith("[") else "summarized"
+
+
 class LinkedInScraper:
     def __init__(self, linkedin_email, linkedin_password):
         self.linkedin_email = linkedin_email
@@ -582,58 +606,6 @@ class LinkedInScraper:
         print("Browser closed successfully")
 
 
-def generate_summary(profile_data):
-    """Generate a summary of the LinkedIn profile using OpenAI"""
-    try:
-        print("Generating summary using OpenAI...")
-
-        # Check if we have at least some data to work with
-        if not profile_data or (not profile_data.get("name") and not profile_data.get("title")):
-            print("⚠️ Insufficient profile data for summary generation")
-            return ""
-
-        # Create prompt with available data
-        prompt_parts = [
-            "Create a professional summary for a sales outreach based on this LinkedIn profile information:"
-        ]
-
-        # Add all profile data we have
-        for key, value in profile_data.items():
-            if value:
-                prompt_parts.append(f"{key.capitalize()}: {value}")
-
-        # Add instructions
-        prompt_parts.append(
-            "The summary should be concise (2-3 sentences) and highlight the person's current role, experience, "
-            "and any relevant background that would be useful for sales outreach. Focus on their professional "
-            "capabilities and decision-making authority. If some information is missing, focus on what is available."
-        )
-
-        prompt = "\n\n".join(prompt_parts)
-
-        print("Sending request to OpenAI API...")
-
-        # Use the new OpenAI API format (v1.0.0+)
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {"role": "system", "content": "You are an assistant that creates concise professional summaries."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=250,
-            temperature=0.7
-        )
-
-        summary = response.choices[0].message.content.strip()
-        print(f"Summary generated: {summary[:100]}...")
-        return summary
-
-    except Exception as e:
-        print(f"❌ Error generating summary: {str(e)}")
-        return f"[ERROR: {str(e)}]"  # Return error message instead of empty string
-
-
 def process_csv(input_file, output_file, linkedin_scraper, batch_size=5, start_row=0):
     """Process the CSV file in batches to handle large datasets"""
     # Read the CSV file
@@ -647,7 +619,7 @@ def process_csv(input_file, output_file, linkedin_scraper, batch_size=5, start_r
         return None
 
     try:
-        df = pd.read_csv(input_file)
+        df = read_table(input_file)
         print(f"CSV loaded successfully with {len(df)} rows and {len(df.columns)} columns")
 
         # Verify LinkedIn Profile column exists
@@ -665,48 +637,67 @@ def process_csv(input_file, output_file, linkedin_scraper, batch_size=5, start_r
             df["LinkedIn Summary"] = df["LinkedIn Summary"].fillna("")
             print("Initialized existing LinkedIn Summary column")
 
+        # With LEAD_STORE set, leads summarized by any earlier run are skipped
+        store = open_lead_store("scraper")
+        if store is not None:
+            added, filled = store.merge(df, ["LinkedIn Summary"])
+            print(f"Lead store {store.path}: {added} new leads, {filled} summaries already stored")
+
+        # Rows finished by an earlier run get their summaries back from the output
+        state = ResumeState(output_file, summary_status)
+        identities = row_identities(df)
+        restored = state.restore(df, identities, ["LinkedIn Summary"])
+        if len(state):
+            print(f"Resuming: {len(state)} rows finished by earlier runs, {restored} restored from {output_file}")
+
+        # Categoricals and Arrow strings instead of one Python object per cell
+        if compact_dtypes_enabled():
+            print("\n".join(format_memory_report(compact_dtypes(df))))
+
+        # Recover rows journaled by an interrupted earlier run
+        journal = CheckpointJournal(output_file, df, store=store, state=state)
+        recovered = journal.replay()
+        if recovered:
+            print(f"Recovered {recovered} rows from checkpoint journal {journal.journal_file}")
+
         # Print first few rows for verification
         print("\nSample of LinkedIn URLs from CSV:")
-        for i in range(min(3, len(df))):
-            url = df.iloc[i]["LinkedIn Profile"] if not pd.isna(df.iloc[i]["LinkedIn Profile"]) else "N/A"
-            print(f"  Row {i + 1}: {url}")
+        for i, url in enumerate(df["LinkedIn Profile"].head(3)):
+            print(f"  Row {i + 1}: {url if not pd.isna(url) else 'N/A'}")
 
-        # Track progress
+        # Work out once which rows still need a summary
         total_rows = len(df)
+        positions, counts = select_pending_rows(
+            df, "LinkedIn Profile", ["LinkedIn Summary"], start_row, state.done_mask(identities)
+        )
+        labels = df.index.to_numpy()[positions]
+        urls = df["LinkedIn Profile"].to_numpy()[positions]
+        pending_rows = len(positions)
         processed_rows = 0
 
         print(f"\nTotal rows in CSV: {total_rows}")
         print(f"Starting from row: {start_row}")
         print(f"Batch size: {batch_size}")
+        print(describe_pending(counts, "without a LinkedIn URL", "already summarized"))
 
         # Add safety code to prevent excessive rate limiting
         consecutive_failures = 0
         max_consecutive_failures = 3
 
-        # Process in batches
-        for i in range(start_row, total_rows, batch_size):
-            batch_end = min(i + batch_size, total_rows)
+        # Process the pending rows in batches
+        for i in range(0, pending_rows, batch_size):
+            batch_end = min(i + batch_size, pending_rows)
             print(f"\n{'=' * 50}")
-            print(f"Processing batch {i // batch_size + 1}: rows {i} to {batch_end - 1}")
+            print(f"Processing batch {i // batch_size + 1}: rows {positions[i] + 1} to {positions[batch_end - 1] + 1}")
             print(f"{'=' * 50}")
 
             # Process each row in the batch
-            for j in range(i, batch_end):
+            for k in range(i, batch_end):
+                j = labels[k]
+                linkedin_url = urls[k]
                 try:
                     print(f"\n{'*' * 30}")
-                    print(f"Row {j + 1}/{total_rows}: Processing")
-
-                    # Get LinkedIn URL
-                    linkedin_url = df.iloc[j]["LinkedIn Profile"]
-
-                    # Skip if URL is missing or already has a summary
-                    if pd.isna(linkedin_url) or linkedin_url == "":
-                        print(f"⚠️ Row {j + 1}: No LinkedIn URL, skipping")
-                        continue
-
-                    if not pd.isna(df.iloc[j]["LinkedIn Summary"]) and df.iloc[j]["LinkedIn Summary"] != "":
-                        print(f"⚠️ Row {j + 1}: Already has a summary, skipping")
-                        continue
+                    print(f"Row {positions[k] + 1}/{total_rows}: Processing")
 
                     print(f"Processing URL: {linkedin_url}")
 
@@ -739,39 +730,20 @@ def process_csv(input_file, output_file, linkedin_scraper, batch_size=5, start_r
                         try:
                             summary = generate_summary(profile_data)
                             if summary:
-                                # Directly update the DataFrame with the summary
-                                df.at[j, "LinkedIn Summary"] = summary
-
-                                # Immediately save the DataFrame to CSV after each summary
-                                # to ensure changes are persisted
-                                df.to_csv(output_file, index=False)
-
+                                # Update the DataFrame and append the summary to the
+                                # checkpoint journal so it survives a crash
+                                journal.apply(j, {"LinkedIn Summary": summary})
                                 print(f"✅ Row {j + 1}: Summary generated and saved")
-
-                                # Verify the summary was saved by reading it back
-                                try:
-                                    verify_df = pd.read_csv(output_file)
-                                    saved_summary = verify_df.iloc[j]["LinkedIn Summary"] if j < len(
-                                        verify_df) else None
-                                    if saved_summary and saved_summary == summary:
-                                        print(f"✓ Verified summary was saved correctly")
-                                    else:
-                                        print(f"⚠️ Summary may not have been saved correctly")
-                                except Exception as e:
-                                    print(f"⚠️ Could not verify saved summary: {str(e)}")
                             else:
                                 print(f"⚠️ Row {j + 1}: Failed to generate summary")
-                                df.at[j, "LinkedIn Summary"] = "[SUMMARY GENERATION FAILED]"
-                                df.to_csv(output_file, index=False)
+                                journal.apply(j, {"LinkedIn Summary": "[SUMMARY GENERATION FAILED]"})
                         except Exception as e:
                             print(f"❌ Row {j + 1}: Error generating summary: {str(e)}")
-                            df.at[j, "LinkedIn Summary"] = f"[SUMMARY ERROR: {str(e)}]"
-                            df.to_csv(output_file, index=False)
+                            journal.apply(j, {"LinkedIn Summary": f"[SUMMARY ERROR: {str(e)}]"})
                     else:
                         print(f"❌ Row {j + 1}: Failed to scrape profile after retries")
                         # Add a placeholder to indicate this was processed but failed
-                        df.at[j, "LinkedIn Summary"] = "[SCRAPING FAILED]"
-                        df.to_csv(output_file, index=False)
+                        journal.apply(j, {"LinkedIn Summary": "[SCRAPING FAILED]"})
 
                     # Safety check - take longer break if too many consecutive failures
                     if consecutive_failures >= max_consecutive_failures:
@@ -780,7 +752,7 @@ def process_csv(input_file, output_file, linkedin_scraper, batch_size=5, start_r
                         print("Taking an extended break to avoid IP ban...")
 
                         # Save progress before extended break
-                        df.to_csv(output_file, index=False)
+                        journal.compact()
                         print(f"Progress saved to {output_file}")
 
                         # Long cooling off period
@@ -792,25 +764,25 @@ def process_csv(input_file, output_file, linkedin_scraper, batch_size=5, start_r
                         consecutive_failures = 0
 
                     # Add random delay between profiles - longer than before
-                    if j < batch_end - 1:  # Skip delay after last profile in batch
+                    if k < batch_end - 1:  # Skip delay after last profile in batch
                         delay = random.uniform(10, 20)  # Increased from 2-5 to 10-20 seconds
                         print(f"Adding delay of {delay:.2f} seconds before next profile...")
                         time.sleep(delay)
 
                 except Exception as e:
                     print(f"❌ Error processing row {j + 1}: {str(e)}")
-                    # Save on error to preserve progress
-                    df.to_csv(output_file, index=False)
+                    # Flush the journal on error to preserve progress
+                    journal.sync()
 
-            # Save progress after each batch
+            # Compact the journal into the output CSV after each batch
             print(f"\nSaving progress to {output_file}...")
-            df.to_csv(output_file, index=False)
+            journal.compact()
             processed_rows += batch_end - i
-            completion_percentage = processed_rows / total_rows * 100
-            print(f"Progress: {processed_rows}/{total_rows} rows processed ({completion_percentage:.2f}%)")
+            completion_percentage = processed_rows / pending_rows * 100
+            print(f"Progress: {processed_rows}/{pending_rows} pending rows processed ({completion_percentage:.2f}%)")
 
             # Longer delay between batches to avoid rate limiting
-            if batch_end < total_rows:
+            if batch_end < pending_rows:
                 delay = random.uniform(45, 90)  # Increased from 15-30 to 45-90 seconds
                 print(f"Taking a longer break for {delay:.2f} seconds between batches...")
                 time.sleep(delay)
@@ -821,9 +793,39 @@ def process_csv(input_file, output_file, linkedin_scraper, batch_size=5, start_r
         print(f"❌ Error processing CSV: {str(e)}")
         return None
 
+    finally:
+        # Compact on the way out so no journaled row is lost
+        if 'journal' in locals():
+            journal.close()
+        if 'store' in locals() and store is not None:
+            store.close()
+        if 'state' in locals():
+            state.close()
+
 
 def main():
     """Main function to run the LinkedIn scraper"""
+    parser = argparse.ArgumentParser(
+        description="Scrape LinkedIn profiles and summarize them (configured through .env)"
+    )
+    parser.add_argument(
+        "--status",
+        help="Show the progress of the configured output file and exit",
+        action="store_true"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.status:
+        output_file = os.getenv("OUTPUT_CSV", "leads_with_summaries.csv")
+        print("\n".join(describe_status(os.getenv("INPUT_CSV", "input.csv"), output_file)))
+        return
+
+    # Record or replay the OpenAI calls when CASSETTE is set (the browser isn't intercepted)
+    open_cassette()
+    if args.profile:
+        start_profiling(os.getenv("OUTPUT_CSV", "leads_with_summaries.csv"), args.profile_top)
+
     print("\n" + "=" * 70)
     print("Starting LinkedIn Profile Scraper and Summary Generator")
     print("=" * 70 + "\n")
@@ -887,6 +889,7 @@ def main():
 
         # Process the CSV file
         print("\nBeginning CSV processing...")
+        open_call_log(output_file)
         df = process_csv(input_file, output_file, scraper, batch_size, start_row)
 
         # Verify summaries were saved
@@ -894,7 +897,10 @@ def main():
             # Verify summaries were saved by checking the final output file
             print("\nVerifying saved summaries...")
             try:
-                verification_df = pd.read_csv(output_file)
+                verification_df = read_table(
+                    output_file,
+                    columns=["First Name", "Last Name", "Full Name", "LinkedIn Summary"]
+                )
 
                 summaries_found = verification_df["LinkedIn Summary"].notna() & (
                             verification_df["LinkedIn Summary"] != "")
@@ -914,6 +920,10 @@ def main():
                         print(f"Summary: {summary}")
 
                 print(f"\n✅ Processing complete. Results saved to {output_file}")
+                print_summary_cache_stats()
+                print_prompt_stats()
+                print_usage_stats()
+                write_usage_report(output_file, summary_cache_savings())
             except Exception as e:
                 print(f"⚠️ Error verifying summaries: {str(e)}")
                 print(f"Output file should still be saved at: {output_file}")
@@ -20,12 +20,18 @@ import argparse
 import logging
 from urllib.parse import urlparse
 
-import requests
-import pandas as pd
-import dns.resolver
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
+from email_finder.services.domain_discovery import canonicalize_company_name
+from email_finder.utils.cache import MISSING, open_default_cache
+from email_finder.utils.csv_handler import CsvRowIndex
+from email_finder.utils.lazy import lazy_attribute, lazy_import
+
+# Loaded on first use, a single lookup shouldn't wait for all of them
+requests = lazy_import("requests")
+dns_resolver = lazy_import("dns.resolver")
+BeautifulSoup = lazy_attribute("bs4", "BeautifulSoup")
+
 # Load environment variables
 load_dotenv()
 
@@ -53,6 +59,9 @@ class EmailFinderTest:
         self.domain_cache = {}
         self.mx_cache = {}
 
+        # On-disk cache shared with email-finder.py
+        self.persistent_cache = open_default_cache()
+
         # Load API keys
         self.hunter_api_key = os.getenv("HUNTER_API_KEY", "")
         self.email_validator_key = os.getenv("EMAIL_VALIDATOR_KEY", "")
@@ -69,6 +78,14 @@ class EmailFinderTest:
 
         logger.info(f"Step 1: Finding domain for company: {company_name}")
 
+        # Same cache key as email-finder.py
+        cache_key = canonicalize_company_name(company_name)
+        if self.persistent_cache:
+            cached = self.persistent_cache.get("domain", cache_key)
+            if cached is not MISSING:
+                logger.info(f"Found domain in persistent cache: {cached}")
+                return cached
+
         try:
             # Create search query
             query = f"{company_name} official website"
@@ -104,6 +121,8 @@ class EmailFinderTest:
 
             if potential_domains:
                 logger.info(f"Found domain: {potential_domains[0]}")
+                if self.persistent_cache:
+                    self.persistent_cache.set("domain", cache_key, potential_domains[0])
                 return potential_domains[0]
 
             # Fall back to pattern matching if no domain found
@@ -111,6 +130,9 @@ class EmailFinderTest:
             clean_name = re.sub(r'[^a-z0-9]', '', company_name.lower())
             potential_domain = f"{clean_name}.com"
             logger.info(f"Using pattern-based domain: {potential_domain}")
+            if self.persistent_cache:
+                # A pattern-based guess is a negative search result, retry it sooner
+                self.persistent_cache.set("domain", cache_key, potential_domain, self.persistent_cache.negative_ttl)
             return potential_domain
 
         except Exception as e:
@@ -161,6 +183,12 @@ class EmailFinderTest:
 
         logger.info(f"Step 3: Verifying email: {email}")
 
+        if self.persistent_cache:
+            cached = self.persistent_cache.get("verification", email)
+            if cached is not MISSING:
+                logger.info(f"Verification result from persistent cache: {cached}")
+                return cached
+
         # Basic syntax check
         email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
         if not re.match(email_pattern, email):
@@ -171,15 +199,11 @@ class EmailFinderTest:
 
         # Check if MX record exists
         try:
-            logger.debug(f"Looking up MX records for domain: {domain}")
-            mx_records = dns.resolver.resolve(domain, 'MX')
-            if not mx_records:
+            mx_record = self._get_mx_record(domain)
+            if not mx_record:
                 logger.debug(f"No MX record found for domain: {domain}")
                 return False
 
-            mx_record = str(sorted(mx_records, key=lambda x: x.preference)[0].exchange)
-            logger.debug(f"Found MX record: {mx_record}")
-
             # SMTP verification - only enable this if you want aggressive checking
             try:
                 logger.debug(f"Attempting SMTP verification (this may be blocked by some servers)")
@@ -225,6 +249,10 @@ class EmailFinderTest:
                 else:
                     logger.info(f"Email rejected via SMTP: {email}")
 
+                if self.persistent_cache:
+                    ttl = None if is_valid else self.persistent_cache.negative_ttl
+                    self.persistent_cache.set("verification", email, is_valid, ttl)
+
                 return is_valid
 
             except Exception as e:
@@ -237,6 +265,35 @@ class EmailFinderTest:
             logger.error(f"DNS resolution error: {str(e)}")
             return False
 
+    def _get_mx_record(self, domain):
+        """Look up the preferred MX host for a domain, using the persistent cache"""
+        if self.persistent_cache:
+            cached = self.persistent_cache.get("mx", domain)
+            if cached is not MISSING:
+                logger.debug(f"MX record from persistent cache: {cached}")
+                return cached
+
+        logger.debug(f"Looking up MX records for domain: {domain}")
+        try:
+            mx_records = dns_resolver.resolve(domain, 'MX')
+        except (dns_resolver.NXDOMAIN, dns_resolver.NoAnswer):
+            # The domain definitely has no MX record, cache it as a negative result
+            if self.persistent_cache:
+                self.persistent_cache.set("mx", domain, None)
+            return None
+
+        if not mx_records:
+            return None
+
+        mx_record = str(sorted(mx_records, key=lambda x: x.preference)[0].exchange)
+        logger.debug(f"Found MX record: {mx_record}")
+
+        if self.persistent_cache:
+            # Honour the DNS TTL of the answer
+            self.persistent_cache.set("mx", domain, mx_record, max(mx_records.rrset.ttl, 60))
+
+        return mx_record
+
     def try_hunter_api(self, first_name, last_name, domain):
         """Try to find email using Hunter.io API"""
         if not self.hunter_api_key:
@@ -392,20 +449,20 @@ class EmailFinderTest:
 def process_csv_row(csv_file, row_number):
     """Process a single row from a CSV file"""
     try:
-        # Read the CSV file
-        df = pd.read_csv(csv_file)
+        # Open the byte-offset row index instead of parsing the whole file
+        index = CsvRowIndex(csv_file)
 
         # Check if row number is valid
-        if row_number < 0 or row_number >= len(df):
-            logger.error(f"Invalid row number: {row_number}. CSV has {len(df)} rows (0-{len(df) - 1})")
+        if row_number < 0 or row_number >= len(index):
+            logger.error(f"Invalid row number: {row_number}. CSV has {len(index)} rows (0-{len(index) - 1})")
             return False
 
         # Get row data
-        row = df.iloc[row_number]
+        row = index.read_row(row_number)
 
         # Check for required columns
         required_cols = ["First Name", "Last Name", "Company Name"]
-        missing_cols = [col for col in required_cols if col not in df.columns]
+        missing_cols = [col for col in required_cols if col not in index.columns]
 
         if missing_cols:
             # Try alternative column names
@@ -418,7 +475,7 @@ def process_csv_row(csv_file, row_number):
             for missing in missing_cols[:]:
                 found = False
                 for alt in alt_cols[missing]:
-                    if alt in df.columns:
+                    if alt in index.columns:
                         logger.info(f"Using '{alt}' for '{missing}'")
                         if missing == "First Name":
                             first_name = row[alt]
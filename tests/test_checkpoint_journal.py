@@ -0,0 +1,120 @@
+"""Tests for crash replay of email_finder.utils.csv_handler.CheckpointJournal"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from email_finder.utils.csv_handler import CheckpointJournal
+
+
+def _leads():
+    return pd.DataFrame({
+        "LinkedIn Profile": [
+            "https://www.linkedin.com/in/ann-a/",
+            "https://www.linkedin.com/in/bob-b/",
+            None,
+        ],
+        "First Name": ["Ann", "Bob", "Cy"],
+        "Last Name": ["A", "B", "C"],
+        "Company Name": ["Acme", "Globex", "Initech"],
+        "Email": [None, None, None],
+    })
+
+
+@pytest.fixture
+def journal_file(tmp_path):
+    """Journal of an interrupted run that finished Bob and Cy"""
+    path = str(tmp_path / "leads.journal")
+
+    # Without an output file close() keeps the journal, as a crash would
+    journal = CheckpointJournal(None, _leads(), journal_file=path)
+    journal.apply(1, {"Email": "bob@globex.com"})
+    journal.apply(2, {"Email": "cy@initech.com"})
+    journal.close()
+    return path
+
+
+def _replay(df, journal_file):
+    journal = CheckpointJournal(None, df, journal_file=journal_file)
+    try:
+        return journal.replay()
+    finally:
+        journal.close()
+
+
+def test_replay_restores_journaled_values(journal_file):
+    df = _leads()
+
+    assert _replay(df, journal_file) == 2
+    assert df["Email"].tolist() == [None, "bob@globex.com", "cy@initech.com"]
+
+
+def test_torn_tail_is_ignored_and_cut_off(journal_file):
+    good_size = os.path.getsize(journal_file)
+    with open(journal_file, "ab") as f:
+        f.write(b'0badc0de\t{"row": 0, "id": null, "values": {"Email": "ann@ac')
+
+    df = _leads()
+    journal = CheckpointJournal(None, df, journal_file=journal_file)
+    assert journal.replay() == 2
+    assert os.path.getsize(journal_file) == good_size
+
+    # New records follow the last good one
+    journal.apply(0, {"Email": "ann@acme.com"})
+    journal.close()
+
+    df = _leads()
+    assert _replay(df, journal_file) == 3
+    assert df["Email"].tolist() == ["ann@acme.com", "bob@globex.com", "cy@initech.com"]
+
+
+def test_corrupt_record_stops_replay(journal_file):
+    with open(journal_file, "rb") as f:
+        lines = f.readlines()
+    # Flip a character of the first record's payload so its checksum fails
+    lines[0] = lines[0].replace(b"bob@", b"rob@")
+    with open(journal_file, "wb") as f:
+        f.writelines(lines)
+
+    df = _leads()
+    assert _replay(df, journal_file) == 0
+    assert df["Email"].isna().all()
+
+
+def test_replay_follows_rows_to_their_new_position(journal_file):
+    # The input was reordered and grew a row before the restart
+    df = pd.concat([_leads().iloc[::-1], pd.DataFrame({
+        "LinkedIn Profile": ["linkedin.com/in/dee-d"],
+        "First Name": ["Dee"],
+        "Last Name": ["D"],
+        "Company Name": ["Umbrella"],
+        "Email": [None],
+    })], ignore_index=True)
+
+    assert _replay(df, journal_file) == 2
+    assert df.set_index("First Name")["Email"].to_dict() == {
+        "Cy": "cy@initech.com",
+        "Bob": "bob@globex.com",
+        "Ann": None,
+        "Dee": None,
+    }
+
+
+def test_records_of_removed_leads_are_dropped(journal_file):
+    df = _leads().iloc[[0, 2]].reset_index(drop=True)
+
+    assert _replay(df, journal_file) == 1
+    assert df["Email"].tolist() == [None, "cy@initech.com"]
+
+
+def test_replay_widens_columns_that_cannot_hold_a_value(tmp_path):
+    path = str(tmp_path / "leads.journal")
+    df = _leads().assign(Confidence=pd.array([None, None, None], dtype="Int16"))
+    journal = CheckpointJournal(None, df.copy(), journal_file=path)
+    journal.record(1, {"Email": "bob@globex.com", "Confidence": 56.5})
+    journal.close()
+
+    assert _replay(df, path) == 1
+    assert df.at[1, "Confidence"] == 56.5
+    assert df.at[1, "Email"] == "bob@globex.com"
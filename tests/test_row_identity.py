@@ -0,0 +1,75 @@
+"""Tests for lead keys: normalize_linkedin_url() and the row identities resume is keyed by"""
+
+import pandas as pd
+import pytest
+
+from email_finder.utils.lead_store import normalize_linkedin_url
+from email_finder.utils.resume import row_identities, row_identity
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.linkedin.com/in/Jane-Doe/?trk=public_profile",
+    "http://linkedin.com/in/jane-doe",
+    "linkedin.com/in/jane-doe/",
+    "  https://uk.linkedin.com/in/jane-doe#experience  ",
+    "HTTPS://WWW.LINKEDIN.COM/IN/JANE-DOE",
+])
+def test_linkedin_url_variants_share_a_key(url):
+    assert normalize_linkedin_url(url) == "linkedin.com/in/jane-doe"
+
+
+@pytest.mark.parametrize("url, key", [
+    ("https://example.com/people/Jane/?ref=1", "example.com/people/jane"),
+    ("https://notlinkedin.com/in/jane-doe", "notlinkedin.com/in/jane-doe"),
+    ("https://www.linkedin.com/", "linkedin.com"),
+])
+def test_other_urls_are_only_cleaned_up(url, key):
+    assert normalize_linkedin_url(url) == key
+
+
+@pytest.mark.parametrize("url", [None, float("nan"), "", "   ", "https://"])
+def test_blank_urls_have_no_key(url):
+    assert normalize_linkedin_url(url) is None
+
+
+def test_identity_is_the_same_for_every_spelling_of_a_url():
+    identity = row_identity("https://www.linkedin.com/in/Jane-Doe/?trk=x")
+
+    assert len(identity) == 16
+    int(identity, 16)
+    assert row_identity("linkedin.com/in/jane-doe") == identity
+
+
+def test_url_takes_precedence_over_the_name():
+    url = "https://www.linkedin.com/in/jane-doe"
+
+    assert row_identity(url, "Jane", "Doe", "Acme") == row_identity(url, "J.", "Smith", "Globex")
+    assert row_identity(url, "Jane", "Doe", "Acme") != row_identity(None, "Jane", "Doe", "Acme")
+
+
+def test_name_identity_ignores_case_and_spacing():
+    assert row_identity(None, "Jane", "Doe", "Acme Inc") == row_identity(float("nan"), " jane ", "DOE", "acme  inc")
+    assert row_identity(None, "Jane", "Doe", "Acme Inc") != row_identity(None, "Jane", "Doe", "Globex")
+
+
+@pytest.mark.parametrize("fields", [
+    (None, None, None, None),
+    (float("nan"), None, None, "Acme"),
+    ("", "  ", float("nan"), "Acme"),
+])
+def test_rows_without_url_or_name_have_no_identity(fields):
+    assert row_identity(*fields) is None
+
+
+def test_row_identities_keep_the_index_and_tolerate_missing_columns():
+    df = pd.DataFrame({
+        "LinkedIn Profile": ["https://www.linkedin.com/in/jane-doe/", None, None],
+        "First Name": ["Jane", "John", None],
+    }, index=[10, 11, 12])
+
+    identities = row_identities(df)
+
+    assert list(identities.index) == [10, 11, 12]
+    assert identities[10] == row_identity("linkedin.com/in/jane-doe")
+    assert identities[11] == row_identity(None, "John")
+    assert identities[12] is None
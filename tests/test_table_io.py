@@ -0,0 +1,100 @@
+"""Tests for chunked reading and part combining in email_finder.utils.table_io"""
+
+import pandas as pd
+import pytest
+
+from email_finder.utils.table_io import TablePartWriter, iter_table_chunks, read_table, write_table
+
+FORMATS = ["csv", "parquet", "feather"]
+
+
+def _require_format(fmt):
+    if fmt != "csv":
+        pytest.importorskip("pyarrow")
+
+
+def _lead_file(tmp_path, fmt, rows=10):
+    df = pd.DataFrame({
+        "Row": range(rows),
+        "First Name": [f"Lead {n}" for n in range(rows)],
+    })
+    path = str(tmp_path / f"leads.{fmt}")
+    write_table(df, path)
+    return path
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_chunks_are_labelled_with_file_row_numbers(tmp_path, fmt):
+    _require_format(fmt)
+    path = _lead_file(tmp_path, fmt)
+
+    chunks = list(iter_table_chunks(path, 4))
+
+    assert [list(chunk.index) for chunk in chunks] == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    for chunk in chunks:
+        assert list(chunk["Row"]) == list(chunk.index)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_skipped_rows_keep_their_numbers(tmp_path, fmt):
+    _require_format(fmt)
+    path = _lead_file(tmp_path, fmt)
+
+    chunks = list(iter_table_chunks(path, 4, skip_rows=3))
+
+    assert [list(chunk.index) for chunk in chunks] == [[3, 4, 5, 6], [7, 8, 9]]
+    for chunk in chunks:
+        assert list(chunk["Row"]) == list(chunk.index)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_skipping_every_row_yields_no_rows(tmp_path, fmt):
+    _require_format(fmt)
+    path = _lead_file(tmp_path, fmt)
+
+    # CSV gives one empty chunk (which keeps the header), the others none
+    assert sum(len(chunk) for chunk in iter_table_chunks(path, 4, skip_rows=10)) == 0
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_parts_are_widened_to_a_common_schema(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    output_file = str(tmp_path / f"results.{fmt}")
+    writer = TablePartWriter(output_file)
+
+    # The first chunk only has whole confidences and no emails yet
+    writer.write(pd.DataFrame({
+        "First Name": pd.Series(["Ann", "Bob"], dtype="category"),
+        "Confidence": pd.array([90, 80], dtype="Int16"),
+        "Email": [None, None],
+    }))
+    writer.write(pd.DataFrame({
+        "First Name": pd.Series(["Cy"], dtype="category"),
+        "Confidence": [56.5],
+        "Email": ["cy@example.com"],
+    }))
+
+    assert writer.done_rows() == 3
+    assert writer.finish() == 3
+    assert not (tmp_path / f"results.{fmt}.parts").exists()
+
+    df = read_table(output_file)
+    assert list(df["First Name"].astype(str)) == ["Ann", "Bob", "Cy"]
+    assert list(df["Confidence"]) == [90.0, 80.0, 56.5]
+    assert df["Email"].isna().tolist() == [True, True, False]
+    assert df["Email"].iloc[2] == "cy@example.com"
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_finished_parts_count_as_done_rows(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    output_file = str(tmp_path / f"results.{fmt}")
+    TablePartWriter(output_file).write(pd.DataFrame({"Row": [0, 1, 2]}))
+
+    # A restarted run picks up the parts of the interrupted one
+    writer = TablePartWriter(output_file)
+    assert writer.done_rows() == 3
+    writer.write(pd.DataFrame({"Row": [3]}))
+    writer.finish()
+
+    assert list(read_table(output_file)["Row"]) == [0, 1, 2, 3]
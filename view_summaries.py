@@ -1,150 +1,641 @@
-import pandas as pd
 import os
-import openai
+import asyncio
+import hashlib
+import argparse
 from dotenv import load_dotenv
 
+from email_finder.services.llm_client import get_client, open_call_log, print_usage_stats, write_usage_report
+
+from email_finder.services.summary_batch import (
+    MAX_BATCH_REQUESTS,
+    batch_custom_id,
+    download_batch_results,
+    load_batch_state,
+    submit_batch,
+    wait_for_batch,
+    write_batch_requests
+)
+from email_finder.services.summary_generator import (
+    SUMMARY_MODEL,
+    SummaryCache,
+    generate_summary,
+    generate_summaries_async,
+    get_summary_cache,
+    has_summary_data,
+    print_prompt_stats,
+    print_summary_cache_stats,
+    summary_cache_savings
+)
+from email_finder.utils.cassette import open_cassette
+from email_finder.utils.csv_handler import CheckpointJournal, process_csv_in_chunks
+from email_finder.utils.dtypes import compact_dtypes, compact_dtypes_enabled, format_memory_report
+from email_finder.utils.lazy import lazy_import
+from email_finder.utils.lead_store import normalize_linkedin_url, open_lead_store
+from email_finder.utils.profiling import add_profile_arguments, start_profiling
+from email_finder.utils.rate_limiter import AdaptiveRateLimiter
+from email_finder.utils.resume import ResumeState, describe_status
+from email_finder.utils.table_io import is_columnar, iter_table_chunks, read_columns, read_table
+
+pd = lazy_import("pandas")
+
 # Load environment variables
 load_dotenv()
 
-# Configure OpenAI
-openai.api_key = os.getenv("OPENAI_API_KEY")
+SUMMARY_COLUMN = "LinkedIn Summary"
+FINGERPRINT_COLUMN = "Summary Fingerprint"
 
+# Input fields a summary is generated from, a change to any of them makes the summary stale
+FINGERPRINT_FIELDS = ["First Name", "Last Name", "Job Title", "Company Name", "Location"]
 
-def generate_summary(profile_data):
-    """Generate a summary of the LinkedIn profile using OpenAI"""
-    try:
-        print("Generating summary using OpenAI...")
 
-        # Check if we have at least some data to work with
-        if not profile_data or (not profile_data.get("name") and not profile_data.get("title")):
-            print("⚠️ Insufficient profile data for summary generation")
-            return ""
+def has_profile_url(df):
+    """Boolean mask of rows that have a LinkedIn Profile URL"""
+    return df["LinkedIn Profile"].notna() & (df["LinkedIn Profile"] != "")
 
-        # Create prompt with available data
-        prompt_parts = [
-            "Create a professional summary for a sales outreach based on this LinkedIn profile information:"
-        ]
 
-        # Add all profile data we have
-        for key, value in profile_data.items():
-            if value:
-                prompt_parts.append(f"{key.capitalize()}: {value}")
+def profile_fingerprint(values):
+    """
+    Fingerprint the input fields of a row
 
-        # Add instructions
-        prompt_parts.append(
-            "The summary should be concise (2-3 sentences) and highlight the person's current role, experience, "
-            "and any relevant background that would be useful for sales outreach. Focus on their professional "
-            "capabilities and decision-making authority. If some information is missing, focus on what is available."
-        )
+    Args:
+        values (iterable): Values of FINGERPRINT_FIELDS for the row
 
-        prompt = "\n\n".join(prompt_parts)
+    Returns:
+        str: Short hex digest that changes whenever one of the fields does
+    """
+    parts = []
+    for value in values:
+        if value is None or value != value:  # None or NaN
+            value = ""
+        parts.append(" ".join(str(value).split()))
 
-        print("Sending request to OpenAI API...")
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
 
-        # Use the new OpenAI API format (v1.0.0+)
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {"role": "system", "content": "You are an assistant that creates concise professional summaries."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=250,
-            temperature=0.7
-        )
 
-        summary = response.choices[0].message.content.strip()
-        print(f"Summary generated: {summary[:100]}...")
-        return summary
+def row_fingerprints(df):
+    """Series of profile fingerprints for every row of df"""
+    fields = df.reindex(columns=FINGERPRINT_FIELDS)
+    return pd.Series(
+        [profile_fingerprint(values) for values in fields.itertuples(index=False, name=None)],
+        index=df.index,
+        dtype=object
+    )
 
-    except Exception as e:
-        print(f"❌ Error generating summary: {str(e)}")
-        return f"[ERROR: {str(e)}]"  # Return error message instead of empty string
 
+def load_previous_summaries(output_csv):
+    """
+    Load the summaries of an earlier run from its output file
 
-def main():
-    # Load the CSV file
-    input_csv = os.getenv("INPUT_CSV", "input.csv")
-    output_csv = os.getenv("OUTPUT_CSV", "leads_with_summaries_fixed.csv")
+    Args:
+        output_csv (str): Output file of the earlier run
 
-    print(f"Loading CSV from: {input_csv}")
-    df = pd.read_csv(input_csv)
+    Returns:
+        DataFrame: Summary and fingerprint columns indexed by normalized
+            LinkedIn URL, empty if there is no usable earlier output
+    """
+    columns = ["LinkedIn Profile", SUMMARY_COLUMN, FINGERPRINT_COLUMN]
+    empty = pd.DataFrame(columns=columns[1:], dtype=object)
 
-    # Confirm LinkedIn Profile column exists
-    if "LinkedIn Profile" not in df.columns:
-        print("Error: LinkedIn Profile column not found in the CSV")
-        return
+    if not os.path.exists(output_csv):
+        return empty
 
-    # Initialize or reset LinkedIn Summary column
-    df["LinkedIn Summary"] = ""
+    header = read_columns(output_csv)
+    if any(column not in header for column in columns):
+        return empty
 
-    # Count profiles to process
-    profiles_to_process = df[df["LinkedIn Profile"].notna() & (df["LinkedIn Profile"] != "")]
-    count = len(profiles_to_process)
-    print(f"Found {count} LinkedIn profiles to process")
+    # Only the three columns we need, so this stays small for large files
+    previous = read_table(output_csv, columns=columns, dtype=str, keep_default_na=False).fillna("")
+    return usable_summaries(previous.set_index(previous["LinkedIn Profile"].map(normalize_linkedin_url)))
 
-    # Ask for confirmation
-    max_profiles = input(f"How many profiles do you want to process (max {count})? ")
-    try:
-        max_profiles = int(max_profiles)
-        if max_profiles <= 0:
-            print("Exiting without processing any profiles")
-            return
-        max_profiles = min(max_profiles, count)
-    except:
-        max_profiles = 5  # Default to 5 if input is invalid
-        print(f"Invalid input. Processing first {max_profiles} profiles only")
 
-    # Process profiles
-    processed = 0
-    for i, row in profiles_to_process.iterrows():
+def load_stored_summaries(store):
+    """
+    Load the summaries kept in the pipeline store
+
+    Args:
+        store (LeadStore): Pipeline store
+
+    Returns:
+        DataFrame: Summary and fingerprint columns indexed by normalized
+            LinkedIn URL
+    """
+    stored = store.read([SUMMARY_COLUMN, FINGERPRINT_COLUMN]).fillna("").astype(str)
+    return usable_summaries(stored)
+
+
+def usable_summaries(previous):
+    """Keep the fingerprinted, valid summaries, one per lead"""
+    previous = previous[
+        previous.index.notna()
+        & (previous[FINGERPRINT_COLUMN] != "")
+        & is_valid_summary(previous[SUMMARY_COLUMN])
+    ]
+    return previous.loc[~previous.index.duplicated(keep="last"), [SUMMARY_COLUMN, FINGERPRINT_COLUMN]]
+
+
+def is_valid_summary(summaries):
+    """Boolean mask of non-empty summaries that aren't error placeholders"""
+    return (summaries != "") & ~summaries.str.startswith("[ERROR")
+
+
+def prepare_summaries(df, previous, full=False):
+    """
+    Set up the summary columns of df
+
+    A row keeps the summary it already has, or picks up the one from the
+    earlier output (matched by normalized LinkedIn URL), as long as the
+    stored fingerprint matches its current input fields. With full=True
+    every summary is cleared instead.
+
+    Args:
+        df (DataFrame): Rows to prepare, modified in place
+        previous (DataFrame): Earlier summaries from load_previous_summaries()
+        full (bool): Regenerate every summary
+
+    Returns:
+        Series: Current fingerprint of every row
+    """
+    for column in (SUMMARY_COLUMN, FINGERPRINT_COLUMN):
+        if column in df.columns:
+            df[column] = df[column].fillna("").astype(str)
+        else:
+            df[column] = ""
+
+    fingerprints = row_fingerprints(df)
+
+    if full:
+        df[SUMMARY_COLUMN] = ""
+        df[FINGERPRINT_COLUMN] = ""
+    elif len(previous):
+        urls = df["LinkedIn Profile"].map(normalize_linkedin_url)
+        carry = ~is_up_to_date(df, fingerprints) & (urls.map(previous[FINGERPRINT_COLUMN]) == fingerprints)
+        df.loc[carry, SUMMARY_COLUMN] = urls[carry].map(previous[SUMMARY_COLUMN])
+        df.loc[carry, FINGERPRINT_COLUMN] = fingerprints[carry]
+
+    return fingerprints
+
+
+def is_up_to_date(df, fingerprints):
+    """Boolean mask of rows whose summary was generated from their current input fields"""
+    return is_valid_summary(df[SUMMARY_COLUMN]) & (df[FINGERPRINT_COLUMN] == fingerprints)
+
+
+def summary_status(values):
+    """Resume state status of a row from the summary journaled for it"""
+    return "error" if values.get(SUMMARY_COLUMN, "").startswith("[ERROR") else "summarized"
+
+
+def pending_rows(df, fingerprints):
+    """Boolean mask of rows that need a new summary"""
+    return has_profile_url(df) & ~is_up_to_date(df, fingerprints)
+
+
+def build_profile_data(row):
+    """Create a simple profile data dict from the CSV columns of a row"""
+    profile_data = {
+        "name": f"{row.get('First Name', '')} {row.get('Last Name', '')}".strip(),
+        "title": row.get('Job Title', ''),
+        "company": row.get('Company Name', ''),
+        "location": row.get('Location', '')
+    }
+
+    # Only keep non-empty values
+    return {k: v for k, v in profile_data.items() if v}
+
+
+def summarize_rows(df, journal, fingerprints, max_profiles, processed, samples):
+    """
+    Generate summaries for the rows of df whose summary is missing or stale
+
+    Args:
+        df (DataFrame): Rows to summarize
+        journal (CheckpointJournal): Journal that records each summary
+        fingerprints (Series): Current fingerprint of every row
+        max_profiles (int): Maximum number of summaries for the whole run
+        processed (int): Summaries already generated earlier in the run
+        samples (list): Collects up to three (name, summary) pairs to show
+
+    Returns:
+        int: Summaries generated so far in the run
+    """
+    for i, row in df[pending_rows(df, fingerprints)].iterrows():
         if processed >= max_profiles:
             break
 
         url = row["LinkedIn Profile"]
         print(f"\nProcessing profile {processed + 1}/{max_profiles}: {url}")
 
-        # Create a simple profile data from existing row information
-        profile_data = {
-            "name": f"{row.get('First Name', '')} {row.get('Last Name', '')}".strip(),
-            "title": row.get('Job Title', ''),
-            "company": row.get('Company Name', ''),
-            "location": row.get('Location', '')
-        }
-
-        # Only keep non-empty values
-        profile_data = {k: v for k, v in profile_data.items() if v}
+        profile_data = build_profile_data(row)
 
         if profile_data:
             summary = generate_summary(profile_data)
             if summary:
-                # Save the summary directly to the dataframe
-                df.at[i, "LinkedIn Summary"] = summary
+                # Save the summary and the fingerprint it was generated from
+                journal.apply(i, {SUMMARY_COLUMN: summary, FINGERPRINT_COLUMN: fingerprints[i]})
                 print(f"✅ Summary saved for row {i + 1}")
 
-                # Save after each profile to avoid losing progress
-                df.to_csv(output_csv, index=False)
-                print(f"Progress saved to {output_csv}")
-
                 processed += 1
+                if len(samples) < 3:
+                    name = f"{row.get('First Name', '')} {row.get('Last Name', '')}".strip()
+                    samples.append((name, summary))
         else:
             print(f"⚠️ No profile data found for {url}")
 
-    # Final save
-    df.to_csv(output_csv, index=False)
+    return processed
+
+
+def summarize_rows_async(df, journal, fingerprints, max_profiles, processed, samples, limiter):
+    """
+    Generate summaries like summarize_rows, with several requests in flight
+
+    Summaries are journaled in row order as soon as every earlier row is done.
+
+    Args:
+        df (DataFrame): Rows to summarize
+        journal (CheckpointJournal): Journal that records each summary
+        fingerprints (Series): Current fingerprint of every row
+        max_profiles (int): Maximum number of summaries for the whole run
+        processed (int): Summaries already generated earlier in the run
+        samples (list): Collects up to three (name, summary) pairs to show
+        limiter (AdaptiveRateLimiter): Limits and throttles the requests
+
+    Returns:
+        int: Summaries generated so far in the run
+    """
+    profiles = []
+    for i, row in df[pending_rows(df, fingerprints)].iterrows():
+        if processed + len(profiles) >= max_profiles:
+            break
+
+        profile_data = build_profile_data(row)
+        if profile_data:
+            profiles.append((i, profile_data))
+        else:
+            print(f"⚠️ No profile data found for {row['LinkedIn Profile']}")
+
+    if not profiles:
+        return processed
+
+    print(f"\nSummarizing {len(profiles)} profiles with up to {limiter.max_concurrency} requests in flight")
+    progress = {"processed": processed}
+    names = {i: profile_data.get("name", "") for i, profile_data in profiles}
+
+    def save(i, summary):
+        if not summary:
+            return
+
+        # Save the summary and the fingerprint it was generated from
+        journal.apply(i, {SUMMARY_COLUMN: summary, FINGERPRINT_COLUMN: fingerprints[i]})
+        progress["processed"] += 1
+        print(f"✅ Summary saved for row {i + 1} ({progress['processed']}/{max_profiles})")
+
+        if len(samples) < 3:
+            samples.append((names[i], summary))
+
+    asyncio.run(generate_summaries_async(profiles, limiter, save))
+    return progress["processed"]
+
+
+def collect_batch_profiles(frames, max_profiles):
+    """
+    Pick the rows to send in a batch
+
+    Rows whose summary is already in the summary cache are left out, they
+    are filled in from the cache when the results are merged.
+
+    Args:
+        frames (iterable): (DataFrame, fingerprints) pairs covering the input
+        max_profiles (int): Maximum number of rows to summarize
+
+    Returns:
+        list: (custom_id, profile_data) pairs to send
+    """
+    cache = get_summary_cache()
+    profiles = []
+    selected = 0
+
+    for frame, fingerprints in frames:
+        for i, row in frame[pending_rows(frame, fingerprints)].iterrows():
+            if selected >= max_profiles or len(profiles) >= MAX_BATCH_REQUESTS:
+                return profiles
+
+            profile_data = build_profile_data(row)
+            if not has_summary_data(profile_data):
+                continue
+
+            selected += 1
+            if cache:
+                cache_key = SummaryCache.key_for(SUMMARY_MODEL, profile_data)
+                if cache.store.get(SummaryCache.NAMESPACE, cache_key, None):
+                    continue
+
+            profiles.append((batch_custom_id(i, fingerprints[i]), profile_data))
+
+    return profiles
+
+
+def run_batch(client, frames, max_profiles, output_csv, poll_interval):
+    """
+    Submit (or resume) a Batch API job for the pending rows and wait for it
+
+    Args:
+        client (openai.OpenAI): Client to use
+        frames (callable): Returns (DataFrame, fingerprints) pairs covering the input
+        max_profiles (int): Maximum number of rows to summarize
+        output_csv (str): Output file, the batch files are kept next to it
+        poll_interval (float): Seconds between status checks
+
+    Returns:
+        dict: custom_id -> (summary, usage) for every finished request
+    """
+    state_file = f"{output_csv}.batch.json"
+    request_file = f"{output_csv}.batch.jsonl"
+
+    state = load_batch_state(state_file)
+    if state:
+        print(f"Resuming batch {state['batch_id']} (last seen {state['status']})")
+    else:
+        profiles = collect_batch_profiles(frames(), max_profiles)
+        if not profiles:
+            print("Nothing to send, all selected summaries are cached")
+            return {}
+
+        count = write_batch_requests(profiles, request_file)
+        state = submit_batch(client, request_file, state_file, {"output": os.path.basename(output_csv)})
+        print(f"Submitted batch {state['batch_id']} with {count} requests, state saved to {state_file}")
+
+    batch = wait_for_batch(client, state, state_file, poll_interval)
+    if batch.status != "completed":
+        print(f"⚠️ Batch ended as {batch.status}, merging whatever results it produced")
+
+    results = download_batch_results(client, batch)
+    print(f"Downloaded {len(results)} batch results")
+    return results
+
+
+def merge_batch_results(df, journal, fingerprints, results, processed, samples):
+    """
+    Write batch results (or cached summaries) into the pending rows of df
+
+    Args:
+        df (DataFrame): Rows to fill in
+        journal (CheckpointJournal): Journal that records each summary
+        fingerprints (Series): Current fingerprint of every row
+        results (dict): custom_id -> (summary, usage) from the batch, merged
+            results are taken out of it
+        processed (int): Summaries merged earlier in the run
+        samples (list): Collects up to three (name, summary) pairs to show
+
+    Returns:
+        int: Summaries merged so far in the run
+    """
+    cache = get_summary_cache()
+
+    for i, row in df[pending_rows(df, fingerprints)].iterrows():
+        profile_data = build_profile_data(row)
+        if not has_summary_data(profile_data):
+            continue
+
+        cache_key = SummaryCache.key_for(SUMMARY_MODEL, profile_data)
+        result = results.pop(batch_custom_id(i, fingerprints[i]), None)
+
+        if result:
+            summary, usage = result
+            if cache and not summary.startswith("[ERROR"):
+                cache.put(cache_key, summary, usage)
+        elif cache:
+            summary = cache.get(cache_key)
+            if not summary:
+                continue
+        else:
+            continue
+
+        # Save the summary and the fingerprint it was generated from
+        journal.apply(i, {SUMMARY_COLUMN: summary, FINGERPRINT_COLUMN: fingerprints[i]})
+        processed += 1
+        if len(samples) < 3:
+            samples.append((profile_data.get("name", ""), summary))
+
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate LinkedIn profile summaries for the rows of a lead CSV"
+    )
+    parser.add_argument(
+        "--input", "-i",
+        help="Path to the input CSV (default: $INPUT_CSV or input.csv)",
+        default=os.getenv("INPUT_CSV", "input.csv")
+    )
+    parser.add_argument(
+        "--output", "-o",
+        help="Path to the output CSV (default: $OUTPUT_CSV or leads_with_summaries_fixed.csv)",
+        default=os.getenv("OUTPUT_CSV", "leads_with_summaries_fixed.csv")
+    )
+    parser.add_argument(
+        "--limit", "-n",
+        help="Maximum number of summaries to generate (default: all missing or stale ones)",
+        type=int,
+        default=None
+    )
+    parser.add_argument(
+        "--full",
+        help="Regenerate every summary instead of only missing or stale ones",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        help="Send several OpenAI requests at once, backing off on rate limits",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--concurrency",
+        help="Most requests in flight in --async mode (default: $SUMMARY_CONCURRENCY or 8)",
+        type=int,
+        default=int(os.getenv("SUMMARY_CONCURRENCY", "8"))
+    )
+    parser.add_argument(
+        "--batch",
+        help="Summarize through the OpenAI Batch API; rerun to resume polling a submitted batch",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        help="Seconds between batch status checks in --batch mode (default: 30)",
+        type=float,
+        default=30.0
+    )
+    parser.add_argument(
+        "--chunk-size", "-c",
+        help="Stream the input in chunks of this many rows (default: $CHUNK_SIZE, or load the whole file)",
+        type=int,
+        default=int(os.getenv("CHUNK_SIZE", "0"))
+    )
+    parser.add_argument(
+        "--status",
+        help="Show the progress of the output file and exit",
+        action="store_true"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    input_csv = args.input
+    output_csv = args.output
+    chunk_size = args.chunk_size
+
+    if args.status:
+        print("\n".join(describe_status(input_csv, output_csv)))
+        return
+
+    # Record or replay network calls when CASSETTE is set
+    open_cassette()
+    if args.profile:
+        start_profiling(output_csv, args.profile_top)
+
+    # Load the CSV file
+    print(f"Loading CSV from: {input_csv}")
+    columns = read_columns(input_csv)
+
+    # Read the fingerprinted fields as text so a row hashes the same however it was loaded
+    text_columns = ["LinkedIn Profile", SUMMARY_COLUMN, FINGERPRINT_COLUMN] + FINGERPRINT_FIELDS
+    dtypes = {c: str for c in columns if c in text_columns}
+
+    # A columnar input is read with only the columns summaries need, the
+    # rest is copied over from the input whenever the output is written
+    base_file = None
+    if chunk_size:
+        # Rows are streamed chunk by chunk below
+        print(f"Streaming input in chunks of {chunk_size} rows")
+    elif is_columnar(input_csv):
+        df = read_table(input_csv, columns=text_columns, dtype=dtypes)
+        base_file = input_csv
+    else:
+        df = read_table(input_csv, dtype=dtypes)
+
+    # Confirm LinkedIn Profile column exists
+    if "LinkedIn Profile" not in columns:
+        print("Error: LinkedIn Profile column not found in the CSV")
+        return
+
+    # Summaries from an earlier run are reused while their input fields are unchanged
+    previous = pd.DataFrame(columns=[SUMMARY_COLUMN, FINGERPRINT_COLUMN], dtype=object)
+    if not args.full:
+        previous = load_previous_summaries(output_csv)
+        if len(previous):
+            print(f"Found {len(previous)} earlier summaries in {output_csv}")
+
+    # With LEAD_STORE set, summaries written by any tool or run are reused too
+    store = open_lead_store("view_summaries")
+    if store is not None and not args.full:
+        stored = load_stored_summaries(store)
+        print(f"Found {len(stored)} summaries in lead store {store.path}")
+        previous = usable_summaries(pd.concat([stored, previous]))
+
+    # Count profiles that need a summary
+    if chunk_size:
+        count = 0
+        for chunk in iter_table_chunks(input_csv, chunk_size, columns=list(dtypes), dtype=dtypes):
+            count += int(pending_rows(chunk, prepare_summaries(chunk, previous, args.full)).sum())
+    else:
+        fingerprints = prepare_summaries(df, previous, args.full)
+        count = int(pending_rows(df, fingerprints).sum())
+
+        # Categoricals and Arrow strings instead of one Python object per cell
+        if compact_dtypes_enabled():
+            print("\n".join(format_memory_report(compact_dtypes(df))))
+    print(f"Found {count} LinkedIn profiles with a missing or outdated summary")
+
+    max_profiles = count if args.limit is None else min(args.limit, count)
+    if args.limit is not None and args.limit <= 0:
+        print("Exiting without processing any profiles")
+        return
+
+    # Process profiles
+    samples = []
+    open_call_log(output_csv)
+    limiter = None
+    if args.use_async:
+        limiter = AdaptiveRateLimiter(max_concurrency=args.concurrency)
+
+    results = None
+    if args.batch:
+        def frames():
+            if not chunk_size:
+                return [(df, fingerprints)]
+            return (
+                (chunk, prepare_summaries(chunk, previous, args.full))
+                for chunk in iter_table_chunks(input_csv, chunk_size, dtype=dtypes)
+            )
+
+        # The base URL comes from OPENAI_BASE_URL, e.g. a local benchmarks/fake_openai_server.py
+        results = run_batch(get_client(), frames, max_profiles, output_csv, args.poll_interval)
+
+    def summarize(frame, journal, fingerprints, processed):
+        if results is not None:
+            return merge_batch_results(frame, journal, fingerprints, results, processed, samples)
+        if limiter:
+            return summarize_rows_async(frame, journal, fingerprints, max_profiles, processed, samples, limiter)
+        return summarize_rows(frame, journal, fingerprints, max_profiles, processed, samples)
+
+    if chunk_size:
+        progress = {"processed": 0}
+
+        def process_chunk(chunk, journal):
+            if store is not None:
+                store.add_leads(chunk)
+            fingerprints = prepare_summaries(chunk, previous, args.full)
+            journal.replay()
+            progress["processed"] = summarize(chunk, journal, fingerprints, progress["processed"])
+
+        process_csv_in_chunks(input_csv, output_csv, chunk_size, process_chunk, store=store, dtype=dtypes)
+        processed = progress["processed"]
+    else:
+        if store is not None:
+            store.add_leads(df)
+        # Summaries are picked up again by URL and fingerprint, the state is for --status
+        state = ResumeState(output_csv, summary_status)
+        journal = CheckpointJournal(output_csv, df, base_file=base_file, store=store, state=state)
+        try:
+            journal.replay()
+            processed = summarize(df, journal, fingerprints, 0)
+        finally:
+            # Final save
+            journal.close()
+            state.close()
+    if store is not None:
+        store.close()
+
+    if results:
+        # Paid-for results that matched no row, keep the batch to merge them later
+        print(f"Warning: {len(results)} batch results matched no row, keeping {output_csv}.batch.json "
+              f"(delete it to submit a new batch)")
+    elif args.batch:
+        # Results are in the output now, the next run can submit a new batch
+        for path in (f"{output_csv}.batch.json", f"{output_csv}.batch.jsonl"):
+            if os.path.exists(path):
+                os.remove(path)
+
     print(f"\nProcessing complete. {processed} summaries generated and saved to {output_csv}")
+    print_summary_cache_stats()
+    print_prompt_stats()
+    print_usage_stats()
+    write_usage_report(output_csv, summary_cache_savings())
+    if limiter:
+        stats = limiter.stats()
+        print(
+            f"OpenAI requests: {stats['requests']}, rate limited {stats['throttled']} times, "
+            f"paused {stats['paused_seconds']:.1f}s, final concurrency {stats['concurrency']}"
+        )
 
     # Show a sample of the results
-    if processed > 0:
+    if samples:
         print("\nSample of generated summaries:")
-        summaries = df[df["LinkedIn Summary"].notna() & (df["LinkedIn Summary"] != "")]
-        for i in range(min(3, len(summaries))):
-            row = summaries.iloc[i]
-            name = f"{row.get('First Name', '')} {row.get('Last Name', '')}".strip()
-            summary = row.get('LinkedIn Summary', '')
+        for name, summary in samples:
             print(f"\nProfile: {name}")
             print(f"Summary: {summary}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()